@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Throughput of find_diminutives with different analysers: morfeusz2, in-memory dictionary
+(dumped from morfeusz2 analyses of the benchmark vocabulary) and both of them behind CachingAnalyser.
+
+    Usage:
+        python ./benchmarks/bench_analysers.py [-s SIZE_MB]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from common import load_words
+
+import rozpoznawaczek.rozpoznawaczek as rz
+
+PUNCTUATION = ['', '', '', ',', '.', '?', '!']
+
+
+def generate_text(size: int) -> str:
+    words = load_words()
+    words += [word.capitalize() for word in words]
+    random.seed(0)
+    parts = []
+    length = 0
+    while length < size:
+        line = ' '.join(random.choice(words) + random.choice(PUNCTUATION) for _ in range(12)) + '\n'
+        parts.append(line)
+        length += len(line)
+    return ''.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark analysers')
+    parser.add_argument('-s', '--size', type=float, default=1, help='Size of the generated text in MB')
+    args = parser.parse_args()
+
+    text = generate_text(int(args.size * 1024 * 1024))
+    print(f'{len(text) / 1024 / 1024:.1f} MB of text')
+
+    morfeusz_analyser, morfeusz_lemma_analyser = rz.morfeusz_analyser, rz.morfeusz_lemma_analyser
+    words = load_words()
+    words += [word.capitalize() for word in words]
+    lemmas = {lemma.split(':')[0] for word in words for _, _, (_, lemma, _, _, _) in morfeusz_analyser.analyse(word)}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'dictionary.tsv')
+        started = time.perf_counter()
+        interpretations = rz.dump_dictionary(sorted(set(words) | lemmas), path)
+        dictionary_analyser = rz.DictionaryAnalyser(path)
+        print(f'dictionary: {len(dictionary_analyser)} forms, {interpretations} interpretations, '
+              f'dumped and loaded in {time.perf_counter() - started:.2f} s')
+
+        analysers = [
+            ('morfeusz2', morfeusz_analyser, morfeusz_lemma_analyser),
+            ('cached morfeusz2', rz.CachingAnalyser(morfeusz_analyser), morfeusz_lemma_analyser),
+            ('dictionary', dictionary_analyser, None),
+            ('cached dictionary', rz.CachingAnalyser(dictionary_analyser), dictionary_analyser),
+        ]
+        results = []
+        for name, analyser, lemma_analyser in analysers:
+            rz.init_analysers(analyser, lemma_analyser)
+            started = time.perf_counter()
+            results.append(rz.find_diminutives_with_probabilities(text))
+            elapsed = time.perf_counter() - started
+            print(f'{name:>18}: {elapsed:7.2f} s {len(text) / 1024 / elapsed:8.1f} KB/s, '
+                  f'same results: {results[-1] == results[0]}')
+        rz.init_analysers(morfeusz_analyser, morfeusz_lemma_analyser)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Analysis of a run-fragmented docx document (formatting changes every few characters, also inside words):
+find_diminutives for every run, find_diminutives_many over runs and over whole paragraphs
+(as `docx_highlight.highlight` does), and the whole highlighting, optionally in worker processes.
+
+    Usage:
+        python ./benchmarks/bench_docx.py [-p PARAGRAPHS] [-r MAX_RUN_LENGTH] [-j JOBS]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import io
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from common import load_words
+from docx import Document  # type: ignore
+from docx.enum.text import WD_COLOR_INDEX  # type: ignore
+
+import rozpoznawaczek.rozpoznawaczek as rz
+from rozpoznawaczek.docx_highlight import highlight
+
+
+def generate_document(paragraphs: int, max_run_length: int) -> bytes:
+    """Paragraphs of random words, cut into runs of random lengths with alternating formatting."""
+    words = load_words()
+    random.seed(0)
+    document = Document()
+    for _ in range(paragraphs):
+        text = ' '.join(random.choice(words) for _ in range(40)) + '.'
+        paragraph = document.add_paragraph()
+        position = 0
+        while position < len(text):
+            length = random.randint(1, max_run_length)
+            run = paragraph.add_run(text[position:position + length])
+            run.bold = random.random() < 0.5
+            run.italic = random.random() < 0.3
+            position += length
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark docx analysis')
+    parser.add_argument('-p', '--paragraphs', type=int, default=100, help='Number of paragraphs')
+    parser.add_argument('-r', '--max-run-length', type=int, default=12, help='Maximal length of a run')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of worker processes for highlighting')
+    args = parser.parse_args()
+
+    data = generate_document(args.paragraphs, args.max_run_length)
+    document = Document(io.BytesIO(data))
+    runs = [[run.text for run in paragraph.runs] for paragraph in document.paragraphs]
+    print(f'{len(runs)} paragraphs, {sum(len(paragraph_runs) for paragraph_runs in runs)} runs')
+    rz.find_diminutives('kotek')  # warm up
+
+    variants = [
+        ('every run', lambda: [rz.find_diminutives(text) for paragraph_runs in runs for text in paragraph_runs]),
+        ('batched runs', lambda: rz.find_diminutives_many(text for paragraph_runs in runs for text in paragraph_runs)),
+        ('paragraphs', lambda: rz.find_diminutives_many(''.join(paragraph_runs) for paragraph_runs in runs)),
+    ]
+    for name, func in variants:
+        rz.stats.reset()
+        started = time.perf_counter()
+        results = func()
+        elapsed = time.perf_counter() - started
+        print(f'{name:>14}: {elapsed:7.3f} s, {rz.stats.snapshot()["counters"]["analysed_texts"]:6d} analyser calls, '
+              f'{sum(len(diminutives) for diminutives in results):6d} diminutives')
+
+    executor = ProcessPoolExecutor(args.jobs, initializer=rz.init_worker) if args.jobs > 1 else None
+    if executor is not None:
+        list(executor.map(rz.find_diminutives, ['kotek'] * args.jobs))  # warm up workers
+
+    rz.stats.reset()
+    started = time.perf_counter()
+    _, diminutives_found = highlight(Document(io.BytesIO(data)), WD_COLOR_INDEX.YELLOW, executor, args.jobs)
+    print(f'{"highlight":>14}: {time.perf_counter() - started:7.3f} s, '
+          f'{rz.stats.snapshot()["counters"]["analysed_texts"]:6d} analyser calls, {diminutives_found:6d} diminutives')
+    if executor is not None:
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""`rozpoznawaczek-evaluate`: analysis of labelled words and evaluation of a grid of weights and thresholds
+with different numbers of worker processes, for the training words repeated a number of times.
+
+    Usage:
+        python ./benchmarks/bench_evaluate.py [-r REPEAT] [-w WEIGHT [WEIGHT ...]] [-j JOBS [JOBS ...]]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import rozpoznawaczek.evaluate as ev
+
+DIMINUTIVES_FILES = ['./tests/training_diminutives.txt']
+NOT_DIMINUTIVES_FILES = ['./tests/training_not_diminutives.txt']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark evaluation of weights and thresholds')
+    parser.add_argument('-r', '--repeat', type=int, default=100, help='Number of copies of the training words')
+    parser.add_argument('-w', '--weights', nargs='+', type=float, default=ev.DEFAULT_WEIGHTS,
+                        help='Weights to try for every check')
+    parser.add_argument('-j', '--jobs', nargs='+', type=int, default=[1, 2, 4], help='Numbers of worker processes')
+    args = parser.parse_args()
+
+    if ev.numpy_module() is None:
+        print('numpy is not installed: pip install rozpoznawaczek[FAST]')
+        return
+
+    words, labels = ev.read_labelled(DIMINUTIVES_FILES, NOT_DIMINUTIVES_FILES)
+    words, labels = words * args.repeat, labels * args.repeat
+
+    start = time.perf_counter()
+    features = ev.extract_features(words, labels)
+    print(f'{"features":>16}: {time.perf_counter() - start:7.3f} s, {len(words)} words')
+
+    weights = ev.weight_grid(args.weights)
+    thresholds = ev.DEFAULT_THRESHOLDS
+    for jobs in args.jobs:
+        executor = None
+        if jobs > 1:
+            executor = ProcessPoolExecutor(jobs, initializer=ev.init_evaluation_worker,
+                                           initargs=(features, thresholds))
+        try:
+            start = time.perf_counter()
+            ev.sweep(features, weights, thresholds, executor, jobs)
+            elapsed = time.perf_counter() - start
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        combinations = len(weights) * len(thresholds)
+        print(f'{f"sweep, {jobs} jobs":>16}: {elapsed:7.3f} s, {combinations / elapsed:10.0f} combinations/s')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Scaling of `rozpoznawaczek --jobs N` with the number of worker processes.
+
+    Usage:
+        python ./benchmarks/bench_jobs.py [-s SIZE_MB] [-j 1 2 4 ...]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import load_words
+
+
+def generate_text(size: int) -> str:
+    words = load_words()
+    random.seed(0)
+    parts = []
+    length = 0
+    while length < size:
+        line = ' '.join(random.choice(words) for _ in range(12)) + '.\n'
+        parts.append(line)
+        length += len(line)
+    return ''.join(parts)
+
+
+def run(filename: str, jobs: int) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'from rozpoznawaczek import main; main()', '--jobs', str(jobs), '-i', filename],
+                   check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description='Benchmark --jobs scaling')
+    parser.add_argument('-s', '--size', type=float, default=2, help='Size of the generated text in MB')
+    parser.add_argument('-j', '--jobs', type=int, nargs='+',
+                        default=sorted({1, 2, 4, 8, 16, 32, cpus} & set(range(1, cpus + 1))))
+    args = parser.parse_args()
+
+    text = generate_text(int(args.size * 1024 * 1024))
+    with tempfile.NamedTemporaryFile('w', suffix='.txt') as f:
+        f.write(text)
+        f.flush()
+
+        print(f'{len(text) / 1024 / 1024:.1f} MB of text, {cpus} CPUs')
+        base_time = None
+        for jobs in args.jobs:
+            elapsed = run(f.name, jobs)
+            if base_time is None:
+                base_time = elapsed
+            print(f'jobs={jobs:<3}: {elapsed:8.2f} s {len(text) / 1024 / elapsed:10.1f} KB/s '
+                  f'{base_time / elapsed:6.2f}x')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Precompiled `Lexicon`: build time, load time and throughput vs the live analysis.
+The lexicon has all forms of lemmas of the training words, the text is made of random such forms.
+
+    Usage:
+        python ./benchmarks/bench_lexicon.py [-s SIZE_MB]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from common import load_words
+
+from rozpoznawaczek.lexicon import Lexicon, build_lexicon, generate_forms
+from rozpoznawaczek.rozpoznawaczek import (find_diminutives,
+                                           morfeusz_lemma_analyser)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark precompiled lexicon')
+    parser.add_argument('-s', '--size', type=float, default=1, help='Size of the generated text in MB')
+    args = parser.parse_args()
+
+    lemmas = {lemma.split(':')[0] for word in load_words()
+              for _, _, (_, lemma, _, _, _) in morfeusz_lemma_analyser.analyse(word)}
+    forms = sorted(set(generate_forms(sorted(lemmas))))
+
+    random.seed(0)
+    lines = []
+    length = 0
+    while length < args.size * 1024 * 1024:
+        line = ' '.join(random.choice(forms) for _ in range(12)) + '.'
+        lines.append(line)
+        length += len(line)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'lexicon.bin')
+        start = time.perf_counter()
+        count, skipped = build_lexicon(forms, path)
+        print(f'{"build":>12}: {time.perf_counter() - start:8.3f} s, {count} forms ({skipped} skipped), '
+              f'{os.path.getsize(path) / 1024:.0f} KB')
+
+        start = time.perf_counter()
+        lexicon = Lexicon(path)
+        print(f'{"load":>12}: {(time.perf_counter() - start) * 1000:8.3f} ms')
+
+        start = time.perf_counter()
+        expected = [find_diminutives(line) for line in lines]
+        live_time = time.perf_counter() - start
+        print(f'{"live":>12}: {live_time:8.3f} s')
+
+        start = time.perf_counter()
+        results = [find_diminutives(line, token_cache=lexicon) for line in lines]
+        lexicon_time = time.perf_counter() - start
+        print(f'{"lexicon":>12}: {lexicon_time:8.3f} s {live_time / lexicon_time:6.2f}x, {lexicon.cache_info()}, '
+              f'same results: {results == expected}')
+        lexicon.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Throughput of many short inputs: `find_diminutives` per input vs one `find_diminutives_many` call.
+
+    Usage:
+        python ./benchmarks/bench_many.py [-n INPUTS]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import random
+import time
+
+from common import load_words
+
+from rozpoznawaczek import find_diminutives, find_diminutives_many
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch analysis of one-word inputs')
+    parser.add_argument('-n', '--inputs', type=int, default=10000, help='Number of one-word inputs')
+    args = parser.parse_args()
+
+    words = load_words()
+    random.seed(0)
+    inputs = [random.choice(words) for _ in range(args.inputs)]
+
+    start = time.perf_counter()
+    one_by_one = [find_diminutives(text) for text in inputs]
+    one_by_one_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = find_diminutives_many(inputs)
+    batched_time = time.perf_counter() - start
+
+    assert one_by_one == batched
+    print(f'{"find_diminutives":>22}: {args.inputs / one_by_one_time:10.0f} inputs/s')
+    print(f'{"find_diminutives_many":>22}: {args.inputs / batched_time:10.0f} inputs/s')
+    print(f'{"speedup":>22}: {one_by_one_time / batched_time:10.2f}x')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Stress benchmark of words' offsets computation in `find_diminutives` on pathological inputs.
+
+    Every word is reported (is_diminutive_func always returns True), so results compare
+    the whole segmentation with the old `text.index` based algorithm.
+
+    Usage:
+        python ./benchmarks/bench_offsets.py [-s MAX_SIZE_KB]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, List, Tuple
+
+import rozpoznawaczek.rozpoznawaczek as rz
+
+PATTERNS: Dict[str, Callable[[int], str]] = {
+    # morfeusz2 crashes on runs of punctuation longer than ~10k characters, so break them with spaces
+    'punctuation': lambda size: ('.,;!?…' * 1000 + ' ') * (size // 6001),
+    'long tokens': lambda size: ' '.join(['kotek' * 2000] * (size // 10001)),
+    'unicode whitespace': lambda size: 'kotki  psy\t　\r\nmiałaś ' * (size // 24),
+    'mixed': lambda size: ('Kawki,,, herbatki!!!   moje...kochanie?\n' + 'x' * 200 + ' ') * (size // 240),
+}
+
+
+def every_word(word, interpretations) -> bool:
+    return True
+
+
+def legacy_find_words(text: str) -> List[Tuple[int, int]]:
+    """Offsets computation from before the single cursor rewrite."""
+    text_analyzed = rz.morfeusz_analyser.analyse(text)
+    position_in_text = 0
+    i = 0
+    words = []
+    while i < len(text_analyzed) and rz.tag_table[text_analyzed[i][2][2]].is_separator:
+        position_in_text += len(text_analyzed[i][2][0])
+        i += 1
+
+    while i < len(text_analyzed):
+        word_morphology = None
+        while i < len(text_analyzed):
+            word_morphology = text_analyzed[i][2]
+            if rz.tag_table[word_morphology[2]].is_separator:
+                break
+            i += 1
+
+        if i == len(text_analyzed):
+            end_position_in_text = len(text)
+            to_skip = 0
+        else:
+            separator = word_morphology[0]
+            end_position_in_text = text.index(separator, position_in_text)
+            to_skip = len(separator)
+            i += 1
+
+        words.append((position_in_text, end_position_in_text))
+        position_in_text = end_position_in_text + to_skip
+
+        while i < len(text_analyzed) and rz.tag_table[text_analyzed[i][2][2]].is_separator:
+            position_in_text += len(text_analyzed[i][2][0])
+            i += 1
+    return words
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark offsets computation')
+    parser.add_argument('-s', '--size', type=int, default=512, help='Maximal size of the text in KB')
+    args = parser.parse_args()
+
+    for name, pattern in PATTERNS.items():
+        print(f'{name}:')
+        size = 64 * 1024
+        while size <= args.size * 1024:
+            text = pattern(size)
+
+            start = time.perf_counter()
+            words = rz.find_diminutives(text, every_word)
+            elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            legacy_words = legacy_find_words(text)
+            legacy_elapsed = time.perf_counter() - start
+
+            print(f'  {len(text) / 1024:8.0f} KB {len(words):8d} words: {elapsed:7.3f} s '
+                  f'({elapsed / len(text) * 1e9:6.1f} ns/char), legacy {legacy_elapsed:7.3f} s, '
+                  f'same results: {words == legacy_words}')
+            size *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark of the plural re-run path: fresh analyser per lemma vs shared analyser with cached verdicts.
+
+    Usage:
+        python ./benchmarks/bench_plural_rerun.py [-w WORDS]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import random
+import time
+from typing import List
+
+import morfeusz2  # type: ignore
+from common import load_words
+
+import rozpoznawaczek.rozpoznawaczek as rz
+
+
+def plural_forms() -> List[str]:
+    """Plural noun forms of all training words."""
+    forms = set()
+    for word in load_words():
+        for form, _, tag, _, _ in rz.morfeusz_analyser.generate(word):
+            if tag.startswith('subst:pl:'):
+                forms.add(form)
+    return sorted(forms)
+
+
+def is_lemma_diminutive_uncached(lemma: str) -> bool:
+    """What diminutive_probability did before: new analyser for every re-run."""
+    morf = morfeusz2.Morfeusz(whitespace=morfeusz2.SKIP_WHITESPACES)
+    lemma_segments = morf.analyse(lemma)
+    return rz.is_diminutive(lemma, lemma_segments, allows_rerun=False)
+
+
+def run(text: str) -> float:
+    start = time.perf_counter()
+    rz.find_diminutives(text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark plural re-run path')
+    parser.add_argument('-w', '--words', type=int, default=100,
+                        help='Number of words in the text (the fresh analyser path leaks memory, keep it small)')
+    args = parser.parse_args()
+
+    forms = plural_forms()
+    random.seed(0)
+    text = ' '.join(random.choice(forms) for _ in range(args.words))
+    print(f'{len(forms)} distinct plural forms, {args.words} words')
+
+    cached = rz.is_lemma_diminutive
+    try:
+        rz.is_lemma_diminutive = is_lemma_diminutive_uncached  # type: ignore
+        before = run(text)
+    finally:
+        rz.is_lemma_diminutive = cached  # type: ignore
+
+    cached.cache_clear()
+    after = run(text)
+
+    print(f'{"fresh analyser":>20}: {before:8.3f} s')
+    print(f'{"shared + cache":>20}: {after:8.3f} s')
+    print(f'{"speedup":>20}: {before / after:8.2f}x')
+    print(f'{"lemma cache":>20}: {cached.cache_info()}')
+
+
+if __name__ == "__main__":
+    main()
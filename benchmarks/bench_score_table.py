@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Vectorised `score_table` (numpy) vs scoring word by word with `diminutive_probability_in_table`,
+for growing prefixes of a generated text. Analysis with morfeusz2 is not measured.
+
+    Usage:
+        python ./benchmarks/bench_score_table.py [-s SIZE_MB]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import random
+import time
+
+from common import load_words
+
+import rozpoznawaczek.rozpoznawaczek as rz
+
+
+def generate_text(size: int) -> str:
+    words = load_words()
+    random.seed(0)
+    parts = []
+    length = 0
+    while length < size:
+        line = ' '.join(random.choice(words) for _ in range(12)) + '.\n'
+        parts.append(line)
+        length += len(line)
+    return ''.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark vectorised scoring')
+    parser.add_argument('-s', '--size', type=float, default=2, help='Size of the generated text in MB')
+    args = parser.parse_args()
+
+    if rz.numpy_module() is None:
+        print('numpy is not installed: pip install rozpoznawaczek[FAST]')
+        return
+
+    text = generate_text(int(args.size * 1024 * 1024))
+    rz.find_diminutives(text[:64 * 1024])  # warm up caches (lemma re-runs, tags)
+
+    size = 1024
+    while True:
+        table = rz.AnalysisTable.analyse(text[:size])
+        repeat = max(1, (1 << 20) // size)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            vectorised = rz.score_table(table)
+        vectorised_time = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            scalar = [rz.diminutive_probability_in_table(table, word_index)
+                      for word_index in range(table.number_of_words)]
+        scalar_time = (time.perf_counter() - start) / repeat
+
+        print(f'{min(size, len(text)) / 1024:8.0f} KB {len(table):8d} segments: vectorised {vectorised_time:8.4f} s, '
+              f'scalar {scalar_time:8.4f} s, {scalar_time / vectorised_time:5.2f}x, '
+              f'same results: {list(vectorised) == scalar}')
+        if size >= len(text):
+            break
+        size *= 8
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Overhead of logging in scoring: log-free `diminutive_probability` vs the previous implementation
+with `L.debug` calls in the inner loop (logger level INFO, so nothing is printed) vs `explain_diminutive`.
+
+    Usage:
+        python ./benchmarks/bench_scoring.py [-n NUMBER]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import timeit
+from typing import Dict, Iterable, List, Tuple
+
+from common import load_words
+
+import rozpoznawaczek.rozpoznawaczek as rz
+from rozpoznawaczek.rozpoznawaczek import L, suffix_matcher, tag_table
+
+
+def _matches_any(matches: Dict[str, str], set_names: Iterable[str], set_name: str) -> bool:
+    for name in set_names:
+        if name in matches:
+            L.debug('    -> Matched against %s', set_name)
+            return True
+
+    L.debug('    -> Not matched against %s', set_name)
+    return False
+
+
+def logging_diminutive_probability(word: str, interpretation: rz.Interpretation, allows_rerun: bool = True) -> float:
+    """diminutive_probability before logging was moved to explain_diminutive."""
+    _, _, word_morphology = interpretation
+    text_form, lemma, morphology_marker, _, _ = word_morphology
+    lemma = lemma.split(':')[0]
+
+    L.debug('Probability for `%s` (%s, %s, %s)', word, text_form, lemma, morphology_marker)
+
+    tag_info = tag_table[morphology_marker]
+    is_noun = tag_info.part_of_speech == 'rzeczownik'
+    is_adjective = tag_info.part_of_speech == 'przymiotnik'
+    is_unknown = tag_info.part_of_speech == 'nieznane'
+
+    number_of_matches = 0
+    number_of_checks = 0
+    lemma_matches = suffix_matcher.match(lemma)
+
+    if is_noun or is_adjective or is_unknown:
+        number_of_checks += 1
+        if _matches_any(lemma_matches, ('miczko',), 'Paweł Miczko'):
+            number_of_matches += 1
+
+    if is_noun:
+        L.debug('    -> rzeczownik')
+        gender = tag_info.gender
+        sets_to_check = ['dlugosz_other']
+        if tag_info.grammar_number == 'sg':
+            L.debug('        -> liczba pojedyncza')
+            if gender:
+                if gender.startswith('m'):
+                    L.debug('        -> rodzaj męski')
+                    sets_to_check.append('dlugosz_masculine')
+                elif gender.startswith('f'):
+                    L.debug('        -> rodzaj żeński')
+                    sets_to_check.append('dlugosz_feminine')
+                elif gender.startswith('n'):
+                    L.debug('        -> rodzaj nijaki')
+                    sets_to_check.append('dlugosz_neuter')
+                elif gender.startswith('p'):
+                    L.debug('        -> rodzaj przymnogi')
+                    sets_to_check.append('dlugosz_plural')
+            number_of_checks += 1
+            if _matches_any(lemma_matches, sets_to_check, 'Długosz'):
+                number_of_matches += 1
+        else:
+            if tag_info.grammar_number:
+                L.debug('        -> liczba mnoga')
+                sets_to_check.append('dlugosz_plural')
+            elif tag_info.subgender == 'pt':
+                L.debug('        -> plurale tantum')
+                sets_to_check.append('dlugosz_plural')
+            number_of_checks += 1
+            if _matches_any(suffix_matcher.match(word), sets_to_check, 'Długosz'):
+                number_of_matches += 1
+            if allows_rerun and lemma.lower() != word.lower():
+                L.debug('    -> re-running checks for lemma!')
+                L.debug('~*' * 5)
+                number_of_checks += 1
+                if rz.is_lemma_diminutive(lemma):
+                    number_of_matches += 1
+                L.debug('~*' * 5)
+
+        number_of_checks += 1
+        if _matches_any(lemma_matches, ('gpdk',), 'GPDK'):
+            number_of_matches += 1
+
+    elif is_adjective:
+        L.debug('    -> przymiotnik')
+        number_of_checks += 1
+        if _matches_any(lemma_matches, ('grzegorczykowa',), 'Grzegorczykowa'):
+            number_of_matches += 1
+
+    probability = 0.0
+    if number_of_checks != 0:
+        probability = float(number_of_matches) / number_of_checks
+    L.debug('    -> probability: %f', probability)
+    return probability
+
+
+def load_interpretations() -> List[Tuple[str, rz.Interpretation]]:
+    words_interpretations = []
+    for word in load_words():
+        words_interpretations.extend((word, interpretation) for interpretation in rz.morfeusz_analyser.analyse(word))
+    return words_interpretations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark logging overhead in scoring')
+    parser.add_argument('-n', '--number', type=int, default=100, help='Repetitions over the interpretations')
+    args = parser.parse_args()
+
+    L.setLevel('INFO')
+    words_interpretations = load_interpretations()
+
+    # warm up caches (lemma re-runs, tags), so only scoring is measured
+    for word, interpretation in words_interpretations:
+        assert rz.diminutive_probability(word, interpretation) == \
+            logging_diminutive_probability(word, interpretation)
+
+    candidates = [
+        ('with L.debug calls', lambda: [logging_diminutive_probability(word, interpretation)
+                                        for word, interpretation in words_interpretations]),
+        ('log-free fast path', lambda: [rz.diminutive_probability(word, interpretation)
+                                        for word, interpretation in words_interpretations]),
+        ('explain_interpretation', lambda: [rz.explain_interpretation(word, interpretation, allows_rerun=False)
+                                            for word, interpretation in words_interpretations]),
+    ]
+
+    results = {}
+    for name, func in candidates:
+        best = min(timeit.repeat(func, number=args.number, repeat=5))
+        results[name] = best / (args.number * len(words_interpretations)) * 1e9
+        print(f'{name:>24}: {results[name]:8.1f} ns/interpretation')
+
+    removed = results['with L.debug calls'] - results['log-free fast path']
+    print(f'{"removed overhead":>24}: {removed:8.1f} ns/interpretation '
+          f'({removed / results["with L.debug calls"] * 100:.0f}%)')
+
+
+if __name__ == "__main__":
+    main()
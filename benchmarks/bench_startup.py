@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Cold start: `import rozpoznawaczek`, `rozpoznawaczek --help` and analysis of one word, every command
+in a new process, for the package and for executables built with build_executables.sh (if present).
+
+    Usage:
+        python ./benchmarks/bench_startup.py [-n NUMBER] [--executable PATH [PATH ...]]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+# onefile and onedir (ONEDIR=yes) builds
+EXECUTABLES = ['./dist/rozpoznawaczek', './dist/rozpoznawaczek/rozpoznawaczek']
+
+
+def measure(command: List[str], number: int, stdin: Optional[str] = None) -> List[float]:
+    """Wall times of running the command `number` times."""
+    times = []
+    for _ in range(number):
+        started = time.perf_counter()
+        subprocess.run(command, input=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       universal_newlines=True, check=True)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark startup time')
+    parser.add_argument('-n', '--number', type=int, default=10, help='Number of runs of every command')
+    parser.add_argument('--executable', nargs='+', default=EXECUTABLES, help='Frozen executables to measure')
+    args = parser.parse_args()
+
+    commands = [
+        ('python (no import)', [sys.executable, '-c', 'pass'], None),
+        ('import rozpoznawaczek', [sys.executable, '-c', 'import rozpoznawaczek'], None),
+        ('rozpoznawaczek --help', [sys.executable, '-m', 'rozpoznawaczek.rozpoznawaczek', '--help'], None),
+        ('rozpoznawaczek <<< kotek', [sys.executable, '-m', 'rozpoznawaczek.rozpoznawaczek'], 'kotek\n'),
+    ]
+    for executable in args.executable:
+        if os.path.isfile(executable) and os.access(executable, os.X_OK):
+            commands.append((f'{executable} --help', [executable, '--help'], None))
+            commands.append((f'{executable} <<< kotek', [executable], 'kotek\n'))
+        else:
+            print(f'{executable}: not built, see build_executables.sh')
+
+    for name, command, stdin in commands:
+        times = measure(command, args.number, stdin)
+        print(f'{name:>48}: min {min(times) * 1000:7.1f} ms, median {statistics.median(times) * 1000:7.1f} ms')
+
+
+if __name__ == "__main__":
+    main()
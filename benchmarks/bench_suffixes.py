@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Micro-benchmark of suffix matching: linear `has_diminutive_suffix` scans vs compiled `SuffixMatcher`.
+
+    Usage:
+        python ./benchmarks/bench_suffixes.py [-n NUMBER]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import timeit
+from typing import List
+
+from common import load_words
+
+from rozpoznawaczek import (diminutive_sets, has_diminutive_suffix,
+                            suffix_matcher)
+from rozpoznawaczek.rozpoznawaczek import dlugosz_noun_sets
+
+
+def linear_scan(words: List[str]):
+    """What diminutive_probability did per word: a fresh Długosz set and four linear scans."""
+    for word in words:
+        suffixes_to_check = set()
+        for suffixes in dlugosz_noun_sets.values():
+            suffixes_to_check.update(suffixes)
+        has_diminutive_suffix(word, diminutive_sets['miczko'])
+        has_diminutive_suffix(word, suffixes_to_check)
+        has_diminutive_suffix(word, diminutive_sets['gpdk'])
+        has_diminutive_suffix(word, diminutive_sets['grzegorczykowa'])
+
+
+def compiled_match(words: List[str]):
+    """One backward walk over the word reports all the sets."""
+    for word in words:
+        suffix_matcher.match(word)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suffix matching')
+    parser.add_argument('-n', '--number', type=int, default=200, help='Repetitions over the word list')
+    args = parser.parse_args()
+
+    words = load_words()
+    results = {}
+    for name, func in [('linear scan', linear_scan), ('compiled matcher', compiled_match)]:
+        best = min(timeit.repeat(lambda: func(words), number=args.number, repeat=5))
+        results[name] = best / (args.number * len(words)) * 1e9
+        print(f'{name:>20}: {results[name]:8.1f} ns/word')
+
+    print(f'{"speedup":>20}: {results["linear scan"] / results["compiled matcher"]:8.2f}x')
+
+
+if __name__ == "__main__":
+    main()
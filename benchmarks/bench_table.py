@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Memory and throughput of analysis results: list of morfeusz2 tuples vs columnar `AnalysisTable`.
+
+    Memory is a peak of Python allocations (tracemalloc) while analysing and scoring the text,
+    throughput is measured separately, without tracemalloc.
+
+    Usage:
+        python ./benchmarks/bench_table.py [-s SIZE_MB]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from common import load_words
+
+import rozpoznawaczek.rozpoznawaczek as rz
+
+
+def generate_text(size: int) -> str:
+    words = load_words()
+    random.seed(0)
+    parts = []
+    length = 0
+    while length < size:
+        line = ' '.join(random.choice(words) for _ in range(12)) + '.\n'
+        parts.append(line)
+        length += len(line)
+    return ''.join(parts)
+
+
+def tuples_find_diminutives(text: str) -> List[Tuple[int, int]]:
+    """find_diminutives before AnalysisTable: tuples from morfeusz2 grouped into per-word lists."""
+    text_analyzed = rz.morfeusz_analyser.analyse(text)
+    diminutives = []
+    position_in_text = 0
+    i = 0
+    while i < len(text_analyzed):
+        if rz.tag_table[text_analyzed[i][2][2]].is_separator:
+            position_in_text += len(text_analyzed[i][2][0])
+            i += 1
+            continue
+
+        node_positions = {text_analyzed[i][0]: position_in_text}
+        word_interpretations = []
+        while i < len(text_analyzed) and not rz.tag_table[text_analyzed[i][2][2]].is_separator:
+            start_node, end_node, word_morphology = text_analyzed[i]
+            if end_node not in node_positions:
+                node_positions[end_node] = node_positions[start_node] + len(word_morphology[0])
+            word_interpretations.append(text_analyzed[i])
+            i += 1
+
+        end_position_in_text = node_positions[max(node_positions)]
+        if rz.is_diminutive(text[position_in_text:end_position_in_text], word_interpretations):
+            diminutives.append((position_in_text, end_position_in_text))
+        position_in_text = end_position_in_text
+    return diminutives
+
+
+def measure(func: Callable[[str], List[Tuple[int, int]]], text: str) -> Tuple[List[Tuple[int, int]], float, int]:
+    start = time.perf_counter()
+    diminutives = func(text)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return diminutives, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark columnar analysis results')
+    parser.add_argument('-s', '--size', type=float, default=4, help='Size of the generated text in MB')
+    args = parser.parse_args()
+
+    text = generate_text(int(args.size * 1024 * 1024))
+    rz.find_diminutives(text[:64 * 1024])  # warm up caches (lemma re-runs, tags)
+    print(f'{len(text) / 1024 / 1024:.1f} MB of text')
+
+    results = []
+    for name, func in [('list of tuples', tuples_find_diminutives), ('AnalysisTable', rz.find_diminutives)]:
+        diminutives, elapsed, peak = measure(func, text)
+        results.append(diminutives)
+        print(f'{name:>16}: {elapsed:7.2f} s {len(text) / 1024 / elapsed:8.1f} KB/s, '
+              f'peak memory {peak / 1024 / 1024:8.1f} MB')
+    print(f'{"same results":>16}: {results[0] == results[1]}')
+
+
+if __name__ == "__main__":
+    main()
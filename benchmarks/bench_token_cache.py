@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Persistent `TokenCache`: no cache vs the first (cold) and the second (warm) run over the same corpus,
+and a third run without the in-memory layer. Every run opens the cache anew, as a next nightly job would.
+
+    Usage:
+        python ./benchmarks/bench_token_cache.py [-s SIZE_MB]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+from common import load_words
+
+from rozpoznawaczek import TokenCache, find_diminutives
+from rozpoznawaczek.rozpoznawaczek import VERDICT_CACHE_SIZE
+
+
+def generate_texts(size: int) -> List[str]:
+    """Lines of random words, with random suffixes so there are many distinct tokens."""
+    words = load_words()
+    random.seed(0)
+    texts = []
+    length = 0
+    while length < size:
+        line = ' '.join(random.choice(words) + random.choice(['', '', 'a', 'ami', 'ów', 'om'])
+                        for _ in range(12)) + '.'
+        texts.append(line)
+        length += len(line)
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark persistent token cache')
+    parser.add_argument('-s', '--size', type=float, default=1, help='Size of the generated corpus in MB')
+    args = parser.parse_args()
+
+    texts = generate_texts(int(args.size * 1024 * 1024))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'cache.sqlite')
+
+        start = time.perf_counter()
+        expected = [find_diminutives(text) for text in texts]
+        base_time = time.perf_counter() - start
+        print(f'{"no cache":>12}: {base_time:7.2f} s')
+
+        for run, memory_size in [('cold cache', VERDICT_CACHE_SIZE), ('warm cache', VERDICT_CACHE_SIZE),
+                                 ('only sqlite', 0)]:
+            start = time.perf_counter()
+            cache = TokenCache(path, memory_size=memory_size)
+            results = [find_diminutives(text, token_cache=cache) for text in texts]
+            elapsed = time.perf_counter() - start
+            print(f'{run:>12}: {elapsed:7.2f} s {base_time / elapsed:6.2f}x, {cache.cache_info()}, '
+                  f'same results: {results == expected}')
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Helpers shared by the benchmarks, run them from the repository's root directory.
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+from typing import List
+
+WORDS_FILES = ['./tests/training_diminutives.txt', './tests/training_not_diminutives.txt']
+
+
+def load_words() -> List[str]:
+    """Training words (diminutives first), one per line in WORDS_FILES."""
+    words = []
+    for filename in WORDS_FILES:
+        with open(filename, 'r') as f:
+            words.extend(line.strip() for line in f if line.strip())
+    return words
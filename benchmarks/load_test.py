@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Load test of `rozpoznawaczek-serve`: concurrent keep-alive clients sending random sentences.
+Reports latency percentiles and requests per second.
+
+    Usage:
+        rozpoznawaczek-serve --port 8765 &
+        python ./benchmarks/load_test.py [--port 8765] [-c CONCURRENCY] [-n REQUESTS] [-w WORDS]
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from typing import List, Tuple
+
+from common import load_words
+
+
+async def client(host: str, port: int, bodies: List[bytes]) -> List[Tuple[int, float]]:
+    """Sends requests one after another over one connection, returns statuses and latencies."""
+    reader, writer = await asyncio.open_connection(host, port)
+    results = []
+    for body in bodies:
+        start = time.perf_counter()
+        writer.write(f'POST /diminutives HTTP/1.1\r\nHost: {host}\r\n'
+                     f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n'.encode('latin-1'))
+        writer.write(body)
+        await writer.drain()
+
+        status = int((await reader.readline()).split()[1])
+        content_length = 0
+        while True:
+            line = await reader.readline()
+            if not line.strip():
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                content_length = int(value)
+        await reader.readexactly(content_length)
+        results.append((status, time.perf_counter() - start))
+
+    writer.close()
+    return results
+
+
+def percentile(values: List[float], percent: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+async def load_test(host: str, port: int, concurrency: int, requests: int, words_per_request: int):
+    words = load_words()
+    random.seed(0)
+    bodies = [json.dumps({'text': ' '.join(random.choice(words) for _ in range(words_per_request))}).encode('utf-8')
+              for _ in range(requests)]
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[client(host, port, bodies[i::concurrency]) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    statuses = Counter(status for client_results in results for status, _ in client_results)
+    latencies = [latency * 1000 for client_results in results for status, latency in client_results if status == 200]
+
+    print(f'{requests} requests, {concurrency} connections, {words_per_request} words per request')
+    print(f'{"statuses":>12}: {dict(statuses)}')
+    print(f'{"requests/s":>12}: {requests / elapsed:10.1f}')
+    if latencies:
+        print(f'{"p50":>12}: {percentile(latencies, 50):10.2f} ms')
+        print(f'{"p99":>12}: {percentile(latencies, 99):10.2f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test of rozpoznawaczek-serve')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('-p', '--port', type=int, default=8765)
+    parser.add_argument('-c', '--concurrency', type=int, default=32, help='Number of connections')
+    parser.add_argument('-n', '--requests', type=int, default=5000, help='Number of requests')
+    parser.add_argument('-w', '--words', type=int, default=12, help='Number of words in a request')
+    args = parser.parse_args()
+
+    asyncio.run(load_test(args.host, args.port, args.concurrency, args.requests, args.words))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark suite: suffix matching, scoring, find_diminutives on generated texts, the plural re-run path
+and docx highlighting. Every case runs in a fresh process and reports tokens per second, best time
+of its stages and peak RSS. Results are written as JSON and can be compared between commits.
+
+    With `--analyser recorded` morfeusz2 is replaced with a replay of its analyses of the benchmark
+    vocabulary, recorded once (`--record`), so runs do not depend on the installed dictionary.
+
+    Usage:
+        python ./benchmarks/suite.py [-o results.json] [--sizes 1K 64K 1M 100M] [--paragraphs N] [--repeat N]
+                                     [--analyser live|recorded] [--recording FILE] [--record]
+                                     [--compare BASELINE.json] [--threshold 0.1] [--rss-threshold 0.2]
+    Example:
+        $ git checkout master && python ./benchmarks/suite.py -o /tmp/base.json
+        $ git checkout feature && python ./benchmarks/suite.py -o /tmp/new.json --compare /tmp/base.json
+        ...
+        REGRESSION find_diminutives/1M: tokens/s 183412 -> 150112 (-18.2%)
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from common import load_words
+
+import rozpoznawaczek.rozpoznawaczek as rz
+
+RECORDING = './benchmarks/recording.json.gz'
+PUNCTUATION = ['', '', '', '', ',', '.', '?', '!', ':', '...']
+SIZES = ['1K', '64K', '1M']
+PARAGRAPHS = 50
+
+# short cases are repeated for at least that many seconds, for stable results
+MIN_TIME = 1.0
+
+# larger texts are analysed in chunks, like `rozpoznawaczek -i` does, not with one find_diminutives call
+FIND_DIMINUTIVES_MAX_SIZE = 4 * 1024 * 1024
+
+
+def parse_size(size: str) -> int:
+    units = {'K': 1024, 'M': 1024 * 1024}
+    if size[-1].upper() in units:
+        return int(float(size[:-1]) * units[size[-1].upper()])
+    return int(size)
+
+
+def plural_forms() -> List[str]:
+    """Plural noun forms of the training words, they take the lemma re-run path."""
+    if isinstance(rz.morfeusz_analyser, RecordedAnalyser):
+        return rz.morfeusz_analyser.plural_forms
+    forms = set()
+    for word in load_words():
+        for form, _, tag, _, _ in rz.morfeusz_analyser.generate(word):
+            if tag.startswith('subst:pl:'):
+                forms.add(form)
+    return sorted(forms)
+
+
+def vocabulary() -> List[str]:
+    """All tokens generated texts are made of."""
+    words = load_words() + plural_forms()
+    words += [word.capitalize() for word in words]
+    return sorted({word + punctuation for word in words for punctuation in PUNCTUATION})
+
+
+def generate_text(size: int, words: Optional[List[str]] = None, seed: int = 0) -> str:
+    """Lines of random words with punctuation, deterministic for the given seed."""
+    if words is None:
+        words = load_words()
+        words += [word.capitalize() for word in words]
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        line = ' '.join(rng.choice(words) + rng.choice(PUNCTUATION) for _ in range(rng.randint(4, 16))) + '\n'
+        parts.append(line)
+        length += len(line)
+    return ''.join(parts)
+
+
+# recorded analyser
+
+def record(path: str):
+    """Records morfeusz2 analyses of the vocabulary and of lemmas found in them, and plural forms
+    (found with morfeusz2 generator).
+    """
+    tokens = {}
+    lemmas = {}
+    for token in vocabulary():
+        tokens[token] = [[start_node, end_node, *word_morphology]
+                         for start_node, end_node, word_morphology in rz.morfeusz_analyser.analyse(token)]
+        for _, _, _, lemma, _, _, _ in tokens[token]:
+            lemma = lemma.split(':')[0]
+            if lemma not in lemmas:
+                lemmas[lemma] = [[start_node, end_node, *word_morphology]
+                                 for start_node, end_node, word_morphology in rz.morfeusz_lemma_analyser.analyse(lemma)]
+
+    recording = {'dictionary': rz.morfeusz_analyser.dict_id(), 'plural_forms': plural_forms(),
+                 'tokens': tokens, 'lemmas': lemmas}
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(recording, f, ensure_ascii=False, sort_keys=True)
+
+
+class RecordedAnalyser(rz.Analyser):
+    """Replays recorded morfeusz2 analyses of whitespace separated tokens, with the same
+    numbering of nodes and whitespace segments as morfeusz2.Morfeusz.analyse.
+    """
+
+    def __init__(self, recording: Dict[str, Any], analyses: Dict[str, List[list]], keep_whitespaces: bool):
+        self._dictionary = recording['dictionary']
+        self.plural_forms = recording['plural_forms']
+        self._analyses = analyses
+        self._keep_whitespaces = keep_whitespaces
+
+    def dict_id(self) -> str:
+        return f'recorded:{self._dictionary}'
+
+    def analyse(self, text: str) -> List[rz.Interpretation]:
+        interpretations = []
+        node = 0
+        for match in rz.WHITESPACE_OR_TOKEN.finditer(text):
+            if match.group()[0].isspace():
+                if self._keep_whitespaces:
+                    interpretations.append((node, node + 1, (match.group(), match.group(), 'sp', [], [])))
+                    node += 1
+                continue
+
+            analysis = self._analyses.get(match.group())
+            if analysis is None:
+                raise ValueError(f'Token not recorded: {match.group()!r}, record again with --record')
+            end_node = node
+            for start_node, end_node_in_token, form, lemma, tag, names, labels in analysis:
+                interpretations.append((node + start_node, node + end_node_in_token,
+                                        (form, lemma, tag, list(names), list(labels))))
+                end_node = max(end_node, node + end_node_in_token)
+            node = end_node
+        return interpretations
+
+
+def use_recorded_analyser(path: str) -> str:
+    """Replaces global analysers with the recording, returns its hash."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    recording = json.loads(gzip.decompress(data))
+    rz.init_analysers(RecordedAnalyser(recording, recording['tokens'], keep_whitespaces=True),
+                      RecordedAnalyser(recording, {**recording['tokens'], **recording['lemmas']},
+                                       keep_whitespaces=False))
+    return hashlib.sha256(data).hexdigest()
+
+
+# cases, every one returns number of tokens and a function measuring its stages
+
+Stages = Dict[str, float]
+
+
+def timed(stages: Stages, name: str, func: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    result = func()
+    stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+    return result
+
+
+def case_has_diminutive_suffix(_: str) -> Tuple[int, Callable[[], Stages]]:
+    words = load_words() * 10
+    sets = list(rz.diminutive_sets.values())
+
+    def run() -> Stages:
+        stages: Stages = {}
+        timed(stages, 'total', lambda: [rz.has_diminutive_suffix(word, suffixes) for word in words for suffixes in sets])
+        return stages
+    return len(words) * len(sets), run
+
+
+def case_diminutive_probability(_: str) -> Tuple[int, Callable[[], Stages]]:
+    words_interpretations = [(word, interpretation) for word in load_words()
+                             for interpretation in rz.morfeusz_analyser.analyse(word)] * 10
+    for word, interpretation in words_interpretations:
+        rz.diminutive_probability(word, interpretation)  # warm up lemma re-runs
+
+    def run() -> Stages:
+        stages: Stages = {}
+        timed(stages, 'total', lambda: [rz.diminutive_probability(word, interpretation)
+                                        for word, interpretation in words_interpretations])
+        return stages
+    return len(words_interpretations), run
+
+
+def case_find_diminutives(size: str) -> Tuple[int, Callable[[], Stages]]:
+    text = generate_text(parse_size(size))
+    tokens = len(text.split())
+
+    def run() -> Stages:
+        stages: Stages = {}
+        if len(text) > FIND_DIMINUTIVES_MAX_SIZE:
+            timed(stages, 'total', lambda: list(rz.iter_diminutives(io.StringIO(text))))
+            return stages
+
+        table = timed(stages, 'analyse', lambda: rz.AnalysisTable.analyse(text, rz.morfeusz_analyser))
+        timed(stages, 'score', lambda: rz.score_table(table))
+        timed(stages, 'total', lambda: rz.find_diminutives(text))
+        return stages
+    return tokens, run
+
+
+def case_plural_rerun(size: str) -> Tuple[int, Callable[[], Stages]]:
+    text = generate_text(parse_size(size), plural_forms())
+    tokens = len(text.split())
+
+    def run() -> Stages:
+        stages: Stages = {}
+        rz.is_lemma_diminutive.cache_clear()
+        timed(stages, 'cold lemma cache', lambda: rz.find_diminutives(text))
+        timed(stages, 'total', lambda: rz.find_diminutives(text))
+        return stages
+    return tokens, run
+
+
+def case_docx_highlight(paragraphs: str) -> Tuple[int, Callable[[], Stages]]:
+    from docx import Document  # type: ignore
+    from docx.enum.text import WD_COLOR_INDEX  # type: ignore
+
+    from rozpoznawaczek.docx_highlight import highlight
+
+    texts = generate_text(int(paragraphs) * 3 * 80, seed=1).split('\n')
+    buffer = io.BytesIO()
+    document = Document()
+    for i in range(int(paragraphs)):
+        paragraph = document.add_paragraph()
+        for j, style in enumerate(['plain', 'bold', 'italic']):
+            run = paragraph.add_run(texts[(3 * i + j) % len(texts)] + ' ')
+            run.bold = style == 'bold'
+            run.italic = style == 'italic'
+    document.save(buffer)
+    tokens = sum(len(paragraph.text.split()) for paragraph in document.paragraphs)
+
+    def run() -> Stages:
+        stages: Stages = {}
+        opened = timed(stages, 'open', lambda: Document(io.BytesIO(buffer.getvalue())))
+        timed(stages, 'highlight', lambda: highlight(opened, WD_COLOR_INDEX.YELLOW))
+        timed(stages, 'save', lambda: opened.save(io.BytesIO()))
+        stages['total'] = sum(stages.values())
+        return stages
+    return tokens, run
+
+
+CASES: Dict[str, Callable[[str], Tuple[int, Callable[[], Stages]]]] = {
+    'has_diminutive_suffix': case_has_diminutive_suffix,
+    'diminutive_probability': case_diminutive_probability,
+    'find_diminutives': case_find_diminutives,
+    'plural_rerun': case_plural_rerun,
+    'docx_highlight': case_docx_highlight,
+}
+
+
+def run_case(name: str, repeat: int) -> Dict[str, Any]:
+    """Runs the case in this process, best times of stages over repeats (at least `repeat` times,
+    at least for MIN_TIME seconds).
+    """
+    case, _, parameter = name.partition('/')
+    tokens, run = CASES[case](parameter)
+
+    best: Stages = {}
+    repeats = 0
+    started = time.perf_counter()
+    while repeats < repeat or time.perf_counter() - started < MIN_TIME:
+        for stage, seconds in run().items():
+            best[stage] = min(best.get(stage, seconds), seconds)
+        repeats += 1
+
+    return {
+        'tokens': tokens,
+        'seconds': best['total'],
+        'tokens_per_second': tokens / best['total'] if best['total'] else 0.0,
+        'stages': best,
+        'repeats': repeats,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def case_names(sizes: List[str], paragraphs: int) -> Iterator[str]:
+    yield 'has_diminutive_suffix'
+    yield 'diminutive_probability'
+    for size in sizes:
+        yield f'find_diminutives/{size}'
+    yield f'plural_rerun/{sizes[0]}'
+    yield f'docx_highlight/{paragraphs}'
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float, rss_threshold: float) -> List[str]:
+    """Returns descriptions of regressions: lower throughput or higher peak RSS than allowed."""
+    regressions = []
+    for name, case in results['cases'].items():
+        base_case = baseline['cases'].get(name)
+        if base_case is None:
+            continue
+        change = case['tokens_per_second'] / base_case['tokens_per_second'] - 1
+        if change < -threshold:
+            regressions.append(f'{name}: tokens/s {base_case["tokens_per_second"]:.0f} -> '
+                               f'{case["tokens_per_second"]:.0f} ({change * 100:+.1f}%)')
+        change = case['peak_rss_kb'] / base_case['peak_rss_kb'] - 1
+        if change > rss_threshold:
+            regressions.append(f'{name}: peak RSS {base_case["peak_rss_kb"]} KB -> '
+                               f'{case["peak_rss_kb"]} KB ({change * 100:+.1f}%)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite')
+    parser.add_argument('-o', '--output', help='Write results as JSON to the file')
+    parser.add_argument('--sizes', nargs='+', default=SIZES, help='Sizes of generated texts, f.e. 1K 1M 100M')
+    parser.add_argument('--paragraphs', type=int, default=PARAGRAPHS, help='Paragraphs of the generated docx')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions of every case, the best is reported')
+    parser.add_argument('--analyser', choices=['live', 'recorded'], default='live')
+    parser.add_argument('--recording', default=RECORDING, help='Recorded analyses for --analyser recorded')
+    parser.add_argument('--record', action='store_true', help='Record analyses of the vocabulary and exit')
+    parser.add_argument('--compare', metavar='BASELINE', help='Results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Allowed relative decrease of tokens per second')
+    parser.add_argument('--rss-threshold', type=float, default=0.2, help='Allowed relative increase of peak RSS')
+    parser.add_argument('--case', help=argparse.SUPPRESS)  # run one case, in a subprocess
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.recording)
+        print(f'Recorded analyses to {args.recording}')
+        return 0
+
+    recording_hash = None
+    if args.analyser == 'recorded':
+        recording_hash = use_recorded_analyser(args.recording)
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.repeat)))
+        return 0
+
+    results: Dict[str, Any] = {
+        'meta': {
+            'commit': git_commit(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'analyser': args.analyser,
+            'dictionary': rz.morfeusz_analyser.dict_id(),
+            'recording': recording_hash,
+            'numpy': rz.numpy_module() is not None,
+        },
+        'cases': {},
+    }
+    for name in case_names(args.sizes, args.paragraphs):
+        command = [sys.executable, __file__, '--case', name, '--repeat', str(args.repeat),
+                   '--analyser', args.analyser, '--recording', args.recording]
+        output = subprocess.run(command, capture_output=True, text=True)
+        if output.returncode != 0:
+            print(f'{name}: failed\n{output.stderr}', file=sys.stderr)
+            return 1
+        case = results['cases'][name] = json.loads(output.stdout.splitlines()[-1])
+        stages = ', '.join(f'{stage} {seconds:.3f} s' for stage, seconds in case['stages'].items())
+        print(f'{name:>28}: {case["tokens_per_second"]:12.0f} tokens/s, peak RSS {case["peak_rss_kb"] / 1024:7.1f} MB '
+              f'({stages})')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('analyser') != args.analyser or \
+                baseline['meta'].get('recording') != recording_hash:
+            print('Warning: baseline was run with a different analyser or recording', file=sys.stderr)
+
+        regressions = compare(results, baseline, args.threshold, args.rss_threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            return 1
+        print(f'No regressions against {args.compare}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
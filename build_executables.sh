@@ -10,12 +10,23 @@
 # 0c. build docker with wine, python3 and pyinstaller
 # git clone https://github.com/webcomics/pywine && cd pywine && docker build -t pywine .
 
-# 1. create ELF with PyInstaller
-ELF=./dist/rozpoznawaczek
+# ONEDIR=yes
+# 0d. build a directory with the executable instead of a single file, it starts faster:
+# the single file is extracted to a temporary directory on every run (see ./benchmarks/bench_startup.py)
+if [ -z "$ONEDIR" ]; then
+    BUNDLE=--onefile
+    ELF=./dist/rozpoznawaczek
+    PE32=./dist/rozpoznawaczek.exe
+else
+    BUNDLE=--onedir
+    ELF=./dist/rozpoznawaczek/rozpoznawaczek
+    PE32=./dist/rozpoznawaczek/rozpoznawaczek.exe
+fi
 
+# 1. create ELF with PyInstaller
 if [ ! -f "$ELF" ]; then
     echo 'Building ELF'
-    pyinstaller --strip --log-level INFO --onefile ./rozpoznawaczek/rozpoznawaczek.py
+    pyinstaller --strip --log-level INFO $BUNDLE ./rozpoznawaczek/rozpoznawaczek.py
 else
     echo 'Skipping ELF build'
 fi
@@ -30,12 +41,10 @@ fi
 
 # 2. create EXE/PE32 with PyInstaller inside docker
 if [ ! -z "$BUILD_WINE" ]; then
-    PE32=./dist/rozpoznawaczek.exe
-
     if [ ! -f "$PE32" ]; then
         echo 'Building EXE/PE32'
         docker run -w="/nlp" --mount type=bind,source="$(pwd)",target=/nlp pywine \
-            wine pyinstaller --log-level INFO --onefile ./rozpoznawaczek/rozpoznawaczek.py
+            wine pyinstaller --log-level INFO $BUNDLE ./rozpoznawaczek/rozpoznawaczek.py
     else
         echo 'Skipping EXE/PE32 build'
     fi
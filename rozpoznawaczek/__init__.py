@@ -13,9 +13,21 @@
     * Paweł Płatek
 """
 
-from rozpoznawaczek.rozpoznawaczek import (Interpretation, IsDiminutiveFunc, L,
-                                           diminutive_sets, find_diminutives,
-                                           has_diminutive_suffix, main)
+from rozpoznawaczek.rozpoznawaczek import (
+    Analyser, AnalysisTable, CachingAnalyser, DictionaryAnalyser,
+    DiminutiveTrace, Interpretation, IsDiminutiveFunc, L, LazyAnalyser,
+    MorfeuszAnalyser, Stats, SuffixMatcher, TagInfo, TagTable, TokenCache,
+    VerdictCache, decide_table, diminutive_sets, explain_diminutive,
+    find_diminutives, find_diminutives_many,
+    find_diminutives_with_probabilities,
+    find_diminutives_with_probabilities_many, has_diminutive_suffix,
+    init_analysers, is_lemma_diminutive, iter_chunks, iter_diminutives, main,
+    print_stats, score_table, stats, suffix_matcher, tag_table)
 
-__all__ = ['find_diminutives', 'main', 'L', 'Interpretation', 'IsDiminutiveFunc', 'has_diminutive_suffix',
-           'diminutive_sets']
+__all__ = ['find_diminutives', 'find_diminutives_many', 'iter_diminutives', 'iter_chunks', 'main', 'L',
+           'Interpretation', 'IsDiminutiveFunc', 'has_diminutive_suffix', 'diminutive_sets', 'SuffixMatcher',
+           'suffix_matcher', 'is_lemma_diminutive', 'VerdictCache', 'TagInfo', 'TagTable', 'tag_table',
+           'explain_diminutive', 'DiminutiveTrace', 'AnalysisTable', 'score_table', 'decide_table',
+           'find_diminutives_with_probabilities', 'find_diminutives_with_probabilities_many', 'TokenCache',
+           'Analyser', 'MorfeuszAnalyser', 'DictionaryAnalyser', 'CachingAnalyser', 'LazyAnalyser', 'init_analysers',
+           'Stats', 'stats', 'print_stats']
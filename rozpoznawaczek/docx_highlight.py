@@ -12,94 +12,357 @@
 # fmt: on
 
 import argparse
-from copy import copy
-from os.path import isfile
+import bisect
+import glob
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from copy import deepcopy
+from functools import partial
+from os.path import basename, dirname, isdir, isfile, join, relpath
 from sys import exit
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from zipfile import BadZipFile
 
 from docx import Document  # type: ignore
-from docx.dml.color import ColorFormat  # type: ignore
-from docx.enum.dml import MSO_COLOR_TYPE  # type: ignore
 from docx.enum.text import WD_COLOR_INDEX  # type: ignore
 from docx.exceptions import PythonDocxError  # type: ignore
-from docx.text.font import Font  # type: ignore
+from docx.opc.constants import CONTENT_TYPE as CT  # type: ignore
+from docx.opc.exceptions import PackageNotFoundError  # type: ignore
+from docx.opc.part import PartFactory, XmlPart  # type: ignore
+from docx.oxml.ns import qn  # type: ignore
+from docx.oxml.text.paragraph import CT_P  # type: ignore
+from docx.oxml.text.run import CT_R  # type: ignore
 from docx.text.run import Run  # type: ignore
 
-from rozpoznawaczek import L, find_diminutives
-
-
-def copy_style(new_element, original_element):
-    if type(new_element) != type(original_element):
-        raise Exception('Types of objects to copy style do not match')
-
-    to_copy, to_deepcopy = [], []
-
-    if type(new_element) == Run:
-        to_copy = ['bold', 'italic', 'underline']
-        to_deepcopy = ['font']
-
-    elif type(new_element) == Font:
-        to_copy = ['all_caps', 'bold', 'cs_bold', 'cs_italic',
-                   'double_strike', 'emboss', 'hidden', 'highlight_color',
-                   'imprint', 'italic', 'name', 'outline',
-                   'rtl', 'shadow', 'size', 'small_caps', 'snap_to_grid', 'spec_vanish',
-                   'strike', 'subscript', 'superscript', 'underline', 'web_hidden'
-                   ]
-        to_deepcopy = ['color']
-
-    elif type(new_element) == ColorFormat:
-        if original_element.type == MSO_COLOR_TYPE.THEME:
-            to_copy = ['theme_color']
-        elif original_element.type == MSO_COLOR_TYPE.RGB:
-            to_copy = ['rgb']
-
-    else:
+from rozpoznawaczek import (L, VerdictCache, find_diminutives_many,
+                            print_stats, stats)
+from rozpoznawaczek.rozpoznawaczek import (BATCH_SIZE, analysis_version,
+                                           imap_ordered, init_worker,
+                                           install_interrupt_handler)
+
+# parts with paragraphs, python-docx loads footnotes and endnotes as binary parts by default
+TEXT_PARTS = {CT.WML_DOCUMENT_MAIN, CT.WML_HEADER, CT.WML_FOOTER, CT.WML_FOOTNOTES, CT.WML_ENDNOTES, CT.WML_COMMENTS}
+
+# verdicts of the current process, shared by all documents
+verdict_cache = VerdictCache()
+
+MANIFEST_NAME = '.rozpoznawaczek-manifest.json'
+
+PARAGRAPH = qn('w:p')
+RUN = qn('w:r')
+RUN_PROPERTIES = qn('w:rPr')
+TEXT = qn('w:t')
+# elements of a run contributing to its text, see `docx.oxml.text.run.CT_R.text`
+TEXT_ELEMENTS = {qn('w:br'), qn('w:cr'), qn('w:noBreakHyphen'), qn('w:ptab'), TEXT, qn('w:tab')}
+
+
+def diminutives_in_runs(run_texts: List[str], diminutives: List[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
+    """Maps diminutives found in a paragraph onto its runs.
+    Args:
+        run_texts: texts of the paragraph's runs, the paragraph's text is their concatenation
+        diminutives: start and end positions of diminutives in the paragraph's text
+    Returns:
+        for every run, start and end positions (in the run's text) of its parts belonging to diminutives,
+        a diminutive spanning many runs has a part in each of them
+    """
+    run_starts = list(itertools.accumulate([0] + [len(text) for text in run_texts[:-1]]))
+    runs_diminutives: List[List[Tuple[int, int]]] = [[] for _ in run_texts]
+    for start_position, end_position in diminutives:
+        run_index = bisect.bisect_right(run_starts, start_position) - 1
+        while run_index < len(run_texts) and run_starts[run_index] < end_position:
+            run_start = run_starts[run_index]
+            run_end = run_start + len(run_texts[run_index])
+            part_start, part_end = max(start_position, run_start), min(end_position, run_end)
+            if part_start < part_end:
+                runs_diminutives[run_index].append((part_start - run_start, part_end - run_start))
+            run_index += 1
+    return runs_diminutives
+
+
+def open_document(path: str):
+    """Opens the docx file, with footnotes and endnotes loaded as XML parts (see TEXT_PARTS).
+    Part types are registered in python-docx on the first call, not on import.
+    """
+    PartFactory.part_type_for.setdefault(CT.WML_FOOTNOTES, XmlPart)
+    PartFactory.part_type_for.setdefault(CT.WML_ENDNOTES, XmlPart)
+    return Document(path)
+
+
+def run_text(run: CT_R) -> str:
+    """Text of the run element, the same as `Run.text`, but without evaluating xpath.
+    Text elements are converted with `str` as `Run.text` does since python-docx 1.0.
+    """
+    return ''.join(str(child) for child in run if child.tag in TEXT_ELEMENTS)
+
+
+def split_run(run: Run, boundaries: List[int]) -> List[Run]:
+    """Splits the run at the positions of its text into consecutive runs, put in the paragraph
+    in place of the original one. Every new run gets a copy of the original run's properties (`rPr`),
+    its content elements are moved, only text elements crossing the boundaries are cut.
+    Elements without text (drawings, fields) go to the run that starts at their position.
+    Args:
+        run: run to split
+        boundaries: increasing positions in the run's text, strictly inside of it
+    Returns:
+        the new runs
+    """
+    r = run.element
+    new_rs = []
+    for _ in range(len(boundaries) + 1):
+        new_r = r.makeelement(r.tag, r.attrib)
+        if r.rPr is not None:
+            new_r.append(deepcopy(r.rPr))
+        new_rs.append(new_r)
+
+    position, index = 0, 0
+    for child in list(r):
+        if child.tag == RUN_PROPERTIES:
+            continue
+        while index < len(boundaries) and position >= boundaries[index]:
+            index += 1
+        text = str(child) if child.tag in TEXT_ELEMENTS else ''
+        cuts = [boundary - position for boundary in boundaries[index:] if boundary < position + len(text)]
+        if child.tag == TEXT and cuts:
+            for part_index, (start, end) in enumerate(zip([0] + cuts, cuts + [len(text)])):
+                new_rs[index + part_index].add_t(text[start:end])
+        else:
+            new_rs[index].append(child)
+        position += len(text)
+
+    for new_r in new_rs:
+        r.addprevious(new_r)
+    r.getparent().remove(r)
+    return [Run(new_r, run._parent) for new_r in new_rs]
+
+
+def highlight_run(run: Run, run_diminutives: List[Tuple[int, int]], color):
+    """Highlights parts of the run, splitting it if the parts do not cover the whole run."""
+    text_length = len(run_text(run.element))
+    if run_diminutives == [(0, text_length)]:
+        run.font.highlight_color = color
         return
 
-    for attr in to_copy:
-        if hasattr(original_element, attr):
-            setattr(new_element, attr, getattr(original_element, attr))
-
-    for attr in to_deepcopy:
-        if hasattr(new_element, attr) and hasattr(original_element, attr):
-            copy_style(getattr(new_element, attr),
-                       getattr(original_element, attr))
-
-
-def highlight(document, color):
+    boundaries = sorted({position for part in run_diminutives for position in part} - {0, text_length})
+    for new_run, start_position in zip(split_run(run, boundaries), [0] + boundaries):
+        if any(start <= start_position < end for start, end in run_diminutives):
+            new_run.font.highlight_color = color
+            L.debug(' - %s', repr(run_text(new_run.element)))
+
+
+def iter_paragraphs(document) -> Iterator[Tuple[XmlPart, CT_P]]:
+    """Paragraph elements (and their parts) of all text-bearing parts of the document: body (with tables
+    and text boxes), headers, footers, footnotes, endnotes and comments. Every part is visited once.
+    """
+    for part in document.part.package.iter_parts():
+        if part.content_type in TEXT_PARTS and isinstance(part, XmlPart):
+            for paragraph in part.element.iter(PARAGRAPH):
+                yield part, paragraph
+
+
+def paragraph_runs(paragraph: CT_P) -> List[CT_R]:
+    """Run elements of the paragraph, also inside hyperlinks, fields or tracked changes, but not of paragraphs
+    nested in it (text boxes).
+    """
+    return [run for run in paragraph.iter(RUN) if next(run.iterancestors(PARAGRAPH)) is paragraph]
+
+
+def iter_batches(texts: Iterable[str], batch_size: int = BATCH_SIZE) -> Iterator[List[str]]:
+    """Groups texts into lists of about `batch_size` characters."""
+    batch: List[str] = []
+    batch_length = 0
+    for text in texts:
+        batch.append(text)
+        batch_length += len(text)
+        if batch_length >= batch_size:
+            yield batch
+            batch = []
+            batch_length = 0
+    if batch:
+        yield batch
+
+
+def find_diminutives_in_batch(texts: List[str]) -> List[List[Tuple[int, int]]]:
+    """find_diminutives_many with the verdict cache of the current process, called in worker processes."""
+    return find_diminutives_many(texts, cache=verdict_cache)
+
+
+def highlight(document, color, executor: Optional[Executor] = None, jobs: int = 1):
+    """Highlights diminutives in paragraphs of all parts of the document (see iter_paragraphs).
+    Every paragraph is analysed as a whole (its runs joined), so words split into many runs
+    by formatting changes are found too. Texts of all paragraphs are extracted first and analysed
+    in batches, in the executor (with `jobs` workers) if provided; the document is modified
+    in the current process.
+    Only runs with diminutives are modified, other paragraphs and runs are left untouched.
+    Returns:
+        the document and the number of diminutives found
+    """
     L.debug('Diminutives:')
     diminutives_found = 0
 
-    for paragraph in document.paragraphs:
-        runs = copy(paragraph.runs)
-        paragraph.clear()
+    paragraphs = list(iter_paragraphs(document))
+    texts = [''.join(run_text(run) for run in paragraph_runs(paragraph)) for _, paragraph in paragraphs]
+    paragraphs_diminutives = (diminutives for _, batch_diminutives in imap_ordered(
+        find_diminutives_in_batch, iter_batches(texts), executor, jobs) for diminutives in batch_diminutives)
+
+    for (part, paragraph), diminutives in zip(paragraphs, paragraphs_diminutives):
+        if not diminutives:
+            continue
+        diminutives_found += len(diminutives)
+        runs = paragraph_runs(paragraph)
+        for run, run_diminutives in zip(runs, diminutives_in_runs([run_text(run) for run in runs], diminutives)):
+            if run_diminutives:
+                highlight_run(Run(run, part), run_diminutives, color)
 
-        for run in runs:
-            original_text = run.text
-            diminutives = find_diminutives(original_text)
-            diminutives_found += len(diminutives)
+    return document, diminutives_found
 
-            coursor = 0
-            for start_position, end_position in diminutives:
-                # normal text
-                new_run = paragraph.add_run(
-                    original_text[coursor:start_position], run.style)
-                copy_style(new_run, run)
 
-                # diminutive
-                new_run = paragraph.add_run(
-                    original_text[start_position:end_position], run.style)
-                copy_style(new_run, run)
-                new_run.font.highlight_color = color
-                L.debug(' - %s', repr(new_run.text))
+def find_documents(input_pattern: str) -> Tuple[str, List[str]]:
+    """Finds docx files: in a directory (recursively) or matching a glob pattern.
+    Returns:
+        base directory (the directory or the part of the pattern without wildcards)
+        and paths of the files relative to it, sorted
+    """
+    if isdir(input_pattern):
+        base = input_pattern
+        pattern = join(input_pattern, '**', '*.docx')
+    else:
+        base = os.sep.join(itertools.takewhile(lambda part: not glob.has_magic(part), input_pattern.split(os.sep)))
+        pattern = input_pattern
+    paths = [relpath(path, base or os.curdir) for path in glob.iglob(pattern, recursive=True)
+             if isfile(path) and not basename(path).startswith('~$')]  # skip lock files of MS Word
+    return base, sorted(paths)
 
-                coursor = end_position
 
-            # normal text
-            new_run = paragraph.add_run(
-                original_text[coursor:len(original_text)], run.style)
-            copy_style(new_run, run)
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
 
-    return document, diminutives_found
+
+def load_manifest(path: str) -> Dict[str, Dict[str, Any]]:
+    """Loads the manifest of highlighted files, see highlight_many. Missing or broken manifest is empty."""
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        if isfile(path):
+            L.warning('Ignoring manifest `%s`: %s', path, e)
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def save_manifest(path: str, manifest: Dict[str, Dict[str, Any]]):
+    """Saves the manifest atomically, an interrupted run leaves the previous one."""
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(temporary_path, path)
+
+
+def highlight_file(paths: Tuple[str, str], color) -> Tuple[int, float, Optional[str]]:
+    """Highlights diminutives in a docx file and saves the result, f.e. in a worker process.
+    Args:
+        paths: input and output file
+        color: see highlight
+    Returns:
+        number of diminutives found, time of processing and error message if the file failed
+    """
+    input_path, output_path = paths
+    started = time.perf_counter()
+    try:
+        with stats.timer('open'):
+            document = open_document(input_path)
+        with stats.timer('highlight'):
+            _, diminutives_found = highlight(document, color)
+        os.makedirs(dirname(output_path) or os.curdir, exist_ok=True)
+        with stats.timer('save'):
+            document.save(output_path)
+    except (PythonDocxError, PackageNotFoundError, OSError, BadZipFile, KeyError, ValueError) as e:
+        return 0, time.perf_counter() - started, str(e) or type(e).__name__
+    return diminutives_found, time.perf_counter() - started, None
+
+
+def highlight_many(input_pattern: str, output_directory: str, color, executor: Optional[Executor] = None,
+                   force: bool = False, manifest_path: Optional[str] = None, jobs: int = 1) -> bool:
+    """Highlights diminutives in many docx files, in the executor (with `jobs` workers) if provided,
+    and prints a summary.
+    Outputs keep paths of inputs relative to their base directory (see find_documents).
+    The manifest (a JSON file, by default in the output directory) keeps SHA-256 of every highlighted input,
+    an input is skipped if it, the color and analysis_version did not change and its output exists.
+    Outputs not written by previous runs are overwritten only with `force`.
+    Returns:
+        True if all files were highlighted or skipped
+    """
+    base, paths = find_documents(input_pattern)
+    if not paths:
+        L.error('No docx files in %s', input_pattern)
+        return False
+
+    if manifest_path is None:
+        manifest_path = join(output_directory, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    version = analysis_version()
+
+    results: Dict[str, Tuple[int, float, Optional[str]]] = {}
+    to_highlight = []
+    for path in paths:
+        input_path, output_path = join(base, path), join(output_directory, path)
+        try:
+            entry = {'sha256': file_sha256(input_path), 'color': int(color), 'version': version}
+        except OSError as e:
+            results[path] = 0, 0.0, str(e)
+            continue
+        if manifest.get(path) == entry and isfile(output_path):
+            continue
+        if isfile(output_path) and not force and path not in manifest:
+            results[path] = 0, 0.0, f'File exists: {output_path}. Use -f/--force to overwrite.'
+            continue
+        to_highlight.append((path, entry, (input_path, output_path)))
+
+    L.info('Highlighting %d of %d files', len(to_highlight), len(paths))
+    started = time.perf_counter()
+    os.makedirs(output_directory, exist_ok=True)
+    entries = {file_paths: (path, entry) for path, entry, file_paths in to_highlight}
+    try:
+        for file_paths, result in imap_ordered(partial(highlight_file, color=color), list(entries), executor,
+                                               jobs):
+            path, entry = entries[file_paths]
+            results[path] = result
+            if result[2] is None:
+                manifest[path] = entry
+            else:
+                manifest.pop(path, None)
+    finally:
+        save_manifest(manifest_path, manifest)
+    print_summary(paths, results, time.perf_counter() - started)
+    return all(error is None for _, _, error in results.values())
+
+
+def print_summary(paths: List[str], results: Dict[str, Tuple[int, float, Optional[str]]], elapsed: float):
+    """Prints results of highlight_many for every file and in total."""
+    for path in paths:
+        if path not in results:
+            print(f'{path}: skipped, not changed')
+            continue
+        diminutives_found, seconds, error = results[path]
+        if error is None:
+            print(f'{path}: {diminutives_found} diminutives in {seconds:.3f} s')
+        else:
+            print(f'{path}: failed in {seconds:.3f} s: {error}')
+
+    highlighted = [result for result in results.values() if result[2] is None]
+    files_time = sum(seconds for _, seconds, _ in results.values())
+    print(f'Files: {len(highlighted)} highlighted, {len(paths) - len(results)} skipped, '
+          f'{len(results) - len(highlighted)} failed')
+    print(f'Diminutives: {sum(diminutives_found for diminutives_found, _, _ in highlighted)}')
+    print(f'Time: {elapsed:.3f} s, {files_time:.3f} s in files'
+          + (f', {files_time / len(results):.3f} s per file' if results else ''))
 
 
 def main():
@@ -109,17 +372,27 @@ def main():
 
     parser = argparse.ArgumentParser(description='Hightlight diminutives in `docx` document')
     parser.add_argument(
-        '-i', '--input', help='Input docx file', required=True)
+        '-i', '--input', required=True,
+        help='Input docx file, or a directory or a glob pattern (quoted) to highlight many files')
     parser.add_argument(
-        '-o', '--output', help='Output docx file', required=True)
+        '-o', '--output', required=True,
+        help='Output docx file, or a directory for many files')
     parser.add_argument(
         '-f', '--force', help='Force output overwrite', action='store_true')
     parser.add_argument('-c', '--color', help='Color to highlight diminutives',
                         choices=colors, default=default_color)
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes, for many files every file is highlighted by one worker')
+    parser.add_argument('--manifest', metavar='FILE',
+                        help=f'Hashes of highlighted files for skipping unchanged ones when highlighting many files '
+                             f'(JSON), `{MANIFEST_NAME}` in the output directory by default')
+    parser.add_argument('--stats', nargs='?', const='text', choices=['text', 'json'],
+                        help='Print counters and timers of analysis stages to standard error at exit')
     parser.add_argument("-v", "--verbose", help="debug output",
                         action="store_true")
 
     args = parser.parse_args()
+    install_interrupt_handler()
 
     L.setLevel('INFO')
     if args.verbose:
@@ -129,6 +402,30 @@ def main():
         L.error('WD_COLOR_INDEX has no color `%s`', args.color)
         return 1
 
+    if args.jobs < 1:
+        L.error('Number of jobs must be positive')
+        return 1
+
+    if isdir(args.input) or glob.has_magic(args.input):
+        if isfile(args.output):
+            L.error('Output must be a directory when highlighting many files: %s', args.output)
+            return 1
+
+        started = time.perf_counter()
+        executor = None
+        if args.jobs > 1:
+            executor = ProcessPoolExecutor(args.jobs, initializer=init_worker)
+        try:
+            success = highlight_many(args.input, args.output, getattr(WD_COLOR_INDEX, args.color), executor,
+                                     args.force, args.manifest, args.jobs)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if args.stats:
+                stats.add_time('total', time.perf_counter() - started)
+                print_stats(args.stats)
+        return 0 if success else 1
+
     if not isfile(args.input):
         L.error('Not such file: %s', args.input)
         return 1
@@ -138,16 +435,31 @@ def main():
         return 1
 
     try:
-        document = Document(args.input)
-    except PythonDocxError as e:
+        document = open_document(args.input)
+    except (PythonDocxError, PackageNotFoundError) as e:
         L.error('Error when opening input file: %s', e)
         return 1
 
-    highlighted_document, diminutives_found = highlight(document, getattr(WD_COLOR_INDEX, args.color))
+    started = time.perf_counter()
+    executor = None
+    if args.jobs > 1:
+        executor = ProcessPoolExecutor(args.jobs, initializer=init_worker)
+    try:
+        with stats.timer('highlight'):
+            highlighted_document, diminutives_found = highlight(document, getattr(WD_COLOR_INDEX, args.color),
+                                                                executor, args.jobs)
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     L.info('Found %d diminutives', diminutives_found)
     L.info('Saving highlighted document to %s', args.output)
-    highlighted_document.save(args.output)
+    with stats.timer('save'):
+        highlighted_document.save(args.output)
+
+    if args.stats:
+        stats.add_time('total', time.perf_counter() - started)
+        print_stats(args.stats)
 
 
 if __name__ == "__main__":
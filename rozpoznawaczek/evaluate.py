@@ -0,0 +1,557 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Evaluation of recognition on labelled words and search for weights of checks and the threshold.
+    Labelled words are analysed once and features of their interpretations (matching sets of suffixes,
+    part of speech, grammatical number and gender, lemmas to re-run) are cached in a file.
+    Precision and recall for all combinations of weights of checks (see CHECKS and plan_checks)
+    and thresholds are then computed with numpy array operations, optionally in worker processes.
+    Probability of an interpretation is a weighted mean of its checks, with all weights equal to 1
+    it is the same as from diminutive_probability, so results for it match find_diminutives.
+    Example:
+        $ rozpoznawaczek-evaluate -d tests/training_diminutives.txt -n tests/training_not_diminutives.txt \\
+            --features features.npz -w 0 0.5 1 2 -j 4 --top 3
+        Current: precision 0.8500, recall 0.6711, f1 0.7500
+        f1	precision	recall	threshold	miczko	dlugosz	rerun	gpdk	grzegorczykowa
+        ...
+
+    Features file format (numpy .npz):
+        version: FEATURES_FORMAT, analysis_version and hash of labelled words
+        words_*, lemmas_*: InterpretationFeatures of labelled words and of lemmas to re-run
+        line_lengths, labels: number of words in every labelled line and its label
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import bisect
+import hashlib
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from sys import exit
+from typing import (Any, Dict, Iterator, List, NamedTuple, Optional, Sequence,
+                    Tuple)
+
+from rozpoznawaczek.rozpoznawaczek import (BATCH_SEPARATOR, BATCH_SIZE,
+                                           DIMINUTIVE_PROBABILITY_THRESHOLD,
+                                           DLUGOSZ_NOT_SINGULAR_MASKS,
+                                           DLUGOSZ_SINGULAR_MASKS,
+                                           NUMBER_SINGULAR, POS_ADJECTIVE,
+                                           POS_NOUN, POS_UNKNOWN, SET_BITS,
+                                           AnalysisTable, Interpretation, L,
+                                           analyse_lemma, analysis_version,
+                                           imap_ordered, init_worker,
+                                           install_interrupt_handler,
+                                           numpy_module, suffix_bits,
+                                           tag_features)
+
+# checks of plan_checks, in order of columns of weights
+CHECKS = ('miczko', 'dlugosz', 'rerun', 'gpdk', 'grzegorczykowa')
+RERUN = CHECKS.index('rerun')
+
+FEATURES_FORMAT = 1
+
+DEFAULT_WEIGHTS = [0.0, 0.5, 1.0, 2.0]
+DEFAULT_THRESHOLDS = [round(0.05 * i, 2) for i in range(1, 20)]
+
+# combinations of weights evaluated at once (in one worker process)
+WEIGHTS_CHUNK = 64
+
+
+def require_numpy() -> Any:
+    """numpy module, evaluation is done with its array operations.
+    Raises:
+        ImportError: if numpy is not installed
+    """
+    np = numpy_module()
+    if np is None:
+        raise ImportError('Evaluation needs numpy, pip install rozpoznawaczek[FAST]')
+    return np
+
+
+class InterpretationFeatures(NamedTuple):
+    """Features of interpretations of words, every array has an item per interpretation, except word_lengths.
+    Attributes:
+        lemma_bits, word_bits: sets of suffixes (SET_BITS) matching the lemma and the word
+        part_of_speech, grammar_number, gender: see tag_features
+        rerun: index of the lemma to re-run (word of lemmas' features), -1 if there is no re-run check
+        word_lengths: number of interpretations of every word
+    """
+    lemma_bits: Any
+    word_bits: Any
+    part_of_speech: Any
+    grammar_number: Any
+    gender: Any
+    rerun: Any
+    word_lengths: Any
+
+
+class LabelledFeatures(NamedTuple):
+    """Features of labelled lines (a line is a diminutive if any of its words is).
+    Attributes:
+        words: features of words of all lines
+        lemmas: features of lemmas to re-run, analysed on their own
+        line_lengths: number of words in every line
+        labels: True for diminutives
+    """
+    words: InterpretationFeatures
+    lemmas: InterpretationFeatures
+    line_lengths: Any
+    labels: Any
+
+
+class FeaturesBuilder:
+    """Collects features of interpretations, see InterpretationFeatures."""
+
+    def __init__(self):
+        self.columns: Dict[str, List[int]] = {field: [] for field in InterpretationFeatures._fields}
+        self._bits: Dict[str, int] = {}
+
+    def suffix_bits(self, word: str) -> int:
+        bits = self._bits.get(word)
+        if bits is None:
+            bits = self._bits[word] = suffix_bits(word)
+        return bits
+
+    def add_word(self, word: str, lemmas_and_tags: Sequence[Tuple[str, str]],
+                 rerun_index: Optional[Dict[str, int]] = None):
+        """Adds interpretations of the word, lemmas are re-run (and indexed) only if rerun_index is given."""
+        for lemma, morphology_marker in lemmas_and_tags:
+            lemma = lemma.split(':')[0]
+            part_of_speech, grammar_number, gender = tag_features(morphology_marker)
+
+            rerun = -1
+            if rerun_index is not None and part_of_speech == POS_NOUN and grammar_number != NUMBER_SINGULAR \
+                    and lemma.lower() != word.lower():
+                rerun = rerun_index.setdefault(lemma, len(rerun_index))
+
+            self.columns['lemma_bits'].append(self.suffix_bits(lemma))
+            self.columns['word_bits'].append(self.suffix_bits(word))
+            self.columns['part_of_speech'].append(part_of_speech)
+            self.columns['grammar_number'].append(grammar_number)
+            self.columns['gender'].append(gender)
+            self.columns['rerun'].append(rerun)
+        self.columns['word_lengths'].append(len(lemmas_and_tags))
+
+    def build(self) -> InterpretationFeatures:
+        np = require_numpy()
+        return InterpretationFeatures(**{field: np.array(column, dtype=np.int64)
+                                         for field, column in self.columns.items()})
+
+
+def read_labelled(diminutives_files: List[str], not_diminutives_files: List[str]) -> Tuple[List[str], List[bool]]:
+    """Words (one per line, empty lines are skipped) from files with diminutives and not diminutives
+    and their labels.
+    """
+    words: List[str] = []
+    labels: List[bool] = []
+    for filenames, label in [(diminutives_files, True), (not_diminutives_files, False)]:
+        for filename in filenames:
+            with open(filename, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        words.append(line.strip())
+                        labels.append(label)
+    return words, labels
+
+
+def labelled_hash(words: List[str], labels: List[bool]) -> str:
+    digest = hashlib.sha256()
+    for word, label in zip(words, labels):
+        digest.update(f'{int(label)}\t{word}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def features_version(words: List[str], labels: List[bool]) -> str:
+    return f'{FEATURES_FORMAT}:{analysis_version()}:{labelled_hash(words, labels)}'
+
+
+def iter_line_batches(lines: List[str], batch_size: int = BATCH_SIZE) -> Iterator[Tuple[int, List[str]]]:
+    """Index of the first line and lines, in batches of about `batch_size` characters."""
+    first_line = 0
+    batch_length = 0
+    for i, line in enumerate(lines):
+        batch_length += len(line) + len(BATCH_SEPARATOR)
+        if batch_length >= batch_size:
+            yield first_line, lines[first_line:i + 1]
+            first_line = i + 1
+            batch_length = 0
+    if first_line < len(lines):
+        yield first_line, lines[first_line:]
+
+
+def extract_features(words: List[str], labels: List[bool]) -> LabelledFeatures:
+    """Analyses labelled lines (in batches, as find_diminutives_many) and lemmas to re-run."""
+    np = require_numpy()
+    words_features = FeaturesBuilder()
+    rerun_index: Dict[str, int] = {}
+    line_lengths = [0] * len(words)
+
+    for first_line, lines in iter_line_batches(words):
+        starts = []
+        position = 0
+        for line in lines:
+            starts.append(position)
+            position += len(line) + len(BATCH_SEPARATOR)
+
+        table = AnalysisTable.analyse(BATCH_SEPARATOR.join(lines))
+        for word_index in range(table.number_of_words):
+            line_index = bisect.bisect_right(starts, table.word_starts[word_index]) - 1
+            line_lengths[first_line + line_index] += 1
+            words_features.add_word(table.word(word_index), table.lemmas_and_tags(word_index), rerun_index)
+
+    lemmas_features = FeaturesBuilder()
+    for lemma in rerun_index:
+        interpretations: List[Interpretation] = analyse_lemma(lemma)
+        lemmas_features.add_word(lemma, [(lemma_, morphology_marker)
+                                         for _, _, (_, lemma_, morphology_marker, _, _) in interpretations])
+
+    return LabelledFeatures(words_features.build(), lemmas_features.build(),
+                            np.array(line_lengths, dtype=np.int64), np.array(labels, dtype=bool))
+
+
+def save_features(features: LabelledFeatures, path: str, version: str):
+    np = require_numpy()
+    arrays = {f'words_{field}': value for field, value in features.words._asdict().items()}
+    arrays.update({f'lemmas_{field}': value for field, value in features.lemmas._asdict().items()})
+    with open(path, 'wb') as f:
+        np.savez(f, version=np.array(version), line_lengths=features.line_lengths, labels=features.labels, **arrays)
+
+
+def load_features(path: str, version: str) -> Optional[LabelledFeatures]:
+    """Features from the file, None if it is missing or was saved for other words or analysis_version."""
+    np = require_numpy()
+    try:
+        with np.load(path) as data:
+            if str(data['version']) != version:
+                return None
+            return LabelledFeatures(
+                InterpretationFeatures(**{field: data[f'words_{field}'] for field in InterpretationFeatures._fields}),
+                InterpretationFeatures(**{field: data[f'lemmas_{field}'] for field in InterpretationFeatures._fields}),
+                data['line_lengths'], data['labels'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def check_matrices(features: InterpretationFeatures) -> Tuple[Any, Any]:
+    """Which checks (columns, see CHECKS) are made for interpretations and which of them match,
+    the same as in plan_checks and interpretation_checks. Re-runs are never matching here, see evaluate_weights.
+    """
+    np = require_numpy()
+    part_of_speech, grammar_number = features.part_of_speech, features.grammar_number
+    is_noun = part_of_speech == POS_NOUN
+    is_adjective = part_of_speech == POS_ADJECTIVE
+    is_general = is_noun | is_adjective | (part_of_speech == POS_UNKNOWN)
+    is_singular_noun = is_noun & (grammar_number == NUMBER_SINGULAR)
+    is_other_noun = is_noun & (grammar_number != NUMBER_SINGULAR)
+
+    dlugosz_singular_masks = np.array(DLUGOSZ_SINGULAR_MASKS, dtype=np.int64)[features.gender]
+    dlugosz_not_singular_masks = np.array(DLUGOSZ_NOT_SINGULAR_MASKS, dtype=np.int64)[grammar_number]
+
+    made = np.stack([is_general, is_noun, features.rerun >= 0, is_noun, is_adjective], axis=1)
+    matching = np.stack([
+        is_general & (features.lemma_bits & SET_BITS['miczko'] != 0),
+        (is_singular_noun & (features.lemma_bits & dlugosz_singular_masks != 0))
+        | (is_other_noun & (features.word_bits & dlugosz_not_singular_masks != 0)),
+        np.zeros(len(part_of_speech), dtype=bool),
+        is_noun & (features.lemma_bits & SET_BITS['gpdk'] != 0),
+        is_adjective & (features.lemma_bits & SET_BITS['grzegorczykowa'] != 0),
+    ], axis=1)
+    return made.astype(np.float64), matching.astype(np.float64)
+
+
+def offsets(lengths: Any) -> Any:
+    """Start indices of consecutive parts with the given lengths."""
+    np = require_numpy()
+    return np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+
+
+def ranges(starts: Any, lengths: Any) -> Any:
+    """Concatenated ranges of indices, from every start, of the given lengths."""
+    np = require_numpy()
+    return np.repeat(starts - offsets(lengths), lengths) + np.arange(int(lengths.sum()))
+
+
+def reduce_parts(ufunc: Any, values: Any, starts: Any, lengths: Any) -> Any:
+    """Same as `ufunc.reduceat(values, starts, axis=0)` for consecutive, not empty parts (rows are combined in order),
+    but much faster for many short parts: the first rows of all parts are combined with the second ones etc.
+    """
+    np = require_numpy()
+    result = values[starts]
+    for offset in range(1, int(lengths.max()) if len(lengths) else 0):
+        longer = np.flatnonzero(lengths > offset)
+        result[longer] = ufunc(result[longer], values[starts[longer] + offset])
+    return result
+
+
+def word_probabilities(numerators: Any, denominators: Any, word_starts: Any, word_lengths: Any) -> Any:
+    """Means of probabilities of interpretations of words, for every combination of weights (columns).
+    Interpretations are added in order, as in is_diminutive_probability.
+    """
+    np = require_numpy()
+    probabilities = np.zeros_like(numerators)
+    np.divide(numerators, denominators, out=probabilities, where=denominators != 0)
+    return reduce_parts(np.add, probabilities, word_starts, word_lengths) / word_lengths[:, None]
+
+
+def count_above(scores: Any, thresholds: Any) -> Any:
+    """Numbers of scores (rows) greater than every of the sorted thresholds, for every column."""
+    np = require_numpy()
+    columns = scores.shape[1]
+    # scores greater than the j-th threshold have more than j thresholds below
+    thresholds_below = np.searchsorted(thresholds, scores, side='left')
+    histogram = np.bincount((thresholds_below + np.arange(columns) * (len(thresholds) + 1)).ravel(),
+                            minlength=columns * (len(thresholds) + 1)).reshape(columns, len(thresholds) + 1)
+    return histogram[:, ::-1].cumsum(axis=1)[:, ::-1][:, 1:]
+
+
+class Evaluation:
+    """Features prepared for evaluate_weights.
+    A lemma re-run in a line matches for thresholds below the lemma's probability, so with lemmas of the line
+    sorted by probabilities q1 >= q2 >= ..., the line is a diminutive for a threshold t if t < max(lower, min(qi, Si)),
+    where lower is line's score with all re-runs failing and Si with only re-runs of the first i lemmas matching
+    (scores grow with matching re-runs). Such scores are computed for all thresholds at once (see count_above).
+    """
+
+    def __init__(self, features: LabelledFeatures, thresholds: Sequence[float]):
+        np = require_numpy()
+        self.thresholds = np.array(sorted(set(thresholds)), dtype=np.float64)
+        words, lemmas = features.words, features.lemmas
+        self.made, self.matching = check_matrices(words)
+        self.lemma_made, self.lemma_matching = check_matrices(lemmas)
+        self.lemma_starts = offsets(lemmas.word_lengths)
+        self.lemma_lengths = lemmas.word_lengths
+        self.word_starts = offsets(words.word_lengths)
+        self.word_lengths = words.word_lengths
+        self.rerun = words.rerun
+
+        self.positives = int(features.labels.sum())
+        self.negatives = len(features.labels) - self.positives
+
+        # lines without words are never diminutives
+        not_empty = features.line_lengths > 0
+        self.labels = features.labels[not_empty]
+        self.line_lengths = features.line_lengths[not_empty]
+        self.line_starts = offsets(features.line_lengths)[not_empty]
+        self.line_interpretation_starts = self.word_starts[self.line_starts]
+        self.line_interpretations = reduce_parts(np.add, words.word_lengths, self.line_starts, self.line_lengths)
+
+        # distinct lemmas re-run in lines with re-runs, `rerun_lines[i]` has lemmas `line_lemmas[i, :lemma_counts[i]]`
+        rerun_rows = np.flatnonzero(words.rerun >= 0)
+        row_lines = np.repeat(np.arange(len(self.line_lengths)), self.line_interpretations)[rerun_rows]
+        pairs = np.unique(row_lines * max(len(lemmas.word_lengths), 1) + words.rerun[rerun_rows])
+        pair_lines, pair_lemmas = np.divmod(pairs, max(len(lemmas.word_lengths), 1))
+        self.rerun_lines, pair_positions, self.lemma_counts = np.unique(pair_lines, return_inverse=True,
+                                                                        return_counts=True)
+        pair_ranks = np.arange(len(pairs)) - offsets(self.lemma_counts)[pair_positions]
+        self.line_lemmas = np.full((len(self.rerun_lines), int(self.lemma_counts.max(initial=0))), -1, dtype=np.int64)
+        self.line_lemmas[pair_positions, pair_ranks] = pair_lemmas
+
+    def line_scores(self, numerators: Any, denominators: Any, lines: Optional[Any] = None) -> Any:
+        """Probabilities of the most probable words of lines (all or the selected ones)."""
+        np = require_numpy()
+        if lines is None:
+            probabilities = word_probabilities(numerators, denominators, self.word_starts, self.word_lengths)
+            return reduce_parts(np.maximum, probabilities, self.line_starts, self.line_lengths)
+
+        word_lengths = self.word_lengths[ranges(self.line_starts[lines], self.line_lengths[lines])]
+        probabilities = word_probabilities(numerators, denominators, offsets(word_lengths), word_lengths)
+        return reduce_parts(np.maximum, probabilities, offsets(self.line_lengths[lines]), self.line_lengths[lines])
+
+    def evaluate(self, weights: Any) -> Any:
+        """Numbers of true positives, false positives, false negatives and true negatives
+        for combinations of weights (rows) and thresholds, array of shape (weights, thresholds, 4).
+        """
+        np = require_numpy()
+        weights = np.asarray(weights, dtype=np.float64)
+        lemma_probabilities = word_probabilities(self.lemma_matching @ weights.T, self.lemma_made @ weights.T,
+                                                 self.lemma_starts, self.lemma_lengths)
+        numerators = self.matching @ weights.T
+        denominators = self.made @ weights.T
+
+        # a line is a diminutive if its most probable word is
+        scores = self.line_scores(numerators, denominators)
+
+        # probabilities of lemmas of lines, sorted from the highest
+        line_lemma_probabilities = np.where((self.line_lemmas >= 0)[:, :, None],
+                                            lemma_probabilities[self.line_lemmas], -np.inf)
+        line_lemma_probabilities = -np.sort(-line_lemma_probabilities, axis=1)
+        for i in range(self.line_lemmas.shape[1]):
+            selected = np.flatnonzero(self.lemma_counts > i)
+            lines = self.rerun_lines[selected]
+            lowest_matching = line_lemma_probabilities[selected, i]
+
+            rows = ranges(self.line_interpretation_starts[lines], self.line_interpretations[lines])
+            row_lines = np.repeat(np.arange(len(lines)), self.line_interpretations[lines])
+            reruns = np.flatnonzero(self.rerun[rows] >= 0)
+            matching = lemma_probabilities[self.rerun[rows[reruns]]] >= lowest_matching[row_lines[reruns]]
+            matching_numerators = numerators[rows]
+            matching_numerators[reruns] += matching * weights[:, RERUN]
+
+            matching_scores = self.line_scores(matching_numerators, denominators[rows], lines)
+            scores[lines] = np.maximum(scores[lines], np.minimum(lowest_matching, matching_scores))
+
+        true_positives = count_above(scores[self.labels], self.thresholds)
+        false_positives = count_above(scores[~self.labels], self.thresholds)
+        return np.stack([true_positives, false_positives, self.positives - true_positives,
+                         self.negatives - false_positives], axis=2)
+
+
+# features prepared in the current (worker) process, see init_evaluation
+evaluation: Optional[Evaluation] = None
+
+
+def init_evaluation(features: LabelledFeatures, thresholds: Sequence[float]):
+    global evaluation
+    evaluation = Evaluation(features, thresholds)
+
+
+def init_evaluation_worker(features: LabelledFeatures, thresholds: Sequence[float]):
+    """Initializer for worker processes of sweep."""
+    init_worker()
+    init_evaluation(features, thresholds)
+
+
+def evaluate_weights(weights: Any) -> Any:
+    """Evaluation.evaluate with features from init_evaluation."""
+    if evaluation is None:
+        raise RuntimeError('Call init_evaluation first')
+    return evaluation.evaluate(weights)
+
+
+def weight_grid(values: Sequence[float]) -> Any:
+    """Combinations of the values as weights of CHECKS, starting with all ones (the current algorithm).
+    Combinations of zeros only and differing only by a common factor (giving the same probabilities) are skipped.
+    """
+    np = require_numpy()
+    grid = np.array([[1.0] * len(CHECKS)] + list(itertools.product(sorted(set(values)), repeat=len(CHECKS))))
+    grid = grid[grid.max(axis=1) > 0]
+    _, first = np.unique(np.round(grid / grid.max(axis=1, keepdims=True), 9), axis=0, return_index=True)
+    return grid[np.sort(first)]
+
+
+def sweep(features: LabelledFeatures, weights: Any, thresholds: Sequence[float],
+          executor: Optional[ProcessPoolExecutor] = None, jobs: int = 1) -> Tuple[Any, Any]:
+    """Evaluates all combinations of weights (rows) and thresholds.
+    Args:
+        features: labelled features, see extract_features
+        weights: combinations of weights, see weight_grid
+        thresholds: thresholds to evaluate
+        executor: executor initialized with init_evaluation_worker, None to evaluate in the current process
+        jobs: number of executor's workers
+    Returns:
+        sorted thresholds and confusion matrices, see Evaluation.evaluate
+    """
+    np = require_numpy()
+    if executor is None:
+        init_evaluation(features, thresholds)
+    chunks = [weights[i:i + WEIGHTS_CHUNK] for i in range(0, len(weights), WEIGHTS_CHUNK)]
+    counts = [chunk_counts for _, chunk_counts in imap_ordered(evaluate_weights, chunks, executor, jobs)]
+    return np.array(sorted(set(thresholds)), dtype=np.float64), np.concatenate(counts)
+
+
+def measures(counts: Any) -> Tuple[Any, Any, Any]:
+    """Precision, recall and F1 score from confusion matrices, 0 where undefined."""
+    np = require_numpy()
+    true_positives, false_positives, false_negatives = (counts[..., i].astype(np.float64) for i in range(3))
+    precision = np.divide(true_positives, true_positives + false_positives,
+                          out=np.zeros_like(true_positives), where=true_positives + false_positives > 0)
+    recall = np.divide(true_positives, true_positives + false_negatives,
+                       out=np.zeros_like(true_positives), where=true_positives + false_negatives > 0)
+    f1 = np.divide(2 * precision * recall, precision + recall,
+                   out=np.zeros_like(precision), where=precision + recall > 0)
+    return precision, recall, f1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate recognition of diminutives on labelled words '
+                                                 'and search for weights of checks and the threshold')
+    parser.add_argument('-d', '--diminutives', nargs='+', required=True,
+                        help='Files with diminutives, one per line')
+    parser.add_argument('-n', '--not-diminutives', nargs='+', required=True,
+                        help='Files with not diminutives, one per line')
+    parser.add_argument('--features', metavar='FILE',
+                        help='Cache of features of the labelled words (.npz), reused while the words and the '
+                             'analysis do not change')
+    parser.add_argument('-w', '--weights', nargs='+', type=float, default=DEFAULT_WEIGHTS,
+                        help=f'Weights to try for every check ({", ".join(CHECKS)})')
+    parser.add_argument('-t', '--thresholds', nargs='+', type=float, default=DEFAULT_THRESHOLDS,
+                        help='Thresholds to try, the current one is always added')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of worker processes')
+    parser.add_argument('--top', type=int, default=10, help='Number of best combinations to print')
+    parser.add_argument("-v", "--verbose", help="debug output",
+                        action="store_true")
+
+    args = parser.parse_args()
+    install_interrupt_handler()
+
+    L.setLevel('INFO')
+    if args.verbose:
+        L.setLevel('DEBUG')
+
+    try:
+        np = require_numpy()
+    except ImportError as e:
+        L.error('%s', e)
+        return 1
+
+    if min(args.weights) < 0:
+        L.error('Weights must not be negative')
+        return 1
+
+    try:
+        words, labels = read_labelled(args.diminutives, args.not_diminutives)
+    except (OSError, UnicodeDecodeError) as e:
+        L.error('Error reading file: %s', e)
+        return 1
+    if not words:
+        L.error('No labelled words')
+        return 1
+
+    started = time.perf_counter()
+    version = features_version(words, labels)
+    features = load_features(args.features, version) if args.features else None
+    if features is None:
+        features = extract_features(words, labels)
+        L.info('Analysed %d words in %.2f s', len(words), time.perf_counter() - started)
+        if args.features:
+            try:
+                save_features(features, args.features, version)
+            except OSError as e:
+                L.error('Error writing features: %s', e)
+                return 1
+    else:
+        L.info('Loaded features of %d words from %s', len(words), args.features)
+
+    started = time.perf_counter()
+    weights = weight_grid(args.weights)
+    thresholds = list(args.thresholds) + [DIMINUTIVE_PROBABILITY_THRESHOLD]
+    executor = None
+    if args.jobs > 1:
+        executor = ProcessPoolExecutor(args.jobs, initializer=init_evaluation_worker, initargs=(features, thresholds))
+    try:
+        thresholds, counts = sweep(features, weights, thresholds, executor, args.jobs)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    L.info('Evaluated %d combinations of weights and %d thresholds in %.2f s',
+           len(weights), len(thresholds), time.perf_counter() - started)
+
+    precision, recall, f1 = measures(counts)
+    current = int(np.searchsorted(thresholds, DIMINUTIVE_PROBABILITY_THRESHOLD))
+    L.info('Current: precision %.4f, recall %.4f, f1 %.4f', precision[0, current], recall[0, current], f1[0, current])
+
+    print('\t'.join(['f1', 'precision', 'recall', 'threshold'] + list(CHECKS)))
+    best = np.lexsort((-precision.ravel(), -f1.ravel()))[:args.top]
+    for i, j in zip(*np.unravel_index(best, f1.shape)):
+        print('\t'.join([f'{f1[i, j]:.4f}', f'{precision[i, j]:.4f}', f'{recall[i, j]:.4f}', f'{thresholds[j]:g}']
+                        + [f'{weight:g}' for weight in weights[i]]))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
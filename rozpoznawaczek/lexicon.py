@@ -0,0 +1,375 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Precompiled lexicon of word forms and their probabilities of being diminutive.
+    Forms are read from word lists (whitespace separated tokens) or generated by morfeusz2
+    from lemmas, analysed once and written to a sorted, memory-mapped file. The lexicon
+    is then used instead of morfeusz2 for known forms (see Lexicon), unknown ones are analysed live.
+    Example:
+        $ rozpoznawaczek-lexicon build -o lexicon.bin --lemmas lemmas.txt --words corpus.txt --capitalize
+        Building lexicon from 123456 forms
+        Wrote 123400 forms (56 not single words) to lexicon.bin
+        Verifying lexicon.bin
+        All 123400 forms match the live analysis
+        $ rozpoznawaczek -i corpus.txt --lexicon lexicon.bin
+
+    File format (native byte order):
+        header: magic, format, number of forms, analysis_version, byte order
+        probabilities: float64 for every form
+        offsets: uint32 for every form and the end, into forms
+        forms: utf-8 encoded, sorted by bytes
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import bisect
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from os.path import isfile
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from rozpoznawaczek.rozpoznawaczek import (
+    BATCH_SEPARATOR, BATCH_SIZE, DIMINUTIVE_PROBABILITY_THRESHOLD, TOKEN,
+    AnalysisTable, CacheInfo, L, TokenLookup, analysis_version,
+    find_diminutives, find_diminutives_with_probabilities_many,
+    install_interrupt_handler, is_diminutive_probability, score_table)
+
+MAGIC = b'RZLX'
+LEXICON_FORMAT = 1
+HEADER = struct.Struct('=4sII64sc3x')
+
+
+class LexiconError(Exception):
+    pass
+
+
+class Lexicon(TokenLookup):
+    """Memory-mapped lexicon of forms, see the module documentation. Loading is just mapping the file,
+    so it takes milliseconds and worker processes share its pages. Tokens missing in the lexicon
+    are passed to the `fallback` (f.e. TokenCache) or analysed live.
+    Example:
+        > lexicon = Lexicon('lexicon.bin')
+        > lexicon.get('kotek')
+        0.41666666666666663
+        > find_diminutives('domek kotka', token_cache=lexicon)
+        [(6, 11)]
+    Raises:
+        LexiconError: if the file is not a lexicon or was built for other analysis_version
+    """
+
+    def __init__(self, path: str, fallback: Optional[TokenLookup] = None):
+        self.path = path
+        self.fallback = fallback
+        self.hits = 0
+        self.misses = 0
+        self._open()
+
+    def _open(self):
+        with open(self.path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                raise LexiconError(f'Not a lexicon: {self.path}')
+
+        try:
+            self._read_header()
+        except Exception:
+            self._mmap.close()
+            raise
+
+        view = memoryview(self._mmap)
+        offsets_start = HEADER.size + 8 * self._count
+        self._probabilities = view[HEADER.size:offsets_start].cast('d')
+        self._offsets = view[offsets_start:self._forms_start].cast('I')
+
+    def _read_header(self):
+        if len(self._mmap) < HEADER.size:
+            raise LexiconError(f'Not a lexicon: {self.path}')
+        magic, lexicon_format, count, version, byteorder = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or lexicon_format != LEXICON_FORMAT:
+            raise LexiconError(f'Not a lexicon (or in other format): {self.path}')
+        if byteorder.decode('ascii', 'replace') != sys.byteorder[0]:
+            raise LexiconError(f'Lexicon built on a machine with other byte order: {self.path}')
+        if version.decode('ascii', 'replace') != analysis_version():
+            raise LexiconError(f'Lexicon built for other suffix sets, threshold or dictionary: {self.path}')
+
+        self._count = count
+        self._forms_start = HEADER.size + 8 * count + 4 * (count + 1)
+        if len(self._mmap) < self._forms_start:
+            raise LexiconError(f'Lexicon is truncated: {self.path}')
+
+    def __getstate__(self):
+        """Unpickled copies (f.e. initargs of spawned workers) map the file again, sharing its pages."""
+        return self.path, self.fallback
+
+    def __setstate__(self, state):
+        self.path, self.fallback = state
+        self.hits = 0
+        self.misses = 0
+        self._open()
+
+    def reopen(self):
+        """The mapping is inherited by forked workers, only the fallback may need to reopen."""
+        if self.fallback is not None:
+            self.fallback.reopen()
+
+    def close(self):
+        self._probabilities.release()
+        self._offsets.release()
+        self._mmap.close()
+        if self.fallback is not None:
+            self.fallback.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def form(self, index: int) -> str:
+        return self._form_bytes(index).decode('utf-8')
+
+    def _form_bytes(self, index: int) -> bytes:
+        return self._mmap[self._forms_start + self._offsets[index]:self._forms_start + self._offsets[index + 1]]
+
+    def get(self, form: str) -> Optional[float]:
+        """Returns probability of the form being diminutive, None if the form is not in the lexicon."""
+        key = form.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._form_bytes(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._form_bytes(low) == key:
+            return self._probabilities[low]
+        return None
+
+    def __iter__(self) -> Iterator[Tuple[str, float]]:
+        for index in range(self._count):
+            yield self.form(index), self._probabilities[index]
+
+    def lookup(self, tokens: List[str]) -> Dict[str, List[Tuple[int, int, float]]]:
+        """Takes known tokens from the lexicon, the rest from the fallback or morfeusz2."""
+        found = {}
+        missing = []
+        for token in tokens:
+            probability = self.get(token)
+            if probability is None:
+                missing.append(token)
+            elif probability > DIMINUTIVE_PROBABILITY_THRESHOLD:
+                found[token] = [(0, len(token), probability)]
+            else:
+                found[token] = []
+
+        if missing:
+            if self.fallback is not None:
+                found.update(self.fallback.lookup(missing))
+            else:
+                found.update(zip(missing, find_diminutives_with_probabilities_many(missing)))
+
+        self.hits += len(tokens) - len(missing)
+        self.misses += len(missing)
+        return found
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self._count, self._count)
+
+
+def generate_forms(lemmas: Iterable[str]) -> Iterator[str]:
+    """All inflected forms of the lemmas, from morfeusz2 generator."""
+    import morfeusz2  # type: ignore
+    generator = morfeusz2.Morfeusz(analyse=False, generate=True)
+    for lemma in lemmas:
+        for form, _, _, _, _ in generator.generate(lemma):
+            yield form
+
+
+def read_tokens(filename: str) -> Iterator[str]:
+    with open(filename, 'r') as f:
+        for line in f:
+            yield from TOKEN.findall(line)
+
+
+def analyse_forms(forms: List[str]) -> Iterator[Tuple[str, Optional[float]]]:
+    """Probabilities of the forms being diminutive, None for forms that are not a single word.
+    Forms are analysed in batches, like in find_diminutives_many.
+    """
+    batch_start = 0
+    while batch_start < len(forms):
+        # join forms into a batch of about BATCH_SIZE characters
+        batch_end = batch_start
+        batch_length = 0
+        while batch_end < len(forms) and batch_length < BATCH_SIZE:
+            batch_length += len(forms[batch_end]) + len(BATCH_SEPARATOR)
+            batch_end += 1
+        batch = forms[batch_start:batch_end]
+        batch_start = batch_end
+
+        starts = []
+        position = 0
+        for form in batch:
+            starts.append(position)
+            position += len(form) + len(BATCH_SEPARATOR)
+
+        table = AnalysisTable.analyse(BATCH_SEPARATOR.join(batch))
+        probabilities = score_table(table)
+
+        # words of every form, forms with only separators have none
+        forms_words: List[List[int]] = [[] for _ in batch]
+        for word_index in range(table.number_of_words):
+            forms_words[bisect.bisect_right(starts, table.word_starts[word_index]) - 1].append(word_index)
+
+        for form, form_start, form_words in zip(batch, starts, forms_words):
+            if not form_words:
+                yield form, 0.0
+            elif len(form_words) == 1 and table.word_starts[form_words[0]] == form_start \
+                    and table.word_ends[form_words[0]] == form_start + len(form):
+                yield form, float(probabilities[form_words[0]])
+            else:
+                yield form, None
+
+
+def build_lexicon(forms: Iterable[str], path: str) -> Tuple[int, int]:
+    """Analyses the forms and writes the lexicon (atomically, through a temporary file).
+    Returns:
+        number of forms written and skipped (not single words)
+    """
+    # tokens never contain whitespaces, so forms with them would never be looked up
+    sorted_forms = sorted({form for form in forms if TOKEN.fullmatch(form)}, key=lambda form: form.encode('utf-8'))
+
+    probabilities = array('d')
+    offsets = array('I', [0])
+    encoded_forms = bytearray()
+    skipped = 0
+    for form, probability in analyse_forms(sorted_forms):
+        if probability is None:
+            skipped += 1
+            continue
+        probabilities.append(probability)
+        encoded_forms += form.encode('utf-8')
+        offsets.append(len(encoded_forms))
+
+    temporary_path = f'{path}.tmp{os.getpid()}'
+    with open(temporary_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, LEXICON_FORMAT, len(probabilities), analysis_version().encode('ascii'),
+                            sys.byteorder[0].encode('ascii')))
+        f.write(probabilities.tobytes())
+        f.write(offsets.tobytes())
+        f.write(encoded_forms)
+    os.replace(temporary_path, path)
+    return len(probabilities), skipped
+
+
+def verify_lexicon(lexicon: Lexicon) -> List[Tuple[str, float, float]]:
+    """Compares every form of the lexicon with the live pipeline: scalar is_diminutive_probability
+    for the probability and find_diminutives for the verdict.
+    Returns:
+        forms which do not match, with probabilities from the lexicon and from the live analysis
+    """
+    mismatches = []
+    for form, probability in lexicon:
+        table = AnalysisTable.analyse(form)
+        interpretations = [interpretation for word_index in range(table.number_of_words)
+                           for interpretation in table.interpretations(word_index)]
+        live_probability = is_diminutive_probability(form, interpretations) if interpretations else 0.0
+        is_live_diminutive = find_diminutives(form) == [(0, len(form))]
+        if live_probability != probability or is_live_diminutive != (probability > DIMINUTIVE_PROBABILITY_THRESHOLD):
+            mismatches.append((form, probability, live_probability))
+    return mismatches
+
+
+def verify(path: str) -> int:
+    L.info('Verifying %s', path)
+    try:
+        lexicon = Lexicon(path)
+    except (OSError, LexiconError) as e:
+        L.error('Error when opening lexicon: %s', e)
+        return 1
+
+    mismatches = verify_lexicon(lexicon)
+    for form, probability, live_probability in mismatches[:20]:
+        L.error('Mismatch for `%s`: %f in lexicon, %f live', form, probability, live_probability)
+    if mismatches:
+        L.error('%d of %d forms do not match the live analysis', len(mismatches), len(lexicon))
+        return 1
+    L.info('All %d forms match the live analysis', len(lexicon))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and verify precompiled lexicon of diminutives')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Build lexicon')
+    build_parser.add_argument('-o', '--output', help='Output lexicon file', required=True)
+    build_parser.add_argument('-w', '--words', nargs='+', default=[],
+                              help='Files with forms (whitespace separated tokens, f.e. a corpus)')
+    build_parser.add_argument('-l', '--lemmas', nargs='+', default=[],
+                              help='Files with lemmas (one per line), all their forms are generated')
+    build_parser.add_argument('-c', '--capitalize', action='store_true',
+                              help='Add also capitalized and uppercase variants of forms')
+    build_parser.add_argument('-f', '--force', help='Force output overwrite', action='store_true')
+    build_parser.add_argument('--no-verify', help='Skip verification', action='store_true')
+
+    verify_parser = subparsers.add_parser('verify', help='Verify lexicon against the live analysis')
+    verify_parser.add_argument('lexicon', help='Lexicon file')
+
+    parser.add_argument("-v", "--verbose", help="debug output",
+                        action="store_true")
+
+    args = parser.parse_args()
+    install_interrupt_handler()
+
+    L.setLevel('INFO')
+    if args.verbose:
+        L.setLevel('DEBUG')
+
+    if args.command == 'verify':
+        return verify(args.lexicon)
+
+    if not args.words and not args.lemmas:
+        L.error('Give files with words (-w) or lemmas (-l)')
+        return 1
+
+    if not args.force and isfile(args.output):
+        L.error('File exists: %s. Use -f/--force to overwrite.', args.output)
+        return 1
+
+    forms: Set[str] = set()
+    try:
+        for filename in args.words:
+            forms.update(read_tokens(filename))
+        for filename in args.lemmas:
+            with open(filename, 'r') as f:
+                forms.update(generate_forms(line.strip() for line in f if line.strip()))
+    except (OSError, UnicodeDecodeError) as e:
+        L.error('Error reading file: %s', e)
+        return 1
+
+    if args.capitalize:
+        forms.update([variant for form in forms for variant in (form.capitalize(), form.upper())])
+
+    L.info('Building lexicon from %d forms', len(forms))
+    started = time.perf_counter()
+    try:
+        count, skipped = build_lexicon(forms, args.output)
+    except OSError as e:
+        L.error('Error writing lexicon: %s', e)
+        return 1
+    L.info('Wrote %d forms (%d not single words) to %s', count, skipped, args.output)
+    L.debug('Built in %.2f s', time.perf_counter() - started)
+
+    if args.no_verify:
+        return 0
+    return verify(args.output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,18 +13,28 @@
 """
 
 import argparse
+import bisect
+import hashlib
+import itertools
+import json
 import logging
+import os
+import re
 import signal
+import sqlite3
 import sys
-from collections import defaultdict
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict, defaultdict, deque, namedtuple
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, partial
 from sys import exit
-from typing import Callable, List, Optional, Set, Tuple
-
-# http://morfeusz.sgjp.pl/download/
-import morfeusz2  # type: ignore
-
-# init morfeusz2 globally, because it is slow and leaks memory
-morfeusz_analyser = morfeusz2.Morfeusz(whitespace=morfeusz2.KEEP_WHITESPACES)
+from typing import (AbstractSet, Any, Callable, Dict, FrozenSet, Generic,
+                    Hashable, Iterable, Iterator, List, NamedTuple, Optional,
+                    Set, TextIO, Tuple, TypeVar)
 
 # (start_segment, end_segment, (text_form, lemma, morphology marker, ordinariness, stylistic qualifiers))
 Interpretation = Tuple[int, int, Tuple[str, str, str, List[str], List[str]]]
@@ -33,10 +43,44 @@ IsDiminutiveFunc = Callable[[str, List[Interpretation]], bool]
 logging.basicConfig(format='%(message)s')
 L = logging.getLogger(__name__)
 
+
 def interrupt_handler(sig, frame):
     print('Exit')
     exit(0)
-signal.signal(signal.SIGINT, interrupt_handler)
+
+
+def install_interrupt_handler():
+    """Exits quietly on interrupts, for command line tools (called in their `main`)."""
+    signal.signal(signal.SIGINT, interrupt_handler)
+
+
+def init_analysers(analyser: Optional['Analyser'] = None, lemma_analyser: Optional['Analyser'] = None):
+    """Sets global analysers, f.e. in a worker process. New morfeusz2 analysers are created by default
+    (on first use, see default_analysers).
+    Args:
+        analyser: analyser of texts, with whitespaces kept
+        lemma_analyser: analyser for re-running checks on lemmas, the same as `analyser` by default
+    """
+    global morfeusz_analyser, morfeusz_lemma_analyser
+    if analyser is None:
+        analyser, lemma_analyser = default_analysers()
+    morfeusz_analyser = analyser
+    morfeusz_lemma_analyser = lemma_analyser if lemma_analyser is not None else analyser
+    is_lemma_diminutive.cache_clear()
+
+
+def init_worker(*analysers: 'Analyser', token_cache: Optional['TokenLookup'] = None):
+    """Initializer for worker processes, interrupts are handled by the main process.
+    Args:
+        analysers: passed to init_analysers
+        token_cache: token cache (or lexicon) of the process, used by tasks through with_token_cache
+    """
+    global worker_token_cache
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    init_analysers(*analysers)
+    if token_cache is not None:
+        token_cache.reopen()
+    worker_token_cache = token_cache
 
 # http://www.ipipan.waw.pl/~wolinski/publ/znakowanie.pdf
 GRAM_FLEX = defaultdict(lambda: 'nieznane', {
@@ -122,37 +166,93 @@ GRAM_CATEGORY = defaultdict(lambda: 'nieznane', {
 # format with autopep8 from this point
 # fmt: on
 
+
+class TagInfo(NamedTuple):
+    """Morphology marker (tag) decoded to the parts used in diminutives recognition."""
+    part_of_speech: str  # value from GRAM_FLEX
+    gender: Optional[str]  # 'rodzaj' from GRAM_CATEGORY
+    grammar_number: Optional[str]  # 'liczba' from GRAM_CATEGORY
+    subgender: Optional[str]  # 'przyrodzaj' from GRAM_CATEGORY
+    is_separator: bool
+
+
+def decode_tag(morphology_marker: str) -> TagInfo:
+    """Decodes morphology marker, f.e. `subst:sg:nom.acc.voc:n:ncol`.
+    Use `tag_table` instead, it decodes every marker only once.
+    """
+    markers = morphology_marker.split(':')
+
+    # TODO, czy część mowy zawsze jest jako pierwsza?
+    part_of_speech = GRAM_FLEX[markers[0]]
+
+    gender = None
+    grammar_number = None
+    subgender = None
+    for marker_with_dots in markers:
+        for marker in marker_with_dots.split('.'):
+            flex = GRAM_CATEGORY[marker]
+            if flex == 'rodzaj':
+                gender = marker
+            elif flex == 'liczba':
+                grammar_number = marker
+            elif flex == 'przyrodzaj':
+                subgender = marker
+
+    return TagInfo(part_of_speech, gender, grammar_number, subgender, part_of_speech == 'separator')
+
+
+class TagTable(dict):
+    """Mapping from morphology markers to decoded `TagInfo`s.
+    Morfeusz tagset is finite, so every marker is decoded on the first lookup
+    and later lookups are plain dictionary hits. Equal records are shared.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._records: Dict[TagInfo, TagInfo] = {}
+
+    def __missing__(self, morphology_marker: str) -> TagInfo:
+        tag_info = decode_tag(morphology_marker)
+        tag_info = self._records.setdefault(tag_info, tag_info)
+        self[morphology_marker] = tag_info
+        return tag_info
+
+
+tag_table = TagTable()
+
 # from Paulina Biały "Polish and English Diminutives in Literary Translation: Pragmatic and Cross-Cultural Perspectives"
 # Długosz - nouns, differentiate gender and grammatical number
-suf_dlugosz_noun_masculine = {'ak', 'ek',
-                              'uszek', 'aszek', 'ątek', 'ik', 'yk', 'czyk'}
-suf_dlugosz_noun_feminine = {'ka', 'eczka',
-                             'yczka', 'ułka', 'uszka', 'etka', 'eńka'}
-suf_dlugosz_noun_neuter = {'ko', 'eczko', 'eńko',
-                           'etko', 'uszko', 'onko', 'ątko', 'ączko'}
-suf_dlugosz_noun_plural_and_plurale_tantum = {
-    'ki', 'iki', 'yki', 'iczki', 'uszki', 'ka', 'eczka'}
-suf_dlugosz_noun_other = {'iszek'}
-suf_dlugosz_noun = set(suf_dlugosz_noun_masculine).union(*[suf_dlugosz_noun_feminine,
-                                                           suf_dlugosz_noun_neuter,
-                                                           suf_dlugosz_noun_plural_and_plurale_tantum,
-                                                           suf_dlugosz_noun_other])
+suf_dlugosz_noun_masculine = frozenset({'ak', 'ek',
+                                        'uszek', 'aszek', 'ątek', 'ik', 'yk', 'czyk'})
+suf_dlugosz_noun_feminine = frozenset({'ka', 'eczka',
+                                       'yczka', 'ułka', 'uszka', 'etka', 'eńka'})
+suf_dlugosz_noun_neuter = frozenset({'ko', 'eczko', 'eńko',
+                                     'etko', 'uszko', 'onko', 'ątko', 'ączko'})
+suf_dlugosz_noun_plural_and_plurale_tantum = frozenset({
+    'ki', 'iki', 'yki', 'iczki', 'uszki', 'ka', 'eczka'})
+suf_dlugosz_noun_other = frozenset({'iszek'})
+suf_dlugosz_noun = suf_dlugosz_noun_masculine.union(*[suf_dlugosz_noun_feminine,
+                                                      suf_dlugosz_noun_neuter,
+                                                      suf_dlugosz_noun_plural_and_plurale_tantum,
+                                                      suf_dlugosz_noun_other])
 
 # Grzegorczykowa and Puzynina, Dobrzyński, Kaczorowska - nouns
-suf_gpdk_noun = {'a', 'aś', 'cia', 'cio', 'eniek', 'ina', 'isia', 'ysia', 'nia', 'onek', 'sia', 'sio', 'siu', 'uchna',
-                 'uchno', 'uchny', 'ula', 'ulek', 'ulo', 'alek', 'unia', 'unio', 'uń', 'usia', 'usio', 'usiek', 'uś',
-                 'inka', 'ynka', 'aczek'}
-suf_gpdk_noun.add('isko')  # Kreja
+suf_gpdk_noun = frozenset({'a', 'aś', 'cia', 'cio', 'eniek', 'ina', 'isia', 'ysia', 'nia', 'onek', 'sia', 'sio', 'siu',
+                           'uchna', 'uchno', 'uchny', 'ula', 'ulek', 'ulo', 'alek', 'unia', 'unio', 'uń', 'usia',
+                           'usio', 'usiek', 'uś', 'inka', 'ynka', 'aczek',
+                           'isko'})  # Kreja
 
 # Grzegorczykowa - adjectives
-suf_grzeg_adjectives = {'utki', 'uteńki', 'usieńki', 'uchny',
-                        'uśki', 'eńki', 'usi', 'uteczki', 'utenieczki', 'usienieczki'}
-suf_grzeg_adjectives.add('awy')  # Szymanek
+suf_grzeg_adjectives = frozenset({'utki', 'uteńki', 'usieńki', 'uchny',
+                                  'uśki', 'eńki', 'usi', 'uteczki', 'utenieczki', 'usienieczki',
+                                  'awy'})  # Szymanek
 
 # Paweł Miczko - general
-suf_miczko_general = {'czek', 'szek', 'szki', 'czyk', 'czko', 'eńki', 'sio', 'sia', 'utka', 'utko',
-                      'ątko', 'ątka', 'ula', 'uchna', 'uś', 'unia', 'unio', 'ulka', 'utki', 'ik', 'yk', 'eńko', 'uchny'}
+suf_miczko_general = frozenset({'czek', 'szek', 'szki', 'czyk', 'czko', 'eńki', 'sio', 'sia', 'utka', 'utko', 'ątko',
+                                'ątka', 'ula', 'uchna', 'uś', 'unia', 'unio', 'ulka', 'utki', 'ik', 'yk', 'eńko',
+                                'uchny'})
 
+# suffix sets are frozen, suffix_matcher and cached results (see analysis_version) are computed from them
 diminutive_sets = {
     'dlugosz': suf_dlugosz_noun,
     'gpdk': suf_gpdk_noun,
@@ -160,187 +260,720 @@ diminutive_sets = {
     'miczko': suf_miczko_general
 }
 
+# Długosz subsets, selected by gender and grammatical number of a noun
+dlugosz_noun_sets = {
+    'dlugosz_masculine': suf_dlugosz_noun_masculine,
+    'dlugosz_feminine': suf_dlugosz_noun_feminine,
+    'dlugosz_neuter': suf_dlugosz_noun_neuter,
+    'dlugosz_plural': suf_dlugosz_noun_plural_and_plurale_tantum,
+    'dlugosz_other': suf_dlugosz_noun_other
+}
+
 DIMINUTIVE_PROBABILITY_THRESHOLD = 0.4
 
+# how many lemmas' verdicts to remember, see is_lemma_diminutive
+LEMMA_CACHE_SIZE = 8192
+
+# default size of VerdictCache
+VERDICT_CACHE_SIZE = 65536
+
+# default number of tokens in TokenCache
+TOKEN_CACHE_SIZE = 1 << 20
+
+# bump when scoring changes, so TokenCache does not return stale results
+TOKEN_CACHE_FORMAT = 1
+
+# last use of a token in TokenCache is updated at most that often (seconds), to not write on every hit
+TOKEN_CACHE_TOUCH_INTERVAL = 3600
+# TokenCache counts its rows after at most that many inserts (of the current process), not after every insert
+TOKEN_CACHE_COUNT_INTERVAL = 1 << 12
+
+# sqlite limits number of parameters of a query
+SQLITE_MAX_PARAMETERS = 500
+
+# whitespace separated token, morfeusz2 segments never cross whitespaces
+TOKEN = re.compile(r'\S+')
+# whitespace or whitespace separated token
+WHITESPACE_OR_TOKEN = re.compile(r'\s+|\S+')
+# word or single non-word character, how DictionaryAnalyser splits tokens into segments
+SEGMENT = re.compile(r'\w+|\W')
+
+# default number of tokens in CachingAnalyser
+ANALYSIS_CACHE_SIZE = 1 << 16
+
+# how many characters find_diminutives_many analyses at once
+BATCH_SIZE = 1 << 16
+# texts are joined with it in find_diminutives_many, must be a separator for morfeusz2
+BATCH_SEPARATOR = '\n'
+
+# how many characters iter_diminutives reads at once
+CHUNK_SIZE = 1 << 16
+# longer runs of non-whitespace characters are cut by iter_chunks (at a separator if possible)
+MAX_WORD_LENGTH = 1 << 12
+
+# formats of the command line tool's output, see find_and_print_diminutives
+OUTPUT_FORMATS = ['text', 'jsonl', 'tsv']
+
+# tables with less segments are scored in Python, overhead of numpy calls is bigger than the gain
+VECTORISED_SCORING_MIN_SEGMENTS = 256
+
+# whitespace followed by non-whitespace characters up to the end of the text
+LAST_WHITESPACE = re.compile(r'\s\S*\Z')
+# non-word character followed by word characters up to the end of the text
+LAST_SEPARATOR = re.compile(r'\W\w*\Z')
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+Key = TypeVar('Key', bound=Hashable)
+Value = TypeVar('Value')
+
+
+class LRUCache(Generic[Key, Value]):
+    """Mapping keeping at most `maxsize` most recently used items. Not thread safe, users hold their own locks."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: 'OrderedDict[Key, Value]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Key) -> Optional[Value]:
+        """Returns the value (None if missing) and marks it as the most recently used."""
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key: Key, value: Value):
+        """Inserts the value as the most recently used, evicting the least recently used ones above `maxsize`."""
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+
+class Stats:
+    """Counters and timers of stages of the analysis, collected in the global `stats`.
+    Timers count calls and wall time of a stage, counters are plain sums. They are updated a few times
+    per analysed text (or per lemma re-run), not per word, so collection is always on.
+    Timers (stages):
+        analyse: morphological analysis of texts into AnalysisTables, including group_words
+        group_words: grouping segments into words
+        score: probabilities of words, including suffix_matching and lemma_rerun
+        suffix_matching: matching lemmas and words against suffix sets, in vectorised scoring only
+        lemma_rerun: analysis and scoring of lemmas not found in the cache of is_lemma_diminutive
+        token_lookup: looking up tokens in TokenCache or Lexicon, including analysis of missing ones
+    Counters:
+        analysed_texts, characters, tokens, interpretations: sizes of analysed texts
+        lemma_reruns, lemma_cache_misses: checks of lemmas re-run, and how many were not cached
+        lemma_reruns_skipped: re-runs not made, because they could not change verdicts (see decide_diminutive)
+        verdict_cache_hits, verdict_cache_misses: lookups in VerdictCache
+        token_lookups: distinct tokens looked up in TokenCache or Lexicon
+    Example:
+        > stats.reset()
+        > find_diminutives(text)
+        > print('\\n'.join(stats.format()))
+        > stats.snapshot()['counters']['tokens']
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters: Dict[str, int] = defaultdict(int)
+            self.timers: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])  # calls, seconds
+
+    def count(self, **values: int):
+        with self._lock:
+            for name, value in values.items():
+                self.counters[name] += value
+
+    def add_time(self, name: str, seconds: float, calls: int = 1):
+        with self._lock:
+            timer = self.timers[name]
+            timer[0] += calls
+            timer[1] += seconds
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Measures wall time of the block as one call of the stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters and timers as JSON-serializable dictionary, with derived values."""
+        with self._lock:
+            counters = dict(self.counters)
+            timers = {name: {'calls': calls, 'seconds': seconds} for name, (calls, seconds) in self.timers.items()}
+
+        derived = {}
+        if counters.get('tokens'):
+            derived['interpretations_per_token'] = counters.get('interpretations', 0) / counters['tokens']
+        if counters.get('lemma_reruns'):
+            derived['lemma_cache_hits'] = counters['lemma_reruns'] - counters.get('lemma_cache_misses', 0)
+        return {'counters': counters, 'timers': timers, 'derived': derived}
+
+    def merge(self, snapshot: Dict[str, Any]):
+        """Adds counters and timers from a snapshot, f.e. of a worker process."""
+        with self._lock:
+            for name, value in snapshot['counters'].items():
+                self.counters[name] += value
+            for name, timer in snapshot['timers'].items():
+                self.timers[name][0] += timer['calls']
+                self.timers[name][1] += timer['seconds']
+
+    def drain(self) -> Dict[str, Any]:
+        """Snapshot and reset, for sending stats from worker processes."""
+        snapshot = self.snapshot()
+        self.reset()
+        return snapshot
+
+    def format(self) -> List[str]:
+        """Human readable report, one line per counter and timer."""
+        snapshot = self.snapshot()
+        lines = ['Stats:']
+        for name, value in sorted({**snapshot['counters'], **snapshot['derived']}.items()):
+            lines.append(f'    {name}: {value:.2f}' if isinstance(value, float) else f'    {name}: {value}')
+        for name, timer in sorted(snapshot['timers'].items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f'    {name}: {timer["seconds"]:.3f} s in {timer["calls"]} calls')
+        return lines
+
+
+stats = Stats()
+
+
+def collect_stats(func: Callable[[Any], Any], item: Any) -> Tuple[Any, Dict[str, Any]]:
+    """Calls the function in a worker process, returns its result and stats collected meanwhile."""
+    result = func(item)
+    return result, stats.drain()
+
+
+class Analyser(ABC):
+    """Morphological analyser used by all functions of this module, see init_analysers.
+    Analysis of a text is a list of interpretations in the format of morfeusz2.analyse function
+    (with numbered nodes of the segments graph) and is computed token by token: segments never cross
+    whitespaces and tokens are analysed without context. Whitespaces are segments tagged `sp`
+    if the analyser keeps them.
+    """
+
+    @abstractmethod
+    def analyse(self, text: str) -> List[Interpretation]:
+        pass
+
+    @abstractmethod
+    def dict_id(self) -> str:
+        """Identifies the dictionary, results of the analysis depend on it (see analysis_version)."""
+
 
-def has_diminutive_suffix(word: str, suffixes: Set[str], set_name: Optional[str] = None) -> bool:
+class MorfeuszAnalyser(Analyser):
+    """morfeusz2 analyser, the default one. AnalysisTable reads its interpretations directly.
+    morfeusz2 is imported and its dictionary loaded when the analyser is created, not on import of this module.
+    Whitespaces are kept as `sp` segments or skipped, other keyword arguments are passed to morfeusz2.Morfeusz,
+    and its other attributes (f.e. `generate`) are taken from it.
+    """
+
+    def __init__(self, keep_whitespaces: bool = True, **kwargs):
+        # http://morfeusz.sgjp.pl/download/
+        import morfeusz2  # type: ignore
+        whitespace = morfeusz2.KEEP_WHITESPACES if keep_whitespaces else morfeusz2.SKIP_WHITESPACES
+        self._morfeusz = morfeusz2.Morfeusz(whitespace=whitespace, **kwargs)
+
+    def analyse(self, text: str) -> List[Interpretation]:
+        return self._morfeusz.analyse(text)
+
+    def dict_id(self) -> str:
+        return self._morfeusz.dict_id()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._morfeusz, name)
+
+
+class DictionaryAnalyser(Analyser):
+    """Analyser with a dictionary of forms loaded into memory, for a restricted vocabulary.
+    The dictionary is a tab separated dump, one interpretation per line (like SGJP dumps):
+        form    lemma    morphology marker    [ordinariness    [stylistic qualifiers]]
+    with `|` separated lists of ordinariness and qualifiers; empty lines and `#` comments are skipped.
+    Tokens found in the dictionary are one segment, other ones are split into words and single
+    non-word characters. Forms are looked up with exact case, capitalized and in lowercase, so upper case
+    letters match lower case ones, but not the other way round (like morfeusz2 does by default).
+    Unknown words are tagged `ign`, numbers `dig` and other characters `interp`.
+    Morfeusz's segmentation of agglutinative forms (f.e. 'miałaś' -> 'miała', 'ś') is not supported,
+    unless the whole form is in the dictionary.
+    Example:
+        > analyser = DictionaryAnalyser('./words.tsv')
+        > init_analysers(analyser)
+        > find_diminutives('Miałaś, babo, kotka')
+    """
+
+    def __init__(self, path: str, keep_whitespaces: bool = True):
+        self.path = path
+        self.keep_whitespaces = keep_whitespaces
+        self._load()
+
+    def _load(self):
+        forms: Dict[str, List[Tuple[str, str, Tuple[str, ...], Tuple[str, ...]]]] = {}
+        strings: Dict[str, str] = {}
+        digest = hashlib.sha256()
+        with open(self.path, 'rb') as f:
+            for line_number, line in enumerate(f, 1):
+                digest.update(line)
+                line = line.decode('utf-8').rstrip('\r\n')
+                if not line or line.startswith('#'):
+                    continue
+                columns = line.split('\t')
+                if len(columns) < 3 or len(columns) > 5:
+                    raise ValueError(f'{self.path}:{line_number}: expected 3 to 5 tab separated columns')
+                form, lemma, morphology_marker = columns[:3]
+                ordinariness, qualifiers = (tuple(column.split('|')) if column else ()
+                                            for column in (columns[3:] + ['', ''])[:2])
+                forms.setdefault(form, []).append((
+                    strings.setdefault(lemma, lemma), strings.setdefault(morphology_marker, morphology_marker),
+                    ordinariness, qualifiers))
+        self._forms = {form: tuple(interpretations) for form, interpretations in forms.items()}
+        self._dict_id = f'dictionary:{digest.hexdigest()}'
+
+    def __len__(self) -> int:
+        """Number of distinct forms."""
+        return len(self._forms)
+
+    def __getstate__(self):
+        # workers load the dictionary themselves instead of unpickling it
+        return self.path, self.keep_whitespaces
+
+    def __setstate__(self, state):
+        self.path, self.keep_whitespaces = state
+        self._load()
+
+    def dict_id(self) -> str:
+        return self._dict_id
+
+    def analyse(self, text: str) -> List[Interpretation]:
+        interpretations: List[Interpretation] = []
+        node = 0
+        for match in WHITESPACE_OR_TOKEN.finditer(text):
+            token = match.group()
+            if token[0].isspace():
+                if self.keep_whitespaces:
+                    interpretations.append((node, node + 1, (token, token, 'sp', [], [])))
+                    node += 1
+                continue
+
+            segments = [token] if self._lookup(token) else SEGMENT.findall(token)
+            for segment in segments:
+                segment_interpretations = self._lookup(segment)
+                if not segment_interpretations:
+                    morphology_marker = 'dig' if segment.isdigit() else 'interp' if not segment.isalnum() else 'ign'
+                    segment_interpretations = ((segment, morphology_marker, (), ()),)
+                for lemma, morphology_marker, ordinariness, qualifiers in segment_interpretations:
+                    interpretations.append((node, node + 1, (segment, lemma, morphology_marker,
+                                                             list(ordinariness), list(qualifiers))))
+                node += 1
+        return interpretations
+
+    def _lookup(self, form: str) -> Tuple[Tuple[str, str, Tuple[str, ...], Tuple[str, ...]], ...]:
+        interpretations = ()
+        for variant in case_variants(form):
+            interpretations += self._forms.get(variant, ())
+        return interpretations
+
+
+def case_variants(form: str) -> List[str]:
+    """Forms of the dictionary which the form matches, from the least to the most lower case one.
+    Upper case letters match lower case ones, f.e. 'KOTEK' -> ['KOTEK', 'Kotek', 'kotek'], 'kotek' -> ['kotek'].
+    """
+    variants = [form]
+    for variant in [form.capitalize(), form.lower()]:
+        if variant not in variants and all(character == variant_character or character.lower() == variant_character
+                                           for character, variant_character in zip(form, variant)):
+            variants.append(variant)
+    return variants
+
+
+def dump_dictionary(forms: Iterable[str], path: str, analyser: Optional[Analyser] = None) -> int:
+    """Writes interpretations of the forms in the format of DictionaryAnalyser, analysed with
+    the analyser (global `morfeusz_analyser` by default). Only forms analysed as one segment are written,
+    every interpretation under the most lower case variant of the form having it (see case_variants).
+    Unknown forms (tagged `ign`) are not written.
+    Returns:
+        number of written interpretations
+    """
+    if analyser is None:
+        analyser = morfeusz_analyser
+
+    def one_segment_analysis(form: str) -> List[Tuple[str, str, Tuple[str, ...], Tuple[str, ...]]]:
+        interpretations = analyser.analyse(form)
+        if any(end_node - start_node != 1 or start_node != interpretations[0][0]
+               for start_node, end_node, _ in interpretations):
+            return []
+        return [(lemma, morphology_marker, tuple(ordinariness), tuple(qualifiers))
+                for _, _, (_, lemma, morphology_marker, ordinariness, qualifiers) in interpretations
+                if morphology_marker != 'ign']
+
+    written: Set[Tuple[str, Tuple[str, str, Tuple[str, ...], Tuple[str, ...]]]] = set()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'# {analyser.dict_id()}\n')
+        for form in forms:
+            variants = [(variant, one_segment_analysis(variant)) for variant in reversed(case_variants(form))]
+            for interpretation in variants[-1][1]:
+                variant = next(variant for variant, interpretations in variants if interpretation in interpretations)
+                if (variant, interpretation) in written:
+                    continue
+                written.add((variant, interpretation))
+                lemma, morphology_marker, ordinariness, qualifiers = interpretation
+                f.write('\t'.join([variant, lemma, morphology_marker, '|'.join(ordinariness), '|'.join(qualifiers)]))
+                f.write('\n')
+    return len(written)
+
+
+class CachingAnalyser(Analyser):
+    """Bounded LRU cache of analyses of whitespace separated tokens, decorating any analyser.
+    Every distinct token is analysed once, repeated ones are copied with renumbered nodes. Thread safe.
+    Example:
+        > init_analysers(CachingAnalyser(morfeusz_analyser), morfeusz_lemma_analyser)
+    """
+
+    def __init__(self, analyser: Analyser, maxsize: int = ANALYSIS_CACHE_SIZE):
+        self.analyser = analyser
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._analyses: LRUCache[str, Tuple[int, List[Interpretation]]] = LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+    def dict_id(self) -> str:
+        return self.analyser.dict_id()
+
+    def analyse(self, text: str) -> List[Interpretation]:
+        interpretations: List[Interpretation] = []
+        node = 0
+        for match in WHITESPACE_OR_TOKEN.finditer(text):
+            nodes, token_interpretations = self._analyse_token(match.group())
+            for start_node, end_node, word_morphology in token_interpretations:
+                form, lemma, morphology_marker, ordinariness, qualifiers = word_morphology
+                interpretations.append((node + start_node, node + end_node,
+                                        (form, lemma, morphology_marker, list(ordinariness), list(qualifiers))))
+            node += nodes
+        return interpretations
+
+    def _analyse_token(self, token: str) -> Tuple[int, List[Interpretation]]:
+        """Number of nodes and interpretations of the token, with nodes numbered from 0."""
+        with self._lock:
+            analysis = self._analyses.get(token)
+            if analysis is not None:
+                self.hits += 1
+                return analysis
+            self.misses += 1
+
+        interpretations = self.analyser.analyse(token)
+        first_node = interpretations[0][0] if interpretations else 0
+        interpretations = [(start_node - first_node, end_node - first_node, word_morphology)
+                           for start_node, end_node, word_morphology in interpretations]
+        analysis = max((end_node for _, end_node, _ in interpretations), default=0), interpretations
+
+        with self._lock:
+            self._analyses.put(token, analysis)
+        return analysis
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._analyses))
+
+    def cache_clear(self):
+        with self._lock:
+            self._analyses.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class LazyAnalyser(Analyser):
+    """Creates the analyser on first use, so importing the module or starting a worker process
+    does not load the morfeusz2 dictionary. Only the factory is pickled. Thread safe.
+    Other attributes (f.e. morfeusz2's `generate`) are taken from the created analyser.
+    Example:
+        > analyser = LazyAnalyser(partial(MorfeuszAnalyser, keep_whitespaces=True))
+        > analyser.analyse('kotek')  # the dictionary is loaded here
+    """
+
+    def __init__(self, factory: Callable[[], Analyser]):
+        self.factory = factory
+        self._analyser: Optional[Analyser] = None
+        self._lock = threading.Lock()
+
+    @property
+    def analyser(self) -> Analyser:
+        if self._analyser is None:
+            with self._lock:
+                if self._analyser is None:
+                    self._analyser = self.factory()
+        return self._analyser
+
+    def analyse(self, text: str) -> List[Interpretation]:
+        return self.analyser.analyse(text)
+
+    def dict_id(self) -> str:
+        return self.analyser.dict_id()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.analyser, name)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {'factory': self.factory}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__(state['factory'])  # type: ignore
+
+
+def default_analysers() -> Tuple[Analyser, Analyser]:
+    """New morfeusz2 analysers of texts and lemmas, created on first use (see LazyAnalyser)."""
+    return (LazyAnalyser(partial(MorfeuszAnalyser, keep_whitespaces=True)),
+            LazyAnalyser(partial(MorfeuszAnalyser, keep_whitespaces=False)))
+
+
+# morfeusz2 is shared globally, because it is slow to load and leaks memory, see init_analysers to use other analysers;
+# the lemma analyser is a separate instance for re-running checks on lemmas, see is_lemma_diminutive
+morfeusz_analyser, morfeusz_lemma_analyser = default_analysers()
+
+
+class SuffixMatcher:
+    """Matches a word against many sets of suffixes at once.
+    All suffixes are compiled into one hash table (suffix -> names of sets containing it),
+    so a word is checked with one lookup per distinct suffix length, walking from the longest
+    suffix of the word to the shortest one, instead of calling `str.endswith` for every suffix
+    of every set.
+    Example:
+        > SuffixMatcher({'a': {'ek', 'szek'}, 'b': {'ka'}}).match('Koszek')
+        {'a': 'szek'}
+    """
+
+    def __init__(self, suffix_sets: Dict[str, AbstractSet[str]]):
+        table: Dict[str, Set[str]] = defaultdict(set)
+        for set_name, suffixes in suffix_sets.items():
+            for suffix in suffixes:
+                table[suffix].add(set_name)
+
+        self.table: Dict[str, FrozenSet[str]] = {suffix: frozenset(set_names)
+                                                 for suffix, set_names in table.items()}
+        self.lengths: List[int] = sorted({len(suffix) for suffix in self.table}, reverse=True)
+
+    def match(self, word: str) -> Dict[str, str]:
+        """Finds all sets the word matches against.
+        Args:
+            word: word to check
+        Returns:
+            mapping from names of matched sets to the longest suffix matched in that set
+        """
+        word = word.lower()
+        word_length = len(word)
+
+        matches: Dict[str, str] = {}
+        for length in self.lengths:
+            if length > word_length:
+                continue
+            suffix = word[-length:]
+            set_names = self.table.get(suffix)
+            if set_names:
+                for set_name in set_names:
+                    if set_name not in matches:
+                        matches[set_name] = suffix
+        return matches
+
+
+# compiled once, used by diminutive_probability
+suffix_matcher = SuffixMatcher({**diminutive_sets, **dlugosz_noun_sets})
+
+
+def has_diminutive_suffix(word: str, suffixes: AbstractSet[str]) -> bool:
     """Checks if the word ends with any of the provided suffixes.
     Args:
         word: word to check
         suffixes: set of suffixes to match against
-        set_name: name of the set, for debugging
     Returns:
         True if the check is successful, False otherwise
     """
     # normalization
     word = word.lower()
 
-    # do checking
-    for suffix in suffixes:
-        if word.endswith(suffix):
-            if set_name:
-                L.debug('    -> Matched against %s', set_name)
-            return True
+    # do checking, all suffixes in one call
+    return word.endswith(tuple(suffixes))
 
-    if set_name:
-        L.debug('    -> Not matched against %s', set_name)
-    return False
 
+# what is checked by SuffixCheck
+CHECK_LEMMA = 'lemma'  # suffix of the lemma
+CHECK_WORD = 'word'  # suffix of the word
+CHECK_RERUN = 'rerun'  # is_lemma_diminutive, if re-runs are allowed and the lemma differs from the word
 
-def diminutive_probability(word: str, interpretation: Interpretation, allows_rerun: bool = True) -> float:
-    """Returns probability of the word being diminutive, given its morphological interpretation.
+
+class SuffixCheck(NamedTuple):
+    """One of the checks made by diminutive_probability."""
+    name: str  # human readable name
+    subject: str  # one of CHECK_*
+    set_names: Tuple[str, ...]  # names of suffix_matcher's sets, the check is successful if any of them matches
+
+
+@lru_cache(maxsize=None)
+def plan_checks(morphology_marker: str) -> Tuple[SuffixCheck, ...]:
+    """Chooses checks for an interpretation with the given morphology marker.
     TODO: weights for sets of suffixes
     TODO: handle suffix combinations
     Args:
-        word: word to check
-        interpretation: one item from morfeusz2.analyse function
-        allows_rerun: allows recursive calls to this function
+        morphology_marker: morphology marker (tag) of the interpretation
+    Returns:
+        checks to make, empty for parts of speech other than nouns, adjectives and unknown
     """
-    _, _, word_morphology = interpretation
-    text_form, lemma, morphology_marker, _, _ = word_morphology
-
-    # remove "rozpodabniacze", because words can have completely different meanings
-    # f.e. kot:s1 == animal, kot:s2 == young soldier
-    lemma = lemma.split(':')[0]
-
-    L.debug('Probability for `%s` (%s, %s, %s)',
-            word, text_form, lemma, morphology_marker)
-
     # find word's part of speech
-    is_noun = False
-    is_adjective = False
-    is_unknown = False
+    tag_info = tag_table[morphology_marker]
+    is_noun = tag_info.part_of_speech == 'rzeczownik'
+    is_adjective = tag_info.part_of_speech == 'przymiotnik'
+    is_unknown = tag_info.part_of_speech == 'nieznane'
 
-    # TODO, czy część mowy zawsze jest jako pierwsza?
-    marker = morphology_marker.split(':')[0]
-    if GRAM_FLEX[marker] == 'rzeczownik':
-        is_noun = True
-    if GRAM_FLEX[marker] == 'przymiotnik':
-        is_adjective = True
-    if GRAM_FLEX[marker] == 'nieznane':
-        is_unknown = True
-
-    # sanity check
-    if is_noun and is_adjective:
-        L.warning('Strange, word `%s` is both noun and adjective', word)
-
-    # results
-    number_of_matches = 0
-    number_of_checks = 0
+    checks = []
 
     # general suffixes
     if is_noun or is_adjective or is_unknown:
         # Paweł Miczko
-        number_of_checks += 1
-        if has_diminutive_suffix(lemma, suf_miczko_general, 'Paweł Miczko'):
-            number_of_matches += 1
+        checks.append(SuffixCheck('Paweł Miczko', CHECK_LEMMA, ('miczko',)))
 
     # noun only suffixes
     if is_noun:
-        L.debug('    -> rzeczownik')
-        # Długosz suffixes
-        # find gender and grammatical number
-        gender = None
-        grammar_number = None
-        subgender = None
-        for marker_with_dots in morphology_marker.split(':'):
-            for marker in marker_with_dots.split('.'):
-                flex = GRAM_CATEGORY[marker]
-                if flex == 'rodzaj':
-                    gender = marker
-                elif flex == 'liczba':
-                    grammar_number = marker
-                elif flex == 'przyrodzaj':
-                    subgender = marker
+        # Długosz suffixes, depending on gender and grammatical number
+        gender = tag_info.gender
+        grammar_number = tag_info.grammar_number
+        subgender = tag_info.subgender
 
         # rodzaj/liczba dowolne
-        suffixes_to_check = set()
-        suffixes_to_check.update(suf_dlugosz_noun_other)
+        sets_to_check = ['dlugosz_other']
 
         # liczba pojedyncza
         if grammar_number == 'sg':
-            L.debug('        -> liczba pojedyncza')
-
             if gender:
                 # męski
                 if gender.startswith('m'):
-                    L.debug('        -> rodzaj męski')
-                    suffixes_to_check.update(suf_dlugosz_noun_masculine)
+                    sets_to_check.append('dlugosz_masculine')
                 # żeński
                 elif gender.startswith('f'):
-                    L.debug('        -> rodzaj żeński')
-                    suffixes_to_check.update(suf_dlugosz_noun_feminine)
+                    sets_to_check.append('dlugosz_feminine')
                 # nijaki
                 elif gender.startswith('n'):
-                    L.debug('        -> rodzaj nijaki')
-                    suffixes_to_check.update(suf_dlugosz_noun_neuter)
+                    sets_to_check.append('dlugosz_neuter')
                 # przymnogi TODO, czyli jakby mnogi? Sprawdzac word czy lemma?
                 elif gender.startswith('p'):
-                    L.debug('        -> rodzaj przymnogi')
-                    suffixes_to_check.update(
-                        suf_dlugosz_noun_plural_and_plurale_tantum)
+                    sets_to_check.append('dlugosz_plural')
 
             # check lemma, as it always is plural
-            number_of_checks += 1
-            if has_diminutive_suffix(lemma, suffixes_to_check, 'Długosz'):
-                number_of_matches += 1
+            checks.append(SuffixCheck('Długosz', CHECK_LEMMA, tuple(sets_to_check)))
 
         else:
             # liczba mnoga
             if grammar_number:
-                L.debug('        -> liczba mnoga')
-                suffixes_to_check.update(
-                    suf_dlugosz_noun_plural_and_plurale_tantum)
+                sets_to_check.append('dlugosz_plural')
 
             # plurale tantum
             elif subgender == 'pt':
-                L.debug('        -> plurale tantum')
-                suffixes_to_check.update(
-                    suf_dlugosz_noun_plural_and_plurale_tantum)
+                sets_to_check.append('dlugosz_plural')
 
             # check original word, not lemma, because lemma is singular
-            number_of_checks += 1
-            if has_diminutive_suffix(word, suffixes_to_check, 'Długosz'):
-                number_of_matches += 1
+            checks.append(SuffixCheck('Długosz', CHECK_WORD, tuple(sets_to_check)))
 
             # run checks for pluralized lemma
-            if allows_rerun and lemma.lower() != word.lower():
-                L.debug('    -> re-running checks for lemma!')
-                L.debug('~*' * 5)
-                number_of_checks += 1
-                morf = morfeusz2.Morfeusz(
-                    whitespace=morfeusz2.SKIP_WHITESPACES)
-                lemma_segments = morf.analyse(lemma)
-                if is_diminutive(lemma, lemma_segments, allows_rerun=False):
-                    number_of_matches += 1
-                L.debug('~*' * 5)
+            checks.append(SuffixCheck('lemma re-run', CHECK_RERUN, ()))
 
         # Grzegorczykowa and Puzynina, Dobrzyński, Kaczorowska
-        number_of_checks += 1
-        if has_diminutive_suffix(lemma, suf_gpdk_noun, 'GPDK'):
-            number_of_matches += 1
+        checks.append(SuffixCheck('GPDK', CHECK_LEMMA, ('gpdk',)))
 
     # adjective only suffixes
     elif is_adjective:
-        L.debug('    -> przymiotnik')
         # Grzegorczykowa
-        number_of_checks += 1
-        if has_diminutive_suffix(lemma, suf_grzeg_adjectives, 'Grzegorczykowa'):
-            number_of_matches += 1
+        checks.append(SuffixCheck('Grzegorczykowa', CHECK_LEMMA, ('grzegorczykowa',)))
 
     # we care only about nouns and adjectives
-    else:
-        pass
+    return tuple(checks)
 
-    probability = 0.0
-    if number_of_checks != 0:
-        probability = float(number_of_matches) / number_of_checks
-    L.debug('    -> probability: %f', probability)
-    return probability
+
+def diminutive_probability(word: str, interpretation: Interpretation, allows_rerun: bool = True) -> float:
+    """Returns probability of the word being diminutive, given its morphological interpretation.
+    Probability is a number of successful checks (see plan_checks) divided by a number of all checks.
+    This function does no logging, use explain_diminutive to see how the probability was computed.
+    Args:
+        word: word to check
+        interpretation: one item from morfeusz2.analyse function
+        allows_rerun: allows recursive calls to this function
+    """
+    _, _, (_, lemma, morphology_marker, _, _) = interpretation
+    return interpretation_probability(word, lemma, morphology_marker, allows_rerun)
+
+
+def interpretation_probability(word: str, lemma: str, morphology_marker: str, allows_rerun: bool = True) -> float:
+    """Same as diminutive_probability, but takes parts of the interpretation."""
+    number_of_matches, number_of_checks, rerun_lemma = interpretation_checks(word, lemma, morphology_marker,
+                                                                             allows_rerun)
+    if not number_of_checks:
+        return 0.0
+
+    if rerun_lemma is not None:
+        stats.count(lemma_reruns=1)
+        if is_lemma_diminutive(rerun_lemma):
+            number_of_matches += 1
+
+    return float(number_of_matches) / number_of_checks
+
+
+def interpretation_checks(word: str, lemma: str, morphology_marker: str, allows_rerun: bool = True) \
+        -> Tuple[int, int, Optional[str]]:
+    """Makes the cheap checks of the interpretation, only suffix matching, see interpretation_probability.
+    Returns:
+        number of matching checks, number of all checks (including the lemma re-run)
+        and the lemma to re-run (None if there is no re-run check)
+    """
+    checks = plan_checks(morphology_marker)
+    if not checks:
+        return 0, 0, None
+
+    # remove "rozpodabniacze", because words can have completely different meanings
+    # f.e. kot:s1 == animal, kot:s2 == young soldier
+    lemma = lemma.split(':')[0]
+
+    # one pass over lemma's suffixes for all the sets
+    lemma_matches = suffix_matcher.match(lemma)
+
+    number_of_matches = 0
+    number_of_checks = 0
+    rerun_lemma = None
+    for check in checks:
+        if check.subject == CHECK_LEMMA:
+            matches = lemma_matches
+        elif check.subject == CHECK_WORD:
+            matches = suffix_matcher.match(word)
+        else:
+            if allows_rerun and lemma.lower() != word.lower():
+                number_of_checks += 1
+                rerun_lemma = lemma
+            continue
+
+        number_of_checks += 1
+        for set_name in check.set_names:
+            if set_name in matches:
+                number_of_matches += 1
+                break
+
+    return number_of_matches, number_of_checks, rerun_lemma
 
 
 def is_diminutive_probability(word: str, interpretations: List[Interpretation], **kwargs) -> float:
     """Finds probability of the word being diminutive.
+    Use is_diminutive if only the verdict is needed, it skips checks not changing it.
     Args:
         word: word to check
         interpretations: output of morfeusz2.analyse function, list of segments/nodes/word interpretations
@@ -357,17 +990,970 @@ def is_diminutive_probability(word: str, interpretations: List[Interpretation],
 
 def is_diminutive(word: str, interpretations: List[Interpretation], **kwargs) -> bool:
     """Checks if the word is diminutive.
+    Same as `is_diminutive_probability(...) > DIMINUTIVE_PROBABILITY_THRESHOLD`, but stops
+    as soon as the verdict is decided, see decide_diminutive.
     Args:
         word: word to check
         interpretations: output of morfeusz2.analyse function, list of segments/nodes/word interpretations
     Returns:
         True if the word is diminutive, False otherwise
     """
-    return is_diminutive_probability(word, interpretations, **kwargs) > DIMINUTIVE_PROBABILITY_THRESHOLD
+    return decide_diminutive(word, ((lemma, morphology_marker)
+                                    for _, _, (_, lemma, morphology_marker, _, _) in interpretations),
+                             len(interpretations), **kwargs)
+
+
+def decide_diminutive(word: str, lemmas_and_tags: Iterable[Tuple[str, str]], number_of_interpretations: int,
+                      allows_rerun: bool = True) -> bool:
+    """Decides if the word is diminutive, making the cheapest checks first and stopping
+    as soon as the comparison with DIMINUTIVE_PROBABILITY_THRESHOLD cannot change.
+    Suffixes of all interpretations are checked first, lemmas are re-run (the expensive check)
+    only while the verdict is still open.
+    Lower and upper bounds of the probability are computed like in is_diminutive_probability
+    (the same terms, added in the same order), with not yet known terms and re-runs replaced by
+    their lowest and highest possible values. Rounding of float operations is monotonic,
+    so the bounds never cross the exact probability and verdicts are identical.
+    Args:
+        word: word to check
+        lemmas_and_tags: lemmas and morphology markers of word's interpretations
+        number_of_interpretations: length of lemmas_and_tags
+        allows_rerun: allows re-runs of lemmas
+    Returns:
+        True if the word is diminutive, False otherwise
+    """
+    lower_terms: List[float] = []
+    upper_terms: List[float] = []
+    reruns = []
+
+    # sums of known terms, in the lower bound not known terms are zeros, so it is exact
+    lower = upper = 0.0
+    unknown = number_of_interpretations
+    for lemma, morphology_marker in lemmas_and_tags:
+        unknown -= 1
+        number_of_matches, number_of_checks, rerun_lemma = interpretation_checks(word, lemma, morphology_marker,
+                                                                                 allows_rerun)
+        lower_term = upper_term = 0.0
+        if number_of_checks:
+            lower_term = upper_term = float(number_of_matches) / number_of_checks
+            if rerun_lemma is not None:
+                upper_term = float(number_of_matches + 1) / number_of_checks
+                reruns.append((len(lower_terms), rerun_lemma))
+        lower_terms.append(lower_term)
+        upper_terms.append(upper_term)
+        lower += lower_term
+        upper += upper_term
+
+        if lower / number_of_interpretations > DIMINUTIVE_PROBABILITY_THRESHOLD:
+            verdict = True
+        else:
+            # in the upper bound not known terms are ones
+            upper_bound = upper
+            for _ in range(unknown):
+                upper_bound += 1.0
+            if upper_bound / number_of_interpretations > DIMINUTIVE_PROBABILITY_THRESHOLD:
+                continue
+            verdict = False
+
+        if reruns:
+            stats.count(lemma_reruns_skipped=len(reruns))
+        return verdict
+
+    for rerun_number, (i, rerun_lemma) in enumerate(reruns):
+        stats.count(lemma_reruns=1)
+        if is_lemma_diminutive(rerun_lemma):
+            lower_terms[i] = upper_terms[i]
+        else:
+            upper_terms[i] = lower_terms[i]
+
+        bounded = bounded_verdict(lower_terms, upper_terms)
+        if bounded is not None:
+            stats.count(lemma_reruns_skipped=len(reruns) - rerun_number - 1)
+            return bounded
+
+    raise AssertionError('bounds of a fully checked word must be equal')
 
 
-def find_diminutives(text: str, is_diminutive_func: IsDiminutiveFunc = is_diminutive) \
-        -> List[Tuple[int, int]]:
+def bounded_verdict(lower_terms: List[float], upper_terms: List[float]) -> Optional[bool]:
+    """Verdict of decide_diminutive if bounds (sums of terms of all interpretations) decide it, None otherwise.
+    Terms are added one by one, as in is_diminutive_probability (builtin sum may compensate rounding errors).
+    """
+    lower = 0.0
+    for term in lower_terms:
+        lower += term
+    if lower / len(lower_terms) > DIMINUTIVE_PROBABILITY_THRESHOLD:
+        return True
+
+    upper = 0.0
+    for term in upper_terms:
+        upper += term
+    if upper / len(upper_terms) <= DIMINUTIVE_PROBABILITY_THRESHOLD:
+        return False
+    return None
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def is_lemma_diminutive(lemma: str) -> bool:
+    """Checks if the lemma (analysed on its own, without re-runs) is diminutive.
+    Verdicts are cached, use `is_lemma_diminutive.cache_info()` for hits/misses statistics
+    and `is_lemma_diminutive.cache_clear()` to reset them.
+    Args:
+        lemma: lemma to check
+    Returns:
+        True if the lemma is diminutive, False otherwise
+    """
+    stats.count(lemma_cache_misses=1)
+    with stats.timer('lemma_rerun'):
+        lemma_segments = analyse_lemma(lemma)
+        return is_diminutive(lemma, lemma_segments, allows_rerun=False)
+
+
+def analyse_lemma(lemma: str) -> List[Interpretation]:
+    """Interpretations of the lemma analysed on its own, as for re-runs (see is_lemma_diminutive)."""
+    return morfeusz_lemma_analyser.analyse(lemma)
+
+
+class CheckTrace(NamedTuple):
+    """Result of one SuffixCheck, see explain_diminutive."""
+    check: SuffixCheck
+    subject: str  # checked lemma or word
+    matched: bool
+    matched_suffix: Optional[str]  # for suffix checks
+    rerun: Optional['DiminutiveTrace']  # for re-runs
+
+
+class InterpretationTrace(NamedTuple):
+    """How diminutive_probability was computed, see explain_diminutive."""
+    interpretation: Interpretation
+    lemma: str  # without "rozpodabniacze"
+    tag_info: TagInfo
+    checks: Tuple[CheckTrace, ...]
+    probability: float
+
+    def format(self, word: str) -> List[str]:
+        text_form, _, morphology_marker, _, _ = self.interpretation[2]
+        lines = [f'Probability for `{word}` ({text_form}, {self.lemma}, {morphology_marker})',
+                 f'    -> {self.tag_info.part_of_speech}']
+        if self.tag_info.part_of_speech == 'rzeczownik':
+            lines.append(f'        -> liczba: {self.tag_info.grammar_number}, rodzaj: {self.tag_info.gender}')
+        for check_trace in self.checks:
+            if check_trace.rerun is not None:
+                lines.append(f'    -> re-running checks for lemma `{check_trace.subject}`!')
+                lines.append('~*' * 5)
+                lines.extend(check_trace.rerun.format())
+                lines.append('~*' * 5)
+            elif check_trace.matched:
+                lines.append(f'    -> Matched against {check_trace.check.name} '
+                             f'(`{check_trace.subject}` ends with `{check_trace.matched_suffix}`)')
+            else:
+                lines.append(f'    -> Not matched against {check_trace.check.name}')
+        lines.append(f'    -> probability: {self.probability:f}')
+        return lines
+
+
+class DiminutiveTrace(NamedTuple):
+    """How is_diminutive verdict was reached, see explain_diminutive."""
+    word: str
+    interpretations: Tuple[InterpretationTrace, ...]
+    probability: float
+    is_diminutive: bool
+
+    def format(self) -> List[str]:
+        """Human readable explanation, one item per line."""
+        lines = []
+        for interpretation_trace in self.interpretations:
+            lines.extend(interpretation_trace.format(self.word))
+        verdict = 'diminutive' if self.is_diminutive else 'not diminutive'
+        lines.append(f'Mean probability for `{self.word}`: {self.probability:f} -> {verdict}')
+        return lines
+
+
+def explain_interpretation(word: str, interpretation: Interpretation, allows_rerun: bool = True) \
+        -> InterpretationTrace:
+    """Same as diminutive_probability, but returns details of the computation.
+    Args:
+        word: word to check
+        interpretation: one item from morfeusz2.analyse function
+        allows_rerun: allows recursive calls
+    """
+    _, _, (_, lemma, morphology_marker, _, _) = interpretation
+    lemma = lemma.split(':')[0]
+
+    lemma_matches = suffix_matcher.match(lemma)
+
+    check_traces = []
+    number_of_matches = 0
+    for check in plan_checks(morphology_marker):
+        if check.subject == CHECK_RERUN:
+            if not allows_rerun or lemma.lower() == word.lower():
+                continue
+            rerun = explain_diminutive(lemma, morfeusz_lemma_analyser.analyse(lemma), allows_rerun=False)
+            check_traces.append(CheckTrace(check, lemma, rerun.is_diminutive, None, rerun))
+
+        else:
+            subject = lemma if check.subject == CHECK_LEMMA else word
+            matches = lemma_matches if check.subject == CHECK_LEMMA else suffix_matcher.match(word)
+            matched_suffix = next((matches[set_name] for set_name in check.set_names if set_name in matches), None)
+            check_traces.append(CheckTrace(check, subject, matched_suffix is not None, matched_suffix, None))
+
+        if check_traces[-1].matched:
+            number_of_matches += 1
+
+    probability = 0.0
+    if check_traces:
+        probability = float(number_of_matches) / len(check_traces)
+    return InterpretationTrace(interpretation, lemma, tag_table[morphology_marker], tuple(check_traces), probability)
+
+
+def explain_diminutive(word: str, interpretations: Optional[List[Interpretation]] = None,
+                       allows_rerun: bool = True) -> DiminutiveTrace:
+    """Same as is_diminutive, but returns details of the computation.
+    Example:
+        > print('\\n'.join(explain_diminutive('Jajeczkami').format()))
+    Args:
+        word: word to check
+        interpretations: output of morfeusz2.analyse function, None to analyse the word
+        allows_rerun: allows recursive calls
+    Returns:
+        trace with checks made for every interpretation, probability and the verdict
+    """
+    if interpretations is None:
+        interpretations = morfeusz_lemma_analyser.analyse(word)
+
+    interpretation_traces = tuple(explain_interpretation(word, interpretation, allows_rerun)
+                                  for interpretation in interpretations)
+
+    probability_sum = 0.0
+    for interpretation_trace in interpretation_traces:
+        probability_sum += interpretation_trace.probability
+
+    probability = 0.0
+    if interpretation_traces:
+        probability = probability_sum / len(interpretation_traces)
+    return DiminutiveTrace(word, interpretation_traces, probability, probability > DIMINUTIVE_PROBABILITY_THRESHOLD)
+
+
+def is_diminutive_verbose(word: str, interpretations: List[Interpretation]) -> bool:
+    """Same as is_diminutive, but logs explanation of the verdict (on debug level)."""
+    trace = explain_diminutive(word, interpretations)
+    L.debug('\n'.join(trace.format()))
+    return trace.is_diminutive
+
+
+class AnalysisTable:
+    """Columnar representation of morfeusz2 analysis of a text.
+    Every segment (interpretation) is a row of parallel integer arrays: nodes of the analysis graph
+    and ids of its text form, lemma, morphology marker and qualifiers in the tables of distinct values.
+    Words (non-separator segments between separators) are ranges of rows, with positions in the text.
+    Example:
+        > table = AnalysisTable.analyse('miałaś babo')
+        > table.word_starts[1], table.word_ends[1], table.interpretations(1)
+        (7, 11, [(3, 4, ('babo', 'baba:Sf', 'subst:sg:voc:f', ['nazwa_pospolita'], [])), ...])
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+
+        # segments
+        self.start_nodes = array('i')
+        self.end_nodes = array('i')
+        self.form_ids = array('i')
+        self.lemma_ids = array('i')
+        self.tag_ids = array('i')
+        self.qualifiers_ids = array('i')
+
+        # distinct values: forms and lemmas, morphology markers, (ordinariness, stylistic qualifiers)
+        self.strings: List[str] = []
+        self.tags: List[str] = []
+        self.qualifiers: List[Tuple[List[str], List[str]]] = []
+
+        # words: first segment, segment after the last one, start and end positions in the text
+        self.word_first_segments = array('i')
+        self.word_end_segments = array('i')
+        self.word_starts = array('i')
+        self.word_ends = array('i')
+
+    @classmethod
+    def analyse(cls, text: str, analyser: Optional[Analyser] = None) -> 'AnalysisTable':
+        """Analyses the text with the analyser (global `morfeusz_analyser` by default).
+        Morfeusz's interpretations are read directly into the table, without intermediate tuples,
+        when the wrapped morfeusz2 object is reachable; otherwise analysers go through `from_interpretations`.
+        """
+        started = time.perf_counter()
+        if analyser is None:
+            analyser = morfeusz_analyser
+        if isinstance(analyser, LazyAnalyser):
+            analyser = analyser.analyser
+        if isinstance(analyser, MorfeuszAnalyser):
+            table = cls._from_morfeusz(text, analyser)
+        else:
+            table = cls.from_interpretations(text, analyser.analyse(text))
+
+        stats.add_time('analyse', time.perf_counter() - started)
+        stats.count(analysed_texts=1, characters=len(text), tokens=table.number_of_words,
+                    interpretations=sum(table.word_end_segments) - sum(table.word_first_segments))
+        return table
+
+    @classmethod
+    def _from_morfeusz(cls, text: str, analyser: MorfeuszAnalyser) -> 'AnalysisTable':
+        # the raw interpretations are not a part of the morfeusz2 public API, other versions may not expose them
+        morfeusz = getattr(analyser._morfeusz, '_morfeusz_obj', None)
+        if morfeusz is None:
+            return cls.from_interpretations(text, analyser.analyse(text))
+        id_resolver = morfeusz.getIdResolver()
+
+        table = cls(text)
+        string_ids: Dict[str, int] = {}
+        tag_ids: Dict[int, int] = {}
+        qualifiers_ids: Dict[Tuple[int, int], int] = {}
+
+        for interpretation in morfeusz.analyse(text):
+            table.start_nodes.append(interpretation.startNode)
+            table.end_nodes.append(interpretation.endNode)
+
+            for string, ids in [(interpretation.orth, table.form_ids), (interpretation.lemma, table.lemma_ids)]:
+                string_id = string_ids.get(string)
+                if string_id is None:
+                    string_id = string_ids[string] = len(table.strings)
+                    table.strings.append(string)
+                ids.append(string_id)
+
+            morfeusz_tag_id = interpretation.tagId
+            tag_id = tag_ids.get(morfeusz_tag_id)
+            if tag_id is None:
+                tag_id = tag_ids[morfeusz_tag_id] = len(table.tags)
+                table.tags.append(id_resolver.getTag(morfeusz_tag_id))
+            table.tag_ids.append(tag_id)
+
+            morfeusz_qualifiers_id = (interpretation.nameId, interpretation.labelsId)
+            qualifiers_id = qualifiers_ids.get(morfeusz_qualifiers_id)
+            if qualifiers_id is None:
+                qualifiers_id = qualifiers_ids[morfeusz_qualifiers_id] = len(table.qualifiers)
+                table.qualifiers.append((interpretation.getName(morfeusz), interpretation.getLabels(morfeusz)))
+            table.qualifiers_ids.append(qualifiers_id)
+
+        table._find_words()
+        return table
+
+    @classmethod
+    def from_interpretations(cls, text: str, text_analyzed: List[Interpretation]) -> 'AnalysisTable':
+        """Creates the table from output of morfeusz2.analyse function for the text."""
+        table = cls(text)
+        string_ids: Dict[str, int] = {}
+        tag_ids: Dict[str, int] = {}
+        qualifiers_ids: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], int] = {}
+
+        for start_node, end_node, (text_form, lemma, morphology_marker, ordinariness, qualifiers) in text_analyzed:
+            table.start_nodes.append(start_node)
+            table.end_nodes.append(end_node)
+
+            for string, ids in [(text_form, table.form_ids), (lemma, table.lemma_ids)]:
+                string_id = string_ids.get(string)
+                if string_id is None:
+                    string_id = string_ids[string] = len(table.strings)
+                    table.strings.append(string)
+                ids.append(string_id)
+
+            tag_id = tag_ids.get(morphology_marker)
+            if tag_id is None:
+                tag_id = tag_ids[morphology_marker] = len(table.tags)
+                table.tags.append(morphology_marker)
+            table.tag_ids.append(tag_id)
+
+            key = (tuple(ordinariness), tuple(qualifiers))
+            qualifiers_id = qualifiers_ids.get(key)
+            if qualifiers_id is None:
+                qualifiers_id = qualifiers_ids[key] = len(table.qualifiers)
+                table.qualifiers.append((list(ordinariness), list(qualifiers)))
+            table.qualifiers_ids.append(qualifiers_id)
+
+        table._find_words()
+        return table
+
+    def _find_words(self):
+        """Groups segments into words and finds their positions in the text.
+        text = 'miałaś babo kurę'
+        segments =
+            [(0, 1, ('miała', 'mieć', 'praet:sg:f:imperf', [], [])),
+             (1, 2, ('ś', 'być', 'aglt:sg:sec:imperf:nwok', [], [])),
+             (2, 3, (' ', ' ', 'sp', [], [])),
+             (3, 4, ('babo', 'baba:s1', 'subst:sg:voc:f', ['nazwa_pospolita'], [])),
+             (3, 4, ('babo', 'baba:s2', 'subst:sg:voc:m1', ['nazwa_pospolita'], [])),
+             (4, 5, (' ', ' ', 'sp', [], [])),
+             (5, 6, ('kurę', 'kura', 'subst:sg:acc:f', ['nazwa_pospolita'], []))]
+        `i` just iterates over the segments, whereas `node_positions` maps nodes of the analysis graph
+        (first two numbers) to positions in the text (f.e. 'miała' + 'ś' -> node 2 is at position 6).
+        Every segment's text form is a part of the input text, so a node's position
+        is the position of segment's start node plus the segment's length. Positions are taken from one map
+        for all segments, separators included, as separators may overlap words (f.e. ':' 2->3, ':)' 2->4, ')' 3->4).
+        A word starts after the separators preceding it, even if its segments overlap them
+        (f.e. ':' 2->3, ':P' 2->4, 'Psotnik' 3->5 is the word 'Psotnik').
+        """
+        started = time.perf_counter()
+        is_separator = [tag_table[morphology_marker].is_separator for morphology_marker in self.tags]
+        lengths = [len(string) for string in self.strings]
+        start_nodes, end_nodes, form_ids, tag_ids = self.start_nodes, self.end_nodes, self.form_ids, self.tag_ids
+
+        node_positions: Dict[int, int] = {}
+        if start_nodes:
+            node_positions[start_nodes[0]] = 0
+        separators_end = 0  # position after the last separator
+        i = 0  # position in segments
+        while i < len(tag_ids):
+            # skip separators
+            if is_separator[tag_ids[i]]:
+                node_positions.setdefault(end_nodes[i], node_positions[start_nodes[i]] + lengths[form_ids[i]])
+                separators_end = node_positions[end_nodes[i]]
+                i += 1
+                continue
+
+            # invariant: segment i is some word (not a separator)
+            word_start = i
+            last_node = end_nodes[i]
+
+            # collect all possible interpretations of the word (or segments/nodes in analysis graph)
+            while i < len(tag_ids) and not is_separator[tag_ids[i]]:
+                end_node = end_nodes[i]
+                if end_node not in node_positions:
+                    node_positions[end_node] = node_positions[start_nodes[i]] + lengths[form_ids[i]]
+                last_node = max(last_node, end_node)
+                i += 1
+            # invariant: i==len(segments) or segment i is separator
+
+            # the word ends at the last node of its graph
+            end_position = node_positions[last_node]
+            self.word_first_segments.append(word_start)
+            self.word_end_segments.append(i)
+            self.word_starts.append(min(max(node_positions[start_nodes[word_start]], separators_end), end_position))
+            self.word_ends.append(end_position)
+        stats.add_time('group_words', time.perf_counter() - started)
+
+    def __len__(self) -> int:
+        """Number of segments."""
+        return len(self.tag_ids)
+
+    @property
+    def number_of_words(self) -> int:
+        return len(self.word_starts)
+
+    def word(self, word_index: int) -> str:
+        return self.text[self.word_starts[word_index]:self.word_ends[word_index]]
+
+    def interpretations(self, word_index: int) -> List[Interpretation]:
+        """Interpretations of the word in the format of morfeusz2.analyse function."""
+        strings = self.strings
+        interpretations = []
+        for i in range(self.word_first_segments[word_index], self.word_end_segments[word_index]):
+            ordinariness, qualifiers = self.qualifiers[self.qualifiers_ids[i]]
+            interpretations.append((self.start_nodes[i], self.end_nodes[i],
+                                    (strings[self.form_ids[i]], strings[self.lemma_ids[i]], self.tags[self.tag_ids[i]],
+                                     list(ordinariness), list(qualifiers))))
+        return interpretations
+
+    def lemmas_and_tags(self, word_index: int) -> Tuple[Tuple[str, str], ...]:
+        """Lemmas and morphology markers of the word's interpretations."""
+        strings, tags, lemma_ids, tag_ids = self.strings, self.tags, self.lemma_ids, self.tag_ids
+        return tuple([(strings[lemma_ids[i]], tags[tag_ids[i]])
+                      for i in range(self.word_first_segments[word_index], self.word_end_segments[word_index])])
+
+
+def is_diminutive_in_table(table: AnalysisTable, word_index: int) -> bool:
+    """Same as is_diminutive, for a word from the AnalysisTable."""
+    strings, tags, lemma_ids, tag_ids = table.strings, table.tags, table.lemma_ids, table.tag_ids
+    first_segment = table.word_first_segments[word_index]
+    end_segment = table.word_end_segments[word_index]
+    return decide_diminutive(table.word(word_index), ((strings[lemma_ids[i]], tags[tag_ids[i]])
+                                                      for i in range(first_segment, end_segment)),
+                             end_segment - first_segment)
+
+
+def diminutive_probability_in_table(table: AnalysisTable, word_index: int) -> float:
+    """Same as is_diminutive_probability, for a word from the AnalysisTable."""
+    word = table.word(word_index)
+    strings, tags, lemma_ids, tag_ids = table.strings, table.tags, table.lemma_ids, table.tag_ids
+    first_segment = table.word_first_segments[word_index]
+    end_segment = table.word_end_segments[word_index]
+
+    probability_sum = 0.0
+    for i in range(first_segment, end_segment):
+        probability_sum += interpretation_probability(word, strings[lemma_ids[i]], tags[tag_ids[i]])
+
+    return probability_sum / (end_segment - first_segment)
+
+
+# features of interpretations for the vectorised scoring, see plan_checks
+POS_OTHER, POS_NOUN, POS_ADJECTIVE, POS_UNKNOWN = range(4)
+NUMBER_NONE, NUMBER_SINGULAR, NUMBER_PLURAL = range(3)
+GENDER_NONE, GENDER_MASCULINE, GENDER_FEMININE, GENDER_NEUTER, GENDER_PLURAL = range(5)
+
+SET_BITS = {set_name: 1 << i for i, set_name in enumerate(sorted({**diminutive_sets, **dlugosz_noun_sets}))}
+
+# Długosz sets to check for singular nouns, by gender, and for other nouns, by grammatical number
+DLUGOSZ_SINGULAR_MASKS = (
+    SET_BITS['dlugosz_other'],
+    SET_BITS['dlugosz_other'] | SET_BITS['dlugosz_masculine'],
+    SET_BITS['dlugosz_other'] | SET_BITS['dlugosz_feminine'],
+    SET_BITS['dlugosz_other'] | SET_BITS['dlugosz_neuter'],
+    SET_BITS['dlugosz_other'] | SET_BITS['dlugosz_plural'],
+)
+DLUGOSZ_NOT_SINGULAR_MASKS = (
+    SET_BITS['dlugosz_other'],
+    SET_BITS['dlugosz_other'],
+    SET_BITS['dlugosz_other'] | SET_BITS['dlugosz_plural'],
+)
+
+
+def tag_features(morphology_marker: str) -> Tuple[int, int, int]:
+    """Part of speech, grammatical number and gender codes of the morphology marker."""
+    tag_info = tag_table[morphology_marker]
+    part_of_speech = {'rzeczownik': POS_NOUN, 'przymiotnik': POS_ADJECTIVE,
+                      'nieznane': POS_UNKNOWN}.get(tag_info.part_of_speech, POS_OTHER)
+
+    if tag_info.grammar_number == 'sg':
+        grammar_number = NUMBER_SINGULAR
+    elif tag_info.grammar_number or tag_info.subgender == 'pt':
+        grammar_number = NUMBER_PLURAL
+    else:
+        grammar_number = NUMBER_NONE
+
+    gender = GENDER_NONE
+    for code, prefix in [(GENDER_MASCULINE, 'm'), (GENDER_FEMININE, 'f'), (GENDER_NEUTER, 'n'), (GENDER_PLURAL, 'p')]:
+        if tag_info.gender and tag_info.gender.startswith(prefix):
+            gender = code
+            break
+    return part_of_speech, grammar_number, gender
+
+
+def suffix_bits(word: str) -> int:
+    """Bitmask (see SET_BITS) of sets of suffixes matching the word."""
+    bits = 0
+    for set_name in suffix_matcher.match(word):
+        bits |= SET_BITS[set_name]
+    return bits
+
+
+def score_table(table: AnalysisTable) -> Any:
+    """Probabilities of being diminutive for all words of the AnalysisTable.
+    With numpy installed, checks of all interpretations are made with array operations,
+    only suffix matching (once per distinct lemma) and lemma re-runs are done in Python.
+    Results are exactly the same as from diminutive_probability_in_table, also the order of
+    floating point additions is the same.
+    Returns:
+        numpy array (list without numpy or for small tables) of probabilities, one per word
+    """
+    with stats.timer('score'):
+        return _score_table(table)
+
+
+def decide_table(table: AnalysisTable) -> Any:
+    """Verdicts for all words of the AnalysisTable, the same as `score_table(table) > DIMINUTIVE_PROBABILITY_THRESHOLD`,
+    but lemmas are re-run only for words whose verdicts do not follow from the other checks (see decide_diminutive).
+    Returns:
+        numpy array (list without numpy or for small tables) of booleans, one per word
+    """
+    with stats.timer('score'):
+        return _score_table(table, decide=True)
+
+
+@lru_cache(maxsize=None)
+def numpy_module() -> Any:
+    """numpy, optional, for vectorised scoring (pip install rozpoznawaczek[FAST]).
+    Imported on first use, it takes longer than the rest of the module. None if not installed.
+    """
+    try:
+        import numpy  # type: ignore
+    except ImportError:
+        return None
+    return numpy
+
+
+def _score_table(table: AnalysisTable, decide: bool = False) -> Any:
+    np = numpy_module() if len(table) >= VECTORISED_SCORING_MIN_SEGMENTS else None
+    if np is None:
+        if decide:
+            return [is_diminutive_in_table(table, word_index) for word_index in range(table.number_of_words)]
+        return [diminutive_probability_in_table(table, word_index) for word_index in range(table.number_of_words)]
+
+    # interpretations of words (rows of the table without separators)
+    word_first_segments = np.frombuffer(table.word_first_segments, dtype=np.intc).astype(np.int64)
+    word_lengths = np.frombuffer(table.word_end_segments, dtype=np.intc) - word_first_segments
+    segment_words = np.repeat(np.arange(len(word_lengths)), word_lengths)
+    segment_offsets = np.arange(len(segment_words)) - np.repeat(np.cumsum(word_lengths) - word_lengths, word_lengths)
+    segments = word_first_segments[segment_words] + segment_offsets
+
+    # features of morphology markers
+    features = np.array([tag_features(morphology_marker) for morphology_marker in table.tags],
+                        dtype=np.int64).reshape(-1, 3)
+    tag_ids = np.frombuffer(table.tag_ids, dtype=np.intc)[segments]
+    part_of_speech, grammar_number, gender = features[tag_ids].T
+
+    # suffixes of lemmas, matched once per distinct lemma
+    suffix_matching_started = time.perf_counter()
+    lemma_ids = np.frombuffer(table.lemma_ids, dtype=np.intc)[segments]
+    stripped_lemmas: Dict[int, str] = {}
+    lemma_bits = np.zeros(len(table.strings), dtype=np.int64)
+    for lemma_id in np.unique(lemma_ids).tolist():
+        stripped_lemmas[lemma_id] = table.strings[lemma_id].split(':')[0]
+        lemma_bits[lemma_id] = suffix_bits(stripped_lemmas[lemma_id])
+    lemma_bits = lemma_bits[lemma_ids]
+
+    is_noun = part_of_speech == POS_NOUN
+    is_adjective = part_of_speech == POS_ADJECTIVE
+    is_general = is_noun | is_adjective | (part_of_speech == POS_UNKNOWN)
+    is_singular_noun = is_noun & (grammar_number == NUMBER_SINGULAR)
+    is_other_noun = is_noun & (grammar_number != NUMBER_SINGULAR)
+
+    # suffixes of words and lemma re-runs, only for not singular nouns
+    word_bits = np.zeros(len(segments), dtype=np.int64)
+    has_rerun = np.zeros(len(segments), dtype=bool)
+    rerun_matched = np.zeros(len(segments), dtype=bool)
+    words_bits: Dict[int, int] = {}
+    reruns: List[Tuple[int, str]] = []
+    for i in np.flatnonzero(is_other_noun).tolist():
+        word_index = int(segment_words[i])
+        word = table.word(word_index)
+        if word_index not in words_bits:
+            words_bits[word_index] = suffix_bits(word)
+        word_bits[i] = words_bits[word_index]
+
+        lemma = stripped_lemmas[int(lemma_ids[i])]
+        if lemma.lower() != word.lower():
+            has_rerun[i] = True
+            reruns.append((i, lemma))
+    stats.add_time('suffix_matching', time.perf_counter() - suffix_matching_started)
+
+    dlugosz_singular_masks = np.array(DLUGOSZ_SINGULAR_MASKS, dtype=np.int64)[gender]
+    dlugosz_not_singular_masks = np.array(DLUGOSZ_NOT_SINGULAR_MASKS, dtype=np.int64)[grammar_number]
+
+    number_of_checks = (is_general.astype(np.int64) + 2 * is_noun + has_rerun + is_adjective)
+    number_of_suffix_matches = (
+        (is_general & (lemma_bits & SET_BITS['miczko'] != 0)).astype(np.int64)
+        + (is_singular_noun & (lemma_bits & dlugosz_singular_masks != 0))
+        + (is_other_noun & (word_bits & dlugosz_not_singular_masks != 0))
+        + (is_noun & (lemma_bits & SET_BITS['gpdk'] != 0))
+        + (is_adjective & (lemma_bits & SET_BITS['grzegorczykowa'] != 0))
+    )
+    has_checks = number_of_checks != 0
+    by_offset = np.argsort(segment_offsets, kind='stable')
+    offset_ends = np.cumsum(np.bincount(segment_offsets, minlength=1)).tolist()
+
+    def word_probabilities(number_of_matches):
+        probabilities = np.zeros(len(segments), dtype=np.float64)
+        probabilities[has_checks] = number_of_matches[has_checks] / number_of_checks[has_checks]
+
+        # sum interpretations' probabilities in the same order as diminutive_probability_in_table
+        # (first interpretations of all words, then second ones etc.), because float addition is not associative
+        probability_sums = np.zeros(len(word_lengths), dtype=np.float64)
+        offset_start = 0
+        for offset_end in offset_ends:
+            selected = by_offset[offset_start:offset_end]
+            probability_sums[segment_words[selected]] += probabilities[selected]
+            offset_start = offset_end
+        return probability_sums / np.maximum(word_lengths, 1)
+
+    if decide:
+        # bounds of probabilities, with all re-runs failing or succeeding, see decide_diminutive
+        surely_diminutive = word_probabilities(number_of_suffix_matches) > DIMINUTIVE_PROBABILITY_THRESHOLD
+        undecided = word_probabilities(number_of_suffix_matches + has_rerun) > DIMINUTIVE_PROBABILITY_THRESHOLD
+        undecided &= ~surely_diminutive
+        all_reruns = len(reruns)
+        reruns = [(i, lemma) for i, lemma in reruns if undecided[segment_words[i]]]
+        stats.count(lemma_reruns_skipped=all_reruns - len(reruns))
+
+    for i, lemma in reruns:
+        rerun_matched[i] = is_lemma_diminutive(lemma)
+    stats.count(lemma_reruns=len(reruns))
+
+    probabilities = word_probabilities(number_of_suffix_matches + rerun_matched)
+    if decide:
+        return surely_diminutive | (undecided & (probabilities > DIMINUTIVE_PROBABILITY_THRESHOLD))
+    return probabilities
+
+
+class VerdictCache:
+    """Bounded LRU cache of `is_diminutive` verdicts, to be shared between `find_diminutives` calls.
+    Verdicts are keyed by word's surface form and lemmas and tags of its interpretations,
+    so every distinct word is scored once. Thread safe.
+    Example:
+        > cache = VerdictCache(maxsize=1024)
+        > for text in texts:
+        >     find_diminutives(text, cache=cache)
+        > cache.cache_info()
+        CacheInfo(hits=1234, misses=56, maxsize=1024, currsize=56)
+    """
+
+    def __init__(self, maxsize: int = VERDICT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._verdicts: LRUCache[Hashable, bool] = LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(word: str, interpretations: List[Interpretation]) -> Hashable:
+        """Positions of segments in the text are not part of the key, scoring does not use them."""
+        return word, tuple((lemma, morphology_marker) for _, _, (_, lemma, morphology_marker, _, _) in interpretations)
+
+    def is_diminutive(self, word: str, interpretations: List[Interpretation]) -> bool:
+        """Cached version of `is_diminutive`."""
+        key = self.key(word, interpretations)
+        with self._lock:
+            verdict = self._verdicts.get(key)
+            if verdict is not None:
+                self.hits += 1
+                return verdict
+            self.misses += 1
+
+        verdict = is_diminutive(word, interpretations)
+
+        with self._lock:
+            self._verdicts.put(key, verdict)
+        return verdict
+
+    def is_diminutive_in_table(self, table: AnalysisTable, word_index: int) -> bool:
+        """Cached version of `is_diminutive_in_table`."""
+        word = table.word(word_index)
+        lemmas_and_tags = table.lemmas_and_tags(word_index)
+        key = (word, lemmas_and_tags)
+        with self._lock:
+            verdict = self._verdicts.get(key)
+            if verdict is not None:
+                self.hits += 1
+                return verdict
+            self.misses += 1
+
+        verdict = decide_diminutive(word, lemmas_and_tags, len(lemmas_and_tags))
+
+        with self._lock:
+            self._verdicts.put(key, verdict)
+        return verdict
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._verdicts))
+
+    def cache_clear(self):
+        with self._lock:
+            self._verdicts.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def analysis_version() -> str:
+    """Hash of everything results of the analysis depend on: suffix sets, threshold, morfeusz2 dictionary."""
+    version = {
+        'format': TOKEN_CACHE_FORMAT,
+        'suffix_sets': {set_name: sorted(suffixes)
+                        for set_name, suffixes in {**diminutive_sets, **dlugosz_noun_sets}.items()},
+        'threshold': DIMINUTIVE_PROBABILITY_THRESHOLD,
+        'dictionary': morfeusz_analyser.dict_id(),
+    }
+    return hashlib.sha256(json.dumps(version, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class TokenLookup(ABC):
+    """Diminutives of whitespace separated tokens known in advance, see TokenCache and lexicon.Lexicon.
+    Subclasses implement `lookup`, texts are split into tokens here.
+    """
+
+    @abstractmethod
+    def lookup(self, tokens: List[str]) -> Dict[str, List[Tuple[int, int, float]]]:
+        """Returns diminutives (start and end positions in the token and probabilities) for every token."""
+
+    def find_diminutives_with_probabilities(self, text: str) -> List[Tuple[int, int, float]]:
+        """Same as find_diminutives_with_probabilities, but tokens are looked up."""
+        started = time.perf_counter()
+        tokens = [(match.start(), match.group()) for match in TOKEN.finditer(text)]
+        distinct_tokens = list(dict.fromkeys(token for _, token in tokens))
+        found = self.lookup(distinct_tokens)
+        stats.add_time('token_lookup', time.perf_counter() - started)
+        stats.count(token_lookups=len(distinct_tokens))
+        return [(token_start + start_position, token_start + end_position, probability)
+                for token_start, token in tokens
+                for start_position, end_position, probability in found[token]]
+
+    def find_diminutives(self, text: str) -> List[Tuple[int, int]]:
+        """Same as find_diminutives, but tokens are looked up."""
+        return [(start_position, end_position)
+                for start_position, end_position, _ in self.find_diminutives_with_probabilities(text)]
+
+    @abstractmethod
+    def cache_info(self) -> CacheInfo:
+        pass
+
+    def reopen(self):
+        """Opens resources not shared with the parent of a forked worker process, see init_worker."""
+
+    def close(self):
+        pass
+
+
+class TokenCache(TokenLookup):
+    """Persistent (sqlite) cache of diminutives in whitespace separated tokens, to be shared between runs
+    and processes. Tokens are keyed together with analysis_version, so results of a changed algorithm
+    or dictionary are never returned. Only tokens not seen before are analysed with morfeusz2.
+    The database is in WAL mode, so many processes can read and write it concurrently.
+    The least recently used tokens are evicted when there are more than `maxsize` of them.
+    Recently used tokens are kept also in memory (up to `memory_size`), to not query the database for them.
+    Example:
+        > cache = TokenCache('diminutives.sqlite')
+        > for text in texts:
+        >     find_diminutives(text, token_cache=cache)
+        > cache.cache_info()
+        CacheInfo(hits=1234, misses=56, maxsize=1048576, currsize=56)
+    """
+
+    def __init__(self, path: str, maxsize: int = TOKEN_CACHE_SIZE, timeout: float = 60.0,
+                 memory_size: int = VERDICT_CACHE_SIZE):
+        self.path = path
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.memory_size = memory_size
+        self.version = analysis_version()
+        self.hits = 0
+        self.misses = 0
+        # rows counted by _evict plus rows inserted since (by this instance only), None before the first count
+        self._size: Optional[int] = None
+        self._inserted = 0
+        self._lock = threading.Lock()
+        self._recent: LRUCache[str, List[Tuple[int, int, float]]] = LRUCache(memory_size)
+        self._connect()
+
+    def _connect(self):
+        self._pid = os.getpid()
+        self._connection = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False,
+                                           isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS tokens (version TEXT, token TEXT, diminutives TEXT, '
+                                 'last_used REAL, PRIMARY KEY (version, token))')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS tokens_last_used ON tokens (last_used)')
+
+    def __getstate__(self):
+        """Unpickled copies (f.e. initargs of spawned workers) open their own connections."""
+        state = self.__dict__.copy()
+        del state['_connection'], state['_lock'], state['_recent']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._recent = LRUCache(self.memory_size)
+        self._connect()
+
+    def reopen(self):
+        """sqlite connections must not be used across fork, a forked process opens a new one."""
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._connect()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _get_many(self, tokens: List[str], now: float) \
+            -> Tuple[Dict[str, List[Tuple[int, int, float]]], List[str]]:
+        """Returns tokens found in the database and the ones with outdated last use."""
+        found = {}
+        stale = []
+        for i in range(0, len(tokens), SQLITE_MAX_PARAMETERS):
+            part = tokens[i:i + SQLITE_MAX_PARAMETERS]
+            rows = self._connection.execute(
+                f'SELECT token, diminutives, last_used FROM tokens '
+                f'WHERE version = ? AND token IN ({",".join("?" * len(part))})',
+                [self.version, *part])
+            for token, diminutives, last_used in rows:
+                found[token] = [tuple(diminutive) for diminutive in json.loads(diminutives)]
+                if now - last_used > TOKEN_CACHE_TOUCH_INTERVAL:
+                    stale.append(token)
+        return found, stale
+
+    def _update(self, stale: List[str], misses: Dict[str, List[Tuple[int, int, float]]], now: float):
+        with self._connection:
+            self._connection.execute('BEGIN IMMEDIATE')
+            self._connection.executemany('UPDATE tokens SET last_used = ? WHERE version = ? AND token = ?',
+                                         [(now, self.version, token) for token in stale])
+            self._connection.executemany('INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?)',
+                                         [(self.version, token, json.dumps(diminutives), now)
+                                          for token, diminutives in misses.items()])
+        if misses:
+            self._evict(len(misses))
+
+    def _remember(self, found: Dict[str, List[Tuple[int, int, float]]]):
+        for token, diminutives in found.items():
+            self._recent.put(token, diminutives)
+
+    def _evict(self, inserted: int):
+        """Evicts the least recently used tokens if there are too many. Counting rows scans the whole table,
+        so it is done only when the approximate size exceeds `maxsize` or after TOKEN_CACHE_COUNT_INTERVAL inserts
+        (other processes insert too).
+        """
+        self._inserted += inserted
+        if self._size is not None:
+            self._size += inserted
+            if self._size <= self.maxsize and self._inserted < TOKEN_CACHE_COUNT_INTERVAL:
+                return
+
+        currsize = self._connection.execute('SELECT COUNT(*) FROM tokens').fetchone()[0]
+        self._inserted = 0
+        if currsize > self.maxsize:
+            # evict a bit more, so it is not done after every insert
+            evicted = currsize - self.maxsize + self.maxsize // 10
+            with self._connection:
+                self._connection.execute('BEGIN IMMEDIATE')
+                self._connection.execute(
+                    'DELETE FROM tokens WHERE rowid IN (SELECT rowid FROM tokens ORDER BY last_used LIMIT ?)',
+                    (evicted,))
+            currsize = max(currsize - evicted, 0)
+        self._size = currsize
+
+    def lookup(self, tokens: List[str]) -> Dict[str, List[Tuple[int, int, float]]]:
+        """Analyses only tokens missing in the cache."""
+        with self._lock:
+            found = {}
+            not_recent = []
+            for token in tokens:
+                diminutives = self._recent.get(token)
+                if diminutives is None:
+                    not_recent.append(token)
+                else:
+                    found[token] = diminutives
+
+            misses: Dict[str, List[Tuple[int, int, float]]] = {}
+            if not_recent:
+                now = time.time()
+                found_in_database, stale = self._get_many(not_recent, now)
+                missing = [token for token in not_recent if token not in found_in_database]
+                misses = dict(zip(missing, find_diminutives_with_probabilities_many(missing)))
+                if stale or misses:
+                    self._update(stale, misses, now)
+                found_in_database.update(misses)
+                self._remember(found_in_database)
+                found.update(found_in_database)
+
+            self.hits += len(tokens) - len(misses)
+            self.misses += len(misses)
+        return found
+
+    def cache_info(self) -> CacheInfo:
+        """Statistics of this instance, `currsize` is the number of tokens in the database (all versions)."""
+        with self._lock:
+            currsize = self._connection.execute('SELECT COUNT(*) FROM tokens').fetchone()[0]
+            return CacheInfo(self.hits, self.misses, self.maxsize, currsize)
+
+    def cache_clear(self):
+        with self._lock:
+            with self._connection:
+                self._connection.execute('BEGIN IMMEDIATE')
+                self._connection.execute('DELETE FROM tokens')
+            self._recent.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+
+def find_diminutives(text: str, is_diminutive_func: IsDiminutiveFunc = is_diminutive,
+                     cache: Optional[VerdictCache] = None,
+                     token_cache: Optional[TokenLookup] = None) -> List[Tuple[int, int]]:
     """Finds diminutives in the text.
     1. Tokenize (split to a list of words) the text
     2. Lemmatise (find possible base forms) every token/word
@@ -383,112 +1969,307 @@ def find_diminutives(text: str, is_diminutive_func: IsDiminutiveFunc = is_diminu
         text: sequence of words to analyse
         is_diminutive_func: function used to determine if one word is diminutive (given it's
                             morphological interpretation). Defaults to `is_diminutive` from this module
+        cache: cache of verdicts to use with the default `is_diminutive_func`, ignored for other functions
+        token_cache: persistent cache (or lexicon) of tokens to use with the default `is_diminutive_func`,
+                     ignored for other functions
     Returns:
         list with start and end positions of diminutives, possibly empty
     """
+    if token_cache is not None and is_diminutive_func is is_diminutive:
+        return token_cache.find_diminutives(text)
+
     try:
-        text_analyzed = morfeusz_analyser.analyse(text)
+        table = AnalysisTable.analyse(text)
     except TypeError as e:
         L.error('Error, probably passed bytes instead of a string.')
         raise e
 
-    position_in_text = 0  # position in input text (string)
-    i = 0  # position in analyzed text (list)
-    """
-    text = 'miałaś babo kurę'
-    text_analyzed =
-        [(0, 1, ('miała', 'mieć', 'praet:sg:f:imperf', [], [])),
-         (1, 2, ('ś', 'być', 'aglt:sg:sec:imperf:nwok', [], [])),
-         (2, 3, (' ', ' ', 'sp', [], [])),
-         (3, 4, ('babo', 'baba:s1', 'subst:sg:voc:f', ['nazwa_pospolita'], [])),
-         (3, 4, ('babo', 'baba:s2', 'subst:sg:voc:m1', ['nazwa_pospolita'], [])),
-         (4, 5, (' ', ' ', 'sp', [], [])),
-         (5, 6, ('kurę', 'kura', 'subst:sg:acc:f', ['nazwa_pospolita'], []))]
-    `i` just iterates over the list, whereas
-    `position_in_text` keeps track on original words (f.e. 'miała' + 'ś').
-
-    Assumption in this function is that separators (spaces, newlines, dots, commas etc)
-    always have only one interpretation (corresponding item in text_analyzed list)
-    """
-
-    # skip leading separators
-    normal_word_found = False
-    while i < len(text_analyzed) and not normal_word_found:
-        _, _, word_morphology = text_analyzed[i]
-        text_form, _, morphology_marker, _, _ = word_morphology
-
-        if GRAM_FLEX[morphology_marker] != 'separator':
-            normal_word_found = True
-        else:
-            position_in_text += len(text_form)
-            i += 1
+    if is_diminutive_func is is_diminutive and cache is None:
+        verdicts = decide_table(table)
+        return [(table.word_starts[word_index], table.word_ends[word_index])
+                for word_index in range(table.number_of_words) if verdicts[word_index]]
 
-    # ok, go trough the rest of analyzed text
+    started = time.perf_counter()
+    cache_hits, cache_misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
     diminutives = []
-    while i < len(text_analyzed):
-        # invariant: i < len(text_analyzed)
-        # invariant: text_analyzed[i] is some word (not a separator)
-        # invariant: position_in_text points to the beginning of the word
-
-        # collect all possible interpretations of the word
-        interpretations = []  # or segments/nodes in analysis graph
-        word_morphology = None
-        whitespace_found = False
-        while i < len(text_analyzed) and not whitespace_found:
-            _, _, word_morphology = text_analyzed[i]
-            _, _, morphology_marker, _, _ = word_morphology
-
-            if GRAM_FLEX[morphology_marker] == 'separator':
-                whitespace_found = True
-            else:
-                interpretations.append(text_analyzed[i])
-                i += 1
-        # invariant: i==len(text_analyzed) or text_analyzed[i] is separator
-        # invariant: len(segments) > 0
-        # invariant: word_morphology == text_analyzed[i][2]
-
-        # update positions in the text
-        if i == len(text_analyzed):
-            end_position_in_text = len(text)
-            to_skip = 0
+    for word_index in range(table.number_of_words):
+        # is diminutive?
+        if cache is not None and is_diminutive_func is is_diminutive:
+            verdict = cache.is_diminutive_in_table(table, word_index)
         else:
-            separator = word_morphology[0]
-            end_position_in_text = text.index(separator, position_in_text)
-            to_skip = len(separator)
-            i += 1
-        # invariant: (position_in_text, end_position_in_text) matches one word
+            verdict = is_diminutive_func(table.word(word_index), table.interpretations(word_index))
 
-        # is diminutive?
-        if is_diminutive_func(text[position_in_text:end_position_in_text], interpretations):
-            diminutives.append((position_in_text, end_position_in_text))
+        if verdict:
+            diminutives.append((table.word_starts[word_index], table.word_ends[word_index]))
 
-        # update positions in the text
-        position_in_text = end_position_in_text + to_skip
+    stats.add_time('score', time.perf_counter() - started)
+    if cache is not None and is_diminutive_func is is_diminutive:
+        stats.count(verdict_cache_hits=cache.hits - cache_hits, verdict_cache_misses=cache.misses - cache_misses)
+    return diminutives
 
-        # skip following separators
-        normal_word_found = False
-        while i < len(text_analyzed) and not normal_word_found:
-            segment_start, segment_end, word_morphology = text_analyzed[i]
-            text_form, _, morphology_marker, _, _ = word_morphology
 
-            if GRAM_FLEX[morphology_marker] != 'separator':
-                normal_word_found = True
-            else:
-                # assumption: separators have only one item in text_analyzed
-                position_in_text += len(text_form)
-                i += 1
+def find_diminutives_with_probabilities(text: str, token_cache: Optional[TokenLookup] = None) \
+        -> List[Tuple[int, int, float]]:
+    """Same as find_diminutives (with the default is_diminutive_func),
+    but returns also probabilities of words being diminutive (see is_diminutive_probability).
+    Returns:
+        list with start and end positions of diminutives and their probabilities, possibly empty
+    """
+    if token_cache is not None:
+        return token_cache.find_diminutives_with_probabilities(text)
+
+    try:
+        table = AnalysisTable.analyse(text)
+    except TypeError as e:
+        L.error('Error, probably passed bytes instead of a string.')
+        raise e
+    return scored_diminutives(table)
+
+
+def scored_diminutives(table: AnalysisTable) -> List[Tuple[int, int, float]]:
+    """Start and end positions and probabilities of diminutives from the AnalysisTable."""
+    probabilities = score_table(table)
+    return [(table.word_starts[word_index], table.word_ends[word_index], float(probabilities[word_index]))
+            for word_index in range(table.number_of_words)
+            if probabilities[word_index] > DIMINUTIVE_PROBABILITY_THRESHOLD]
+
+
+def find_diminutives_many(texts: Iterable[str], is_diminutive_func: IsDiminutiveFunc = is_diminutive,
+                          cache: Optional[VerdictCache] = None, batch_size: int = BATCH_SIZE,
+                          token_cache: Optional[TokenLookup] = None) -> List[List[Tuple[int, int]]]:
+    """Finds diminutives in many texts, see find_diminutives.
+    Texts are joined (with BATCH_SEPARATOR) into batches of about `batch_size` characters
+    and every batch is analysed with a single morfeusz2 call, which is much faster
+    than calling find_diminutives for every short text (a line, a word, a docx run).
+    Args:
+        texts: texts to analyse
+        is_diminutive_func: see find_diminutives
+        cache: see find_diminutives
+        batch_size: number of characters to analyse at once
+        token_cache: see find_diminutives
+    Returns:
+        for every text, list with start and end positions of diminutives in that text
+    """
+    return _find_in_batches(texts, partial(find_diminutives, is_diminutive_func=is_diminutive_func, cache=cache,
+                                           token_cache=token_cache), batch_size)
+
+
+def find_diminutives_with_probabilities_many(texts: Iterable[str], batch_size: int = BATCH_SIZE,
+                                             token_cache: Optional[TokenLookup] = None) \
+        -> List[List[Tuple[int, int, float]]]:
+    """Finds diminutives and their probabilities in many texts,
+    see find_diminutives_many and find_diminutives_with_probabilities.
+    """
+    return _find_in_batches(texts, partial(find_diminutives_with_probabilities, token_cache=token_cache), batch_size)
+
+
+Span = TypeVar('Span', Tuple[int, int], Tuple[int, int, float])
+
+
+def _find_in_batches(texts: Iterable[str], find_func: Callable[[str], List[Span]],
+                     batch_size: int) -> List[List[Span]]:
+    """Splits texts into batches for the find_func, see find_diminutives_many."""
+    results: List[List[Span]] = []
+
+    batch: List[str] = []
+    batch_length = 0
+    for text in texts:
+        batch.append(text)
+        batch_length += len(text) + len(BATCH_SEPARATOR)
+        if batch_length >= batch_size:
+            results.extend(_find_in_batch(batch, find_func))
+            batch = []
+            batch_length = 0
+
+    if batch:
+        results.extend(_find_in_batch(batch, find_func))
+    return results
+
+
+def _find_in_batch(texts: List[str], find_func: Callable[[str], List[Span]]) -> List[List[Span]]:
+    """Analyses joined texts and splits the results back, see find_diminutives_many."""
+    # start positions of texts in the joined text
+    starts = []
+    position = 0
+    for text in texts:
+        starts.append(position)
+        position += len(text) + len(BATCH_SEPARATOR)
+
+    results: List[List[Span]] = [[] for _ in texts]
+    for span in find_func(BATCH_SEPARATOR.join(texts)):
+        # separators never belong to words, so every diminutive is inside one text
+        start_position, end_position = span[0], span[1]
+        text_index = bisect.bisect_right(starts, start_position) - 1
+        text_start = starts[text_index]
+        results[text_index].append((start_position - text_start, end_position - text_start) + span[2:])
+    return results
+
+
+def iter_chunks(stream: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[int, str]]:
+    """Reads text from the stream in chunks cut at whitespaces, so no word is split between chunks.
+    A chunk is longer than `chunk_size` only if it has a longer word. Runs of non-whitespace characters
+    longer than MAX_WORD_LENGTH and `chunk_size` are cut, at a separator in their second half if there is one,
+    so only the newly read text is searched and chunks are never longer than their sum.
+    Args:
+        stream: file-like object to read text from
+        chunk_size: number of characters to read at once
+    Returns:
+        iterator over positions of chunks in the whole text and the chunks
+    """
+    position_in_text = 0
+    rest: List[str] = []  # read text without whitespaces
+    rest_length = 0
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+
+        last_whitespace = LAST_WHITESPACE.search(data)
+        if last_whitespace is None:
+            # no whitespace, the word continues in the next chunk
+            rest.append(data)
+            rest_length += len(data)
+            if rest_length < max(MAX_WORD_LENGTH, chunk_size):
+                continue
+            text = ''.join(rest)
+            last_separator = LAST_SEPARATOR.search(text, len(text) // 2)
+            chunk_end = len(text) if last_separator is None else last_separator.start() + 1
+        else:
+            text = ''.join(rest) + data
+            chunk_end = rest_length + last_whitespace.start() + 1
+
+        yield position_in_text, text[:chunk_end]
+        position_in_text += chunk_end
+        rest = [text[chunk_end:]]
+        rest_length = len(text) - chunk_end
+
+    if rest_length:
+        yield position_in_text, ''.join(rest)
+
+
+def iter_diminutives(stream: TextIO, chunk_size: int = CHUNK_SIZE,
+                     is_diminutive_func: IsDiminutiveFunc = is_diminutive, cache: Optional[VerdictCache] = None) \
+        -> Iterator[Tuple[int, int]]:
+    """Finds diminutives in the text read from the stream, see find_diminutives.
+    Text is analysed in chunks (see iter_chunks), so memory usage is proportional to the `chunk_size`.
+    Args:
+        stream: file-like object to read text from
+        chunk_size: number of characters to analyse at once
+        is_diminutive_func: see find_diminutives
+        cache: see find_diminutives
+    Returns:
+        iterator over start and end positions of diminutives in the whole text
+    """
+    for position_in_text, chunk in iter_chunks(stream, chunk_size):
+        for start_position, end_position in find_diminutives(chunk, is_diminutive_func, cache):
+            yield position_in_text + start_position, position_in_text + end_position
 
-    return diminutives
 
+Item = TypeVar('Item')
 
-def print_diminutives(text: str, diminutives: List[Tuple[int, int]]):
-    if diminutives:
-        print('Diminutives:')
-        for diminutive in diminutives:
-            start_position, end_position = diminutive
-            print(f'- {repr(text[start_position:end_position])}')
+
+def imap_ordered(func: Callable[[Item], Any], items: Iterable[Item], executor: Optional[Executor] = None,
+                 jobs: int = 1) -> Iterator[Tuple[Item, Any]]:
+    """Maps the function over items, in the executor if provided, keeping order of the items.
+    At most twice `jobs` items are processed at once, so items are read as the results are consumed.
+    Stats of worker processes are merged into the global `stats`.
+    Args:
+        func: function to call, must be picklable for process executors
+        items: arguments for the function
+        executor: executor to run the function in, None to run in the current process
+        jobs: number of executor's workers
+    Returns:
+        iterator over items and results of the function for them
+    """
+    if executor is None:
+        for item in items:
+            yield item, func(item)
+        return
+
+    window = 2 * jobs
+
+    def result(future: Future) -> Any:
+        if not isinstance(executor, ProcessPoolExecutor):
+            return future.result()
+        func_result, worker_stats = future.result()
+        stats.merge(worker_stats)
+        return func_result
+
+    if isinstance(executor, ProcessPoolExecutor):
+        func = partial(collect_stats, func)
+
+    pending: deque = deque()
+    for item in items:
+        pending.append((item, executor.submit(func, item)))
+        if len(pending) >= window:
+            item, future = pending.popleft()
+            yield item, result(future)
+
+    while pending:
+        item, future = pending.popleft()
+        yield item, result(future)
+
+
+def print_stats(stats_format: str = 'text'):
+    """Prints the global stats to standard error, as text or JSON (one line)."""
+    if stats_format == 'json':
+        print(json.dumps(stats.snapshot(), sort_keys=True), file=sys.stderr)
     else:
-        print('No diminutives.')
+        print('\n'.join(stats.format()), file=sys.stderr)
+
+
+def print_diminutives(text: str, diminutives: Iterable[Tuple[int, int]]):
+    print_diminutive_words(text[start_position:end_position] for start_position, end_position in diminutives)
+
+
+def print_diminutive_words(words: Iterable[str]):
+    sys.stdout.write(format_diminutive_words(words))
+
+
+def format_diminutive_words(words: Iterable[str], header: bool = True) -> str:
+    """Lists diminutives for the text output format. Without the header only words are listed."""
+    lines = ''.join(f'- {repr(word)}\n' for word in words)
+    if not header:
+        return lines
+    return 'Diminutives:\n' + lines if lines else 'No diminutives.\n'
+
+
+# line number, start and end position in the line, word and probability
+Record = Tuple[int, int, int, str, float]
+
+
+def line_records(text: str, diminutives: Iterable[Tuple[int, int, float]], line_number: int = 1,
+                 column: int = 0) -> Iterator[Record]:
+    """Positions of diminutives found in the text as line numbers and positions in lines.
+    Args:
+        text: analysed text, possibly many lines
+        diminutives: start and end positions of diminutives in the text and their probabilities
+        line_number: number of the text's first line
+        column: position of the text's start in its first line
+    Returns:
+        iterator over records of diminutives
+    """
+    line_starts = [-column]
+    position = text.find('\n')
+    while position != -1:
+        line_starts.append(position + 1)
+        position = text.find('\n', position + 1)
+
+    for start_position, end_position, probability in diminutives:
+        line_index = bisect.bisect_right(line_starts, start_position) - 1
+        line_start = line_starts[line_index]
+        yield (line_number + line_index, start_position - line_start, end_position - line_start,
+               text[start_position:end_position], probability)
+
+
+def format_records(records: Iterable[Record], output_format: str) -> str:
+    """Formats records of diminutives as JSON lines or tab separated values, one record per line."""
+    if output_format == 'jsonl':
+        return ''.join(json.dumps({'line': line_number, 'start': start_position, 'end': end_position, 'word': word,
+                                   'probability': probability}, ensure_ascii=False) + '\n'
+                       for line_number, start_position, end_position, word, probability in records)
+    return ''.join(f'{line_number}\t{start_position}\t{end_position}\t{word}\t{probability!r}\n'
+                   for line_number, start_position, end_position, word, probability in records)
 
 
 def main():
@@ -498,35 +2279,161 @@ def main():
     parser.add_argument(
         '-i', '--input',
         help='Load text from a file')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes for a file or non-interactive standard input')
+    parser.add_argument('--cache', metavar='FILE',
+                        help='Persistent cache of analysed tokens (sqlite database), not used with --verbose')
+    parser.add_argument('--lexicon', metavar='FILE',
+                        help='Precompiled lexicon (see rozpoznawaczek-lexicon), not used with --verbose')
+    parser.add_argument('--dictionary', metavar='FILE',
+                        help='Analyse with a dictionary of forms instead of morfeusz2 (tab separated dump, '
+                             'see DictionaryAnalyser)')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='text',
+                        help='Output format, jsonl and tsv have a record (line number, start and end position '
+                             'in the line, word, probability) for every diminutive')
+    parser.add_argument('--no-echo', action='store_true',
+                        help='Do not print lines read from standard input (text format)')
+    parser.add_argument('--stats', nargs='?', const='text', choices=['text', 'json'],
+                        help='Print counters and timers of analysis stages to standard error at exit')
     parser.add_argument("-v", "--verbose", help="debug output",
                         action="store_true")
 
     # args parsing and sanity checks
     args = parser.parse_args()
+    install_interrupt_handler()
 
     L.setLevel('INFO')
+    is_diminutive_func = is_diminutive
     if args.verbose:
         L.setLevel('DEBUG')
+        is_diminutive_func = is_diminutive_verbose
 
-    # handle file
-    if args.input:
+    if args.jobs < 1:
+        L.error('Number of jobs must be positive')
+        sys.exit(1)
+
+    # before opening caches, their versions depend on the dictionary
+    worker_analysers: Tuple[Analyser, ...] = ()
+    if args.dictionary:
         try:
-            with open(args.input, 'r') as f:
-                text = f.read()
-        except Exception as e:
-            L.error('Error reading file `%s`: %s', args.input, e)
+            analyser = DictionaryAnalyser(args.dictionary)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            L.error('Error loading dictionary `%s`: %s', args.dictionary, e)
             sys.exit(1)
+        init_analysers(analyser)
+        worker_analysers = (analyser,)
 
-        if not text:
-            L.error('Did not read anything')
+    token_cache: Optional[TokenLookup] = None
+    if args.cache:
+        try:
+            token_cache = TokenCache(args.cache)
+        except sqlite3.Error as e:
+            L.error('Error opening cache `%s`: %s', args.cache, e)
             sys.exit(1)
 
-        diminutives = find_diminutives(text)
-        print_diminutives(text, diminutives)
+    if args.lexicon:
+        # imported here, the lexicon module depends on this one
+        from rozpoznawaczek.lexicon import Lexicon, LexiconError
+        try:
+            token_cache = Lexicon(args.lexicon, fallback=token_cache)
+        except (OSError, LexiconError) as e:
+            L.error('Error opening lexicon `%s`: %s', args.lexicon, e)
+            sys.exit(1)
 
-    # handle standard input
-    else:
+    executor = None
+    if args.jobs > 1:
+        executor = ProcessPoolExecutor(args.jobs, initializer=partial(init_worker, token_cache=token_cache),
+                                       initargs=worker_analysers)
+
+    started = time.perf_counter()
+    try:
+        find_and_print_diminutives(args.input, executor, is_diminutive_func, token_cache, args.format,
+                                   not args.no_echo, jobs=args.jobs)
+    except BrokenPipeError:
+        # output closed (f.e. by `head`), do not fail again when flushing it at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if token_cache is not None:
+            if executor is None:  # workers count hits and misses of their own copies
+                L.debug('Token cache: %s', token_cache.cache_info())
+            token_cache.close()
+        if args.stats:
+            stats.add_time('total', time.perf_counter() - started)
+            print_stats(args.stats)
+
+
+# token cache (or lexicon) of a worker process, set by init_worker
+worker_token_cache: Optional[TokenLookup] = None
+
+
+def with_token_cache(func: Callable[..., Any], item: Any, **kwargs) -> Any:
+    """Calls the function with the token cache of the worker process. Tasks are pickled for every call,
+    so the cache is passed to workers once, in init_worker, and not bound to the tasks.
+    """
+    return func(item, token_cache=worker_token_cache, **kwargs)
+
+
+def find_and_print_diminutives(filename: Optional[str], executor: Optional[Executor],
+                               is_diminutive_func: IsDiminutiveFunc, token_cache: Optional[TokenLookup] = None,
+                               output_format: str = 'text', echo: bool = True, output: Optional[TextIO] = None,
+                               jobs: int = 1):
+    """Finds diminutives in the file or standard input and prints them, see main.
+    Output is written once for every analysed chunk or batch of lines, and flushed only in the interactive mode.
+    With jsonl and tsv formats probabilities are computed with the default `is_diminutive_func`.
+    `jobs` is the number of executor's workers, see imap_ordered.
+    """
+    if output is None:
+        output = sys.stdout
+
+    def task(func: Callable[..., Any], **kwargs) -> Callable[[Any], Any]:
+        if executor is None:
+            return partial(func, token_cache=token_cache, **kwargs)
+        return partial(with_token_cache, func, **kwargs)
+
+    # handle file
+    if filename:
+        try:
+            with open(filename, 'r') as f:
+                chunks = iter_chunks(f)
+                first_chunk = next(chunks, None)
+                if first_chunk is None:
+                    L.error('Did not read anything')
+                    sys.exit(1)
+
+                texts = (chunk for _, chunk in itertools.chain([first_chunk], chunks))
+                if output_format == 'text':
+                    diminutives_found = False
+                    for text, diminutives in imap_ordered(
+                            task(find_diminutives, is_diminutive_func=is_diminutive_func),
+                            texts, executor, jobs):
+                        if diminutives:
+                            output.write(format_diminutive_words(
+                                (text[start_position:end_position] for start_position, end_position in diminutives),
+                                header=not diminutives_found))
+                            diminutives_found = True
+                    if not diminutives_found:
+                        output.write(format_diminutive_words([]))
+                    return
+
+                line_number, column = 1, 0
+                for text, diminutives in imap_ordered(
+                        task(find_diminutives_with_probabilities), texts, executor, jobs):
+                    output.write(format_records(line_records(text, diminutives, line_number, column), output_format))
+                    newlines = text.count('\n')
+                    line_number += newlines
+                    column = len(text) - text.rfind('\n') - 1 if newlines else column + len(text)
+        except BrokenPipeError:
+            raise
+        except (OSError, UnicodeDecodeError) as e:
+            L.error('Error reading file `%s`: %s', filename, e)
+            sys.exit(1)
+
+    # handle standard input, interactively
+    elif sys.stdin.isatty():
         # read text line by line
+        line_number = 0
         while True:
             text = sys.stdin.readline()
             if not text:
@@ -534,9 +2441,38 @@ def main():
 
             # find diminutives
             text = text[:-1]  # remove newline
-            print(f'Parsing line: {repr(text)}')
-            diminutives = find_diminutives(text)
-            print_diminutives(text, diminutives)
+            line_number += 1
+            if output_format == 'text':
+                diminutives = find_diminutives(text, is_diminutive_func, token_cache=token_cache)
+                output.write((f'Parsing line: {repr(text)}\n' if echo else '') + format_diminutive_words(
+                    text[start_position:end_position] for start_position, end_position in diminutives))
+            else:
+                output.write(format_records(line_records(
+                    text, find_diminutives_with_probabilities(text, token_cache), line_number), output_format))
+            output.flush()
+
+    # handle standard input from a pipe or a file, in batches of lines
+    else:
+        batches = iter(lambda: [line.rstrip('\n') for line in sys.stdin.readlines(BATCH_SIZE)], [])
+        if output_format == 'text':
+            for lines, lines_diminutives in imap_ordered(
+                    task(find_diminutives_many, is_diminutive_func=is_diminutive_func),
+                    batches, executor, jobs):
+                output.write(''.join(
+                    (f'Parsing line: {repr(text)}\n' if echo else '')
+                    + format_diminutive_words(text[start_position:end_position]
+                                              for start_position, end_position in diminutives)
+                    for text, diminutives in zip(lines, lines_diminutives)))
+            return
+
+        line_number = 1
+        for lines, lines_diminutives in imap_ordered(
+                task(find_diminutives_with_probabilities_many), batches, executor, jobs):
+            output.write(format_records((record for index, (text, diminutives)
+                                         in enumerate(zip(lines, lines_diminutives))
+                                         for record in line_records(text, diminutives, line_number + index)),
+                                        output_format))
+            line_number += len(lines)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Local HTTP service recognising diminutives, with analysers kept warm between requests.
+    Example:
+        $ rozpoznawaczek-serve --port 8765 &
+        $ curl -s localhost:8765/diminutives -d '{"text": "Miałaś, babo, kotka"}'
+        {"diminutives": [{"start": 14, "end": 19, "word": "kotka", "probability": 0.5}]}
+        $ curl -s localhost:8765/diminutives -d '{"texts": ["kotek", "pies"]}'
+        {"results": [[{"start": 0, "end": 5, "word": "kotek", "probability": 0.41666666666666663}], []]}
+
+    Concurrent requests are grouped into micro-batches (up to `--batch-size` characters, waiting
+    at most `--batch-delay` milliseconds for more requests) and every batch is analysed with
+    one find_diminutives_with_probabilities_many call in a worker pool, so the event loop never blocks.
+    At most `--queue-size` requests wait for analysis, next ones get `503 Service Unavailable`.
+
+    Authors:
+    * Izabela Stechnij
+    * Dominik Sepioło
+    * Paweł Płatek
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from http import HTTPStatus
+from sys import exit
+from typing import Any, Dict, List, Optional, Tuple
+
+from rozpoznawaczek.rozpoznawaczek import (
+    BATCH_SIZE, L, find_diminutives_with_probabilities_many, init_worker,
+    install_interrupt_handler)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+QUEUE_SIZE = 1024
+BATCH_DELAY = 2  # milliseconds
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+# request waiting for analysis: its texts and the future for their results
+PendingRequest = Tuple[List[str], 'asyncio.Future[List[List[Tuple[int, int, float]]]]']
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class DiminutivesServer:
+    """Micro-batching server, see the module documentation."""
+
+    def __init__(self, executor: Executor, workers: int = 1, queue_size: int = QUEUE_SIZE,
+                 batch_size: int = BATCH_SIZE, batch_delay: float = BATCH_DELAY / 1000):
+        self.executor = executor
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.queue: 'asyncio.Queue[PendingRequest]' = asyncio.Queue(queue_size)
+        self.batchers: List['asyncio.Task[None]'] = []
+
+    def start(self):
+        """Starts a batching task for every worker."""
+        self.batchers = [asyncio.ensure_future(self.batcher()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for batcher in self.batchers:
+            batcher.cancel()
+        await asyncio.gather(*self.batchers, return_exceptions=True)
+
+    async def find_diminutives(self, texts: List[str]) -> List[List[Tuple[int, int, float]]]:
+        """Queues the texts for analysis and waits for results.
+        Raises:
+            HTTPError: if the queue is full
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((texts, future))
+        except asyncio.QueueFull:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, 'Too many requests waiting for analysis')
+        return await future
+
+    async def batcher(self):
+        """Collects queued requests into batches and analyses them in the executor."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            batch_length = sum(len(text) for text in batch[0][0])
+
+            # wait a bit for more requests
+            deadline = loop.time() + self.batch_delay
+            while batch_length < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending_request = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(pending_request)
+                batch_length += sum(len(text) for text in pending_request[0])
+
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                results = await loop.run_in_executor(self.executor, find_diminutives_with_probabilities_many, texts)
+            except Exception as e:
+                L.error('Error when analysing a batch: %s', e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, 'Analysis failed'))
+                continue
+
+            position = 0
+            for request_texts, future in batch:
+                if not future.done():
+                    future.set_result(results[position:position + len(request_texts)])
+                position += len(request_texts)
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[HTTPStatus, Dict[str, Any]]:
+        """Handles one HTTP request, returns status and JSON response."""
+        if path == '/health':
+            return HTTPStatus.OK, {'status': 'ok', 'queued': self.queue.qsize()}
+
+        if path != '/diminutives':
+            raise HTTPError(HTTPStatus.NOT_FOUND, 'Not found, use /diminutives')
+        if method != 'POST':
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, 'Use POST with JSON: {"text": ...} or {"texts": [...]}')
+
+        try:
+            request = json.loads(body)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f'Invalid JSON: {e}')
+
+        if isinstance(request, dict) and isinstance(request.get('text'), str):
+            texts = [request['text']]
+            single_text = True
+        elif isinstance(request, dict) and isinstance(request.get('texts'), list) \
+                and all(isinstance(text, str) for text in request['texts']):
+            texts = request['texts']
+            single_text = False
+        else:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Expected JSON: {"text": ...} or {"texts": [...]}')
+
+        results = [[{'start': start_position, 'end': end_position,
+                     'word': text[start_position:end_position], 'probability': probability}
+                    for start_position, end_position, probability in diminutives]
+                   for text, diminutives in zip(texts, await self.find_diminutives(texts))]
+
+        if single_text:
+            return HTTPStatus.OK, {'diminutives': results[0]}
+        return HTTPStatus.OK, {'results': results}
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Minimal HTTP/1.1 with keep-alive, requests must have Content-Length (no chunked encoding)."""
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                    break
+                if not request_line.strip():
+                    break
+
+                keep_alive = True
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                    headers = await read_headers(reader)
+                    keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+                    content_length = int(headers.get('content-length', '0'))
+                    if content_length < 0 or content_length > MAX_BODY_SIZE:
+                        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'Request body too large')
+                    body = await reader.readexactly(content_length)
+
+                    status, response = await self.handle(method, path.split('?')[0], body)
+                except HTTPError as e:
+                    status, response = e.status, {'error': str(e)}
+                except ValueError:
+                    status, response = HTTPStatus.BAD_REQUEST, {'error': 'Malformed HTTP request'}
+                    keep_alive = False
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as e:
+                    L.error('Error when handling a request: %s', e)
+                    status, response = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'Internal server error'}
+
+                response_body = json.dumps(response, ensure_ascii=False).encode('utf-8')
+                writer.write(f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+                             f'Content-Type: application/json; charset=utf-8\r\n'
+                             f'Content-Length: {len(response_body)}\r\n'
+                             f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1'))
+                writer.write(response_body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if not line.strip():
+            return headers
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+
+async def serve(host: str, port: int, executor: Executor, workers: int, queue_size: int,
+                batch_size: int, batch_delay: float, ready: Optional['asyncio.Future[None]'] = None):
+    """Runs the server until cancelled."""
+    diminutives_server = DiminutivesServer(executor, workers, queue_size, batch_size, batch_delay)
+    diminutives_server.start()
+    server = await asyncio.start_server(diminutives_server.serve_connection, host, port)
+    L.info('Listening on http://%s:%d', host, port)
+    if ready is not None:
+        ready.set_result(None)
+    try:
+        await asyncio.Future()  # forever
+    finally:
+        server.close()
+        await server.wait_closed()
+        await diminutives_server.stop()
+
+
+def warm_up():
+    """Loads analysers and morfeusz2 dictionaries, so the first request does not wait for them."""
+    find_diminutives_with_probabilities_many(['kotek'])
+
+
+def init_server_worker():
+    """Initializer of worker processes, every one of them is warmed up when started."""
+    init_worker()
+    warm_up()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve diminutives recognition over HTTP')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Address to listen on')
+    parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes, 1 to analyse in a thread of the server process')
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE,
+                        help='Maximal number of requests waiting for analysis')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help='Maximal number of characters analysed in one batch')
+    parser.add_argument('--batch-delay', type=float, default=BATCH_DELAY,
+                        help='Milliseconds to wait for more requests to batch')
+    parser.add_argument("-v", "--verbose", help="debug output",
+                        action="store_true")
+
+    args = parser.parse_args()
+    install_interrupt_handler()
+
+    L.setLevel('INFO')
+    if args.verbose:
+        L.setLevel('DEBUG')
+
+    if args.jobs < 1 or args.queue_size < 1 or args.batch_size < 1 or args.batch_delay < 0:
+        L.error('Number of jobs, queue size and batch size must be positive, batch delay not negative')
+        return 1
+
+    # morfeusz2 analysers are not thread safe, so with one job all analysis is done in one thread
+    if args.jobs > 1:
+        executor: Executor = ProcessPoolExecutor(args.jobs, initializer=init_server_worker)
+    else:
+        executor = ThreadPoolExecutor(1, initializer=warm_up)
+
+    # start all workers before the first request (spawn and forkserver start them one by one, as tasks are
+    # submitted), they warm up in the initializer
+    started = time.perf_counter()
+    for future in [executor.submit(int) for _ in range(args.jobs)]:
+        future.result()
+    L.debug('Workers ready in %.3f s', time.perf_counter() - started)
+
+    try:
+        asyncio.run(serve(args.host, args.port, executor, args.jobs, args.queue_size,
+                          args.batch_size, args.batch_delay / 1000))
+    except OSError as e:
+        L.error('Error when starting the server: %s', e)
+        return 1
+    finally:
+        executor.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -11,14 +11,18 @@ setup(
     url='https://github.com/GrosQuildu/agh_nlp_diminutives_recognition',
     author='Izabela Stechnij, Dominik Sepioło, Paweł Płatek',
     author_email='e2.8a.95@gmail.com',
-    install_requires=['python-docx'],  # and 'morfeusz2', see http://morfeusz.sgjp.pl/download/
+    install_requires=['python-docx>=1.0'],  # and 'morfeusz2', see http://morfeusz.sgjp.pl/download/
     extras_require={
-        'DEV': ['isort', 'mypy', 'pyflakes', 'autopep8', 'pytest', 'pyinstaller']
+        'DEV': ['isort', 'mypy', 'pyflakes', 'autopep8', 'pytest', 'pyinstaller'],
+        'FAST': ['numpy']
     },
     entry_points={
         'console_scripts': [
             'rozpoznawaczek = rozpoznawaczek.rozpoznawaczek:main',
-            'rozpoznawaczek-docx = rozpoznawaczek.docx_highlight:main'
+            'rozpoznawaczek-docx = rozpoznawaczek.docx_highlight:main',
+            'rozpoznawaczek-serve = rozpoznawaczek.serve:main',
+            'rozpoznawaczek-lexicon = rozpoznawaczek.lexicon:main',
+            'rozpoznawaczek-evaluate = rozpoznawaczek.evaluate:main'
         ]
     }
 )
\ No newline at end of file
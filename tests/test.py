@@ -8,15 +8,67 @@
     * Paweł Płatek
 """
 
+import asyncio
+import io
+import json
 import logging
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
-from typing import Optional, Tuple
-
-from rozpoznawaczek import (IsDiminutiveFunc, diminutive_sets,
-                            find_diminutives, has_diminutive_suffix)
+from typing import List, Optional, Tuple
+from unittest.mock import patch
+
+from docx import Document  # type: ignore
+from docx.enum.text import WD_COLOR_INDEX  # type: ignore
+
+from rozpoznawaczek import (AnalysisTable, CachingAnalyser, DictionaryAnalyser,
+                            IsDiminutiveFunc, SuffixMatcher, TagTable,
+                            TokenCache, VerdictCache, diminutive_sets,
+                            explain_diminutive, find_diminutives,
+                            find_diminutives_many,
+                            find_diminutives_with_probabilities,
+                            find_diminutives_with_probabilities_many,
+                            has_diminutive_suffix, init_analysers, iter_chunks,
+                            iter_diminutives, stats, tag_table)
+from rozpoznawaczek.docx_highlight import (MANIFEST_NAME, diminutives_in_runs,
+                                           highlight, highlight_many,
+                                           load_manifest)
+from rozpoznawaczek.evaluate import (extract_features, features_version,
+                                     load_features, measures, read_labelled,
+                                     save_features, sweep, weight_grid)
+from rozpoznawaczek.lexicon import (Lexicon, LexiconError, build_lexicon,
+                                    verify_lexicon)
+from rozpoznawaczek.rozpoznawaczek import (DIMINUTIVE_PROBABILITY_THRESHOLD,
+                                           MAX_WORD_LENGTH, LazyAnalyser,
+                                           collect_stats, decide_table,
+                                           diminutive_probability_in_table,
+                                           dump_dictionary,
+                                           find_and_print_diminutives,
+                                           format_records, is_diminutive,
+                                           is_diminutive_in_table,
+                                           is_diminutive_probability,
+                                           line_records, morfeusz_analyser,
+                                           morfeusz_lemma_analyser,
+                                           numpy_module, score_table)
+from rozpoznawaczek.serve import DiminutivesServer
 
 L = logging.getLogger(__name__)
 
+TRAINING_FILES = ['./tests/training_diminutives.txt', './tests/training_not_diminutives.txt']
+
+
+def training_words() -> List[str]:
+    """Words from the training files, diminutives first."""
+    words: List[str] = []
+    for filename in TRAINING_FILES:
+        with open(filename, 'r') as f:
+            words.extend(line.strip() for line in f if line.strip())
+    return words
+
 
 # not using that one anywhere
 def count_diminutives_whole_text(filename: str, is_diminutive_func: Optional[IsDiminutiveFunc] = None) -> Tuple[int, int]:
@@ -54,31 +106,32 @@ def count_diminutives(filename: str, is_diminutive_func: Optional[IsDiminutiveFu
     diminutives = 0
     not_diminutives = 0
     with open(filename, 'r') as f:
-        for line in f:
-            word = line.strip().lower()
-            if word:
-                if is_diminutive_func:
-                    results = find_diminutives(word, is_diminutive_func)
-                else:
-                    results = find_diminutives(word)
+        words = [line.strip().lower() for line in f]
+    words = [word for word in words if word]
+
+    if is_diminutive_func:
+        words_results = find_diminutives_many(words, is_diminutive_func)
+    else:
+        words_results = find_diminutives_many(words)
 
-                # we are parsing one word at a time
-                assert len(results) <= 1
+    for word, results in zip(words, words_results):
+        # we are parsing one word at a time
+        assert len(results) <= 1
 
-                if len(results) == 1:
-                    result = results[0]
+        if len(results) == 1:
+            result = results[0]
 
-                    # match start of the word
-                    assert result[0] == 0
+            # match start of the word
+            assert result[0] == 0
 
-                    # match end of the word
-                    assert result[1] == len(word)
+            # match end of the word
+            assert result[1] == len(word)
 
-                    diminutives += 1
-                    L.debug('%s - diminutive', word)
-                else:
-                    not_diminutives += 1
-                    L.debug('%s - normal word', word)
+            diminutives += 1
+            L.debug('%s - diminutive', word)
+        else:
+            not_diminutives += 1
+            L.debug('%s - normal word', word)
 
     return diminutives, not_diminutives
 
@@ -142,5 +195,413 @@ def test_training_data():
         assert recall_our >= recall_simple or recall_simple > 0.95
 
 
+def test_suffix_matcher():
+    # compiled matcher must agree with the simple suffix matching function
+    matcher = SuffixMatcher(diminutive_sets)
+    for word in training_words():
+        matches = matcher.match(word)
+        for suffix_set_name, suffix_set in diminutive_sets.items():
+            assert (suffix_set_name in matches) == has_diminutive_suffix(word, suffix_set)
+            if suffix_set_name in matches:
+                assert matches[suffix_set_name] in suffix_set
+                assert word.lower().endswith(matches[suffix_set_name])
+
+    assert SuffixMatcher({'a': {'ek', 'szek'}, 'b': {'ka'}}).match('Koszek') == {'a': 'szek'}
+    assert SuffixMatcher({'a': {'ek'}}).match('k') == {}
+
+
+def test_verdict_cache():
+    text = 'Kawki, herbatki moje kochanie? Kawki i herbatki, kotki i kotki.'
+    expected = find_diminutives(text)
+
+    cache = VerdictCache()
+    assert find_diminutives(text, cache=cache) == expected
+    hits, misses, _, currsize = cache.cache_info()
+    assert find_diminutives(text, cache=cache) == expected
+    # every word of the second run is a hit
+    assert cache.cache_info() == (2 * hits + misses, misses, cache.maxsize, currsize)
+
+    # LRU eviction
+    cache = VerdictCache(maxsize=4)
+    assert find_diminutives(text, cache=cache) == expected
+    assert cache.cache_info().currsize == 4
+
+    # custom functions bypass the cache
+    cache.cache_clear()
+    find_diminutives(text, lambda word, interpretations: False, cache=cache)
+    assert cache.cache_info() == (0, 0, 4, 0)
+
+
+def test_tag_table():
+    tags = TagTable()
+    tag_info = tags['subst:sg:nom.acc.voc:n:ncol']
+    assert tag_info == ('rzeczownik', 'n', 'sg', 'ncol', False)
+    assert tags['subst:sg:nom.acc.voc:n:ncol'] is tag_info
+    assert tags['subst:sg:gen.dat.acc.loc.voc:n:ncol'] is tag_info
+    assert tags['subst:sg.pl:nom:m3'].grammar_number == 'pl'
+    assert tags['interp'].is_separator and tags['sp'].is_separator
+    assert tags['xyz'].part_of_speech == 'nieznane'
+
+
+def test_find_diminutives_many():
+    texts = ['Kawki, herbatki moje kochanie?', '', 'Jajeczkami', ' kotki\n', 'stół', 'A potem gorzki los tych niewiniątek']
+    expected = [find_diminutives(text) for text in texts]
+    assert find_diminutives_many(texts) == expected
+    assert find_diminutives_many(texts, batch_size=1) == expected
+    assert find_diminutives_many([]) == []
+
+
+def test_iter_diminutives():
+    with open('./README.md', 'r') as f:
+        text = f.read()
+    text += ' ' + 'x' * 100 + '\t\u00a0kotki'
+    expected = find_diminutives(text)
+
+    for chunk_size in [1, 7, 100, 4096, len(text) * 2]:
+        chunks = list(iter_chunks(io.StringIO(text), chunk_size))
+        assert ''.join(chunk for _, chunk in chunks) == text
+        assert all(text.startswith(chunk, position) for position, chunk in chunks)
+        assert list(iter_diminutives(io.StringIO(text), chunk_size)) == expected
+
+    # runs without whitespace are cut, at separators if possible
+    text = 'x' * 10000 + ',' + 'y' * 10000 + ' kotki'
+    for chunk_size in [1, 100, 4096, 1 << 16]:
+        chunks = [chunk for _, chunk in iter_chunks(io.StringIO(text), chunk_size)]
+        assert ''.join(chunks) == text and max(map(len, chunks)) <= MAX_WORD_LENGTH + chunk_size
+    assert next(iter_chunks(io.StringIO('x' * 3000 + ',' + 'y' * 2000), 1000)) == (0, 'x' * 3000 + ',')
+
+
+def test_word_offsets():
+    # emoticons are analysed as overlapping separators and symbols
+    for text in ['Coś:) kotek', 'Hej:-) kotek i piesek', 'No;) kotek']:
+        assert [text[start:end] for start, end in find_diminutives(text)] == ['kotek']
+    assert find_diminutives_many(['Coś:) kotek', 'No;) kotek']) == [[(6, 11)], [(5, 10)]]
+
+
+def test_explain_diminutive():
+    # explanations must agree with the fast path
+    for word in training_words():
+        trace = explain_diminutive(word)
+        assert (find_diminutives(word) == [(0, len(word))]) == trace.is_diminutive
+
+    trace = explain_diminutive('Jajeczkami')
+    assert trace.is_diminutive
+    checks = trace.interpretations[0].checks
+    assert [check_trace.check.name for check_trace in checks] == ['Paweł Miczko', 'Długosz', 'lemma re-run', 'GPDK']
+    assert checks[0].matched_suffix == 'czko'
+    assert checks[2].rerun is not None and checks[2].rerun.word == 'jajeczko'
+
+
+def test_analysis_table():
+    """AnalysisTable stores the same interpretations as morfeusz2.analyse returns"""
+    texts = ['miałaś babo kurę', '  Kotki,,, i   pieski!\n', 'Jajeczkami', '', '...']
+    for text in texts:
+        text_analyzed = morfeusz_analyser.analyse(text)
+        for table in [AnalysisTable.analyse(text), AnalysisTable.from_interpretations(text, text_analyzed)]:
+            assert len(table) == len(text_analyzed)
+            interpretations = []
+            for word_index in range(table.number_of_words):
+                word_interpretations = table.interpretations(word_index)
+                assert word_interpretations[0][0] < word_interpretations[-1][1]
+                interpretations.extend(word_interpretations)
+            assert interpretations == [interpretation for interpretation in text_analyzed
+                                       if not tag_table[interpretation[2][2]].is_separator]
+
+    table = AnalysisTable.analyse('miałaś babo kurę')
+    assert [table.word(i) for i in range(table.number_of_words)] == ['miałaś', 'babo', 'kurę']
+    assert list(table.word_starts) == [0, 7, 12]
+    assert list(table.word_ends) == [6, 11, 16]
+
+    # symbols overlapping separators (':P', ':D') do not move starts of words
+    for text, word in [('a :Psotnik', 'Psotnik'), (':Dzieciątko', 'Dzieciątko')]:
+        table = AnalysisTable.analyse(text)
+        assert table.word(table.number_of_words - 1) == word
+
+
+def test_score_table():
+    """Vectorised scoring gives the same probabilities as scoring word by word"""
+    words = training_words()
+    words.extend([word.capitalize() for word in words])
+
+    text = ' '.join(words)
+    table = AnalysisTable.analyse(text)
+    probabilities = [diminutive_probability_in_table(table, word_index)
+                     for word_index in range(table.number_of_words)]
+    assert list(score_table(table)) == probabilities
+    assert find_diminutives(text) == find_diminutives(text, partial(is_diminutive))
+
+
+def test_decide_diminutive():
+    """Verdicts without needless checks are the same as from probabilities"""
+    words = training_words()
+    words.extend([word.capitalize() for word in words] + ['kotków', 'Jajeczkami', 'dzieciątka', 'pieski'])
+
+    table = AnalysisTable.analyse(' '.join(words))
+    verdicts = [diminutive_probability_in_table(table, word_index) > DIMINUTIVE_PROBABILITY_THRESHOLD
+                for word_index in range(table.number_of_words)]
+    assert [is_diminutive_in_table(table, word_index) for word_index in range(table.number_of_words)] == verdicts
+    assert list(decide_table(table)) == verdicts
+    for word_index in range(table.number_of_words):
+        word, interpretations = table.word(word_index), table.interpretations(word_index)
+        for allows_rerun in [True, False]:
+            assert is_diminutive(word, interpretations, allows_rerun=allows_rerun) == \
+                (is_diminutive_probability(word, interpretations, allows_rerun=allows_rerun) >
+                 DIMINUTIVE_PROBABILITY_THRESHOLD)
+
+
+def test_find_diminutives_with_probabilities():
+    texts = ['Kawki, herbatki moje kochanie?', '', 'kotek i pies', 'Jajeczkami']
+    results = find_diminutives_with_probabilities_many(texts, batch_size=16)
+    assert [[(start, end) for start, end, _ in diminutives] for diminutives in results] == find_diminutives_many(texts)
+    assert results[3] == find_diminutives_with_probabilities(texts[3]) == [(0, 10, explain_diminutive('Jajeczkami').probability)]
+
+
+def test_serve():
+    async def requests(diminutives_server: DiminutivesServer):
+        diminutives_server.start()
+        try:
+            return await asyncio.gather(
+                diminutives_server.handle('POST', '/diminutives', '{"text": "Miałaś, babo, kotka"}'.encode('utf-8')),
+                diminutives_server.handle('POST', '/diminutives', '{"texts": ["kotek", "pies"]}'.encode('utf-8')),
+                diminutives_server.handle('POST', '/diminutives', '{"text": null, "texts": []}'.encode('utf-8')),
+                diminutives_server.handle('POST', '/diminutives', '{"text": 5, "texts": ["kotek"]}'.encode('utf-8')))
+        finally:
+            await diminutives_server.stop()
+
+    with ThreadPoolExecutor(1) as executor:
+        (_, single), (_, many), (_, empty), (_, mixed) = asyncio.run(requests(DiminutivesServer(executor)))
+    assert single == {'diminutives': [{'start': 14, 'end': 19, 'word': 'kotka', 'probability': 0.5}]}
+    assert [[diminutive['word'] for diminutive in diminutives] for diminutives in many['results']] == [['kotek'], []]
+    assert empty == {'results': []}
+    assert [len(diminutives) for diminutives in mixed['results']] == [1]
+
+
+def test_token_cache():
+    texts = ['Kawki, herbatki moje kochanie?', 'Kotek i piesek, KOTEK i pies.', '', 'Jajeczkami']
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'cache.sqlite')
+        cache = TokenCache(path, maxsize=4)
+        for text in texts:
+            assert find_diminutives(text, token_cache=cache) == find_diminutives(text)
+            assert find_diminutives_with_probabilities(text, token_cache=cache) == \
+                find_diminutives_with_probabilities(text)
+        assert cache.cache_info().currsize <= 4
+
+        # shared between instances (and processes), entries of other versions are not used
+        cache.close()
+        cache = TokenCache(path)
+        assert find_diminutives('Jajeczkami', token_cache=cache) == [(0, 10)]
+        assert cache.cache_info()[:2] == (1, 0)
+        cache.close()
+        cache = TokenCache(path)
+        cache.version = 'other'
+        assert find_diminutives('Jajeczkami', token_cache=cache) == [(0, 10)]
+        assert cache.cache_info()[:2] == (0, 1)
+        cache.close()
+
+
+def test_lexicon():
+    words = training_words()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'lexicon.bin')
+        count, skipped = build_lexicon(words + ['...', 'kotek,', 'miałaś'], path)
+        assert count + skipped == len(set(words)) + 3
+
+        lexicon = Lexicon(path)
+        assert len(lexicon) == count
+        assert verify_lexicon(lexicon) == []
+        assert lexicon.get('kotek') is not None and lexicon.get('kotek,') is None and lexicon.get('kotku') is None
+        assert lexicon.get('...') == 0.0
+
+        text = ' '.join(words) + '\nKawki, herbatki moje kochanie? Miałaś, babo, kotka.'
+        assert find_diminutives(text, token_cache=lexicon) == find_diminutives(text)
+        assert lexicon.cache_info().misses > 0
+        lexicon.close()
+
+        with open(path, 'rb') as f:
+            truncated = f.read(100)
+        for content in [b'not a lexicon' * 100, truncated]:
+            with open(path, 'wb') as f:
+                f.write(content)
+            try:
+                Lexicon(path)
+                assert False, 'LexiconError expected'
+            except LexiconError:
+                pass
+
+
+def test_analysers():
+    words = training_words()
+    lemmas = {lemma.split(':')[0] for word in words for _, _, (_, lemma, _, _, _) in morfeusz_analyser.analyse(word)}
+    text = ' '.join(words) + '\nKawki, herbatki  moje kochanie? Miałaś, babo, KOTKA.\t12'
+    expected = find_diminutives_with_probabilities(text)
+
+    caching_analyser = CachingAnalyser(morfeusz_analyser)
+    assert caching_analyser.analyse(text) == morfeusz_analyser.analyse(text)
+    assert caching_analyser.cache_info().hits > 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'dictionary.tsv')
+        assert dump_dictionary(sorted(set(words) | lemmas | {'kawki', 'herbatki', 'moje', 'kochanie', 'babo'}),
+                               path) > len(words)
+        dictionary_analyser = DictionaryAnalyser(path)
+        assert dictionary_analyser.dict_id() != morfeusz_analyser.dict_id()
+        assert [segment[2][:3] for segment in dictionary_analyser.analyse('Kotek, xyz...\n1')] == [
+            ('Kotek', 'kotek', 'subst:sg:nom:m2'), ('Kotek', 'kotka', 'subst:pl:gen:f'), (',', ',', 'interp'),
+            (' ', ' ', 'sp'), ('xyz', 'xyz', 'ign'), ('.', '.', 'interp'), ('.', '.', 'interp'),
+            ('.', '.', 'interp'), ('\n', '\n', 'sp'), ('1', '1', 'dig')]
+        # created on first use, also after pickling for worker processes
+        lazy_analyser = pickle.loads(pickle.dumps(LazyAnalyser(partial(DictionaryAnalyser, path))))
+        assert lazy_analyser.analyse(text) == dictionary_analyser.analyse(text)
+
+        default_analysers = morfeusz_analyser, morfeusz_lemma_analyser
+        try:
+            init_analysers(caching_analyser, morfeusz_lemma_analyser)
+            assert find_diminutives_with_probabilities(text) == expected
+            init_analysers(dictionary_analyser)
+            assert [(start, end) for start, end, _ in find_diminutives_with_probabilities(text)] == \
+                [(start, end) for start, end, _ in expected]
+        finally:
+            init_analysers(*default_analysers)
+
+
+def test_stats():
+    stats.reset()
+    text = 'Kawki, herbatki moje kochanie? Miałaś, babo, kotka.'
+    find_diminutives(text)
+    find_diminutives(text, cache=VerdictCache())
+    snapshot = stats.snapshot()
+    assert snapshot['counters']['analysed_texts'] == 2
+    assert snapshot['counters']['characters'] == 2 * len(text)
+    assert snapshot['counters']['tokens'] == 2 * 7
+    assert snapshot['counters']['verdict_cache_misses'] == 7
+    assert snapshot['counters']['lemma_reruns_skipped'] > 0
+    assert snapshot['timers']['analyse']['calls'] == 2 and snapshot['timers']['score']['seconds'] > 0
+    assert snapshot['derived']['interpretations_per_token'] > 1
+    assert json.loads(json.dumps(snapshot)) == snapshot
+
+    # stats of worker processes are sent back with results
+    stats.reset()
+    result, worker_stats = collect_stats(find_diminutives, text)
+    assert worker_stats['counters']['analysed_texts'] == 1 and stats.snapshot()['counters'] == {}
+    assert result == find_diminutives(text)
+    assert stats.snapshot()['counters']['analysed_texts'] == 1
+    stats.merge(worker_stats)
+    assert stats.snapshot()['counters']['analysed_texts'] == 2
+    assert stats.format()[0] == 'Stats:'
+
+
+def test_docx_highlight():
+    document = Document()
+    paragraph = document.add_paragraph()
+    for text, bold in [('Miałaś, babo, ko', False), ('t', True), ('ka', False), (' i psa.', True)]:
+        paragraph.add_run(text).bold = bold
+    untouched = document.add_paragraph('Bez zdrobnień.')
+    untouched_xml = untouched._p.xml
+    tabbed = document.add_paragraph()
+    tabbed.add_run('Psa\tkotka').italic = True
+    document.add_table(1, 1).cell(0, 0).text = 'Kotka'
+    document.sections[0].header.paragraphs[0].text = 'Kotka'
+    assert diminutives_in_runs([run.text for run in paragraph.runs], [(14, 19)]) == [[(14, 16)], [(0, 1)], [(0, 2)], []]
+
+    _, diminutives_found = highlight(document, WD_COLOR_INDEX.YELLOW)
+    assert diminutives_found == 4
+    assert [paragraph.text for paragraph in document.paragraphs] == [
+        'Miałaś, babo, kotka i psa.', 'Bez zdrobnień.', 'Psa\tkotka']
+    for paragraph in [document.tables[0].cell(0, 0).paragraphs[0], document.sections[0].header.paragraphs[0]]:
+        assert [run.font.highlight_color for run in paragraph.runs] == [WD_COLOR_INDEX.YELLOW]
+    highlighted = [(run.text, run.bold) for run in document.paragraphs[0].runs
+                   if run.font.highlight_color == WD_COLOR_INDEX.YELLOW]
+    assert highlighted == [('ko', False), ('t', True), ('ka', False)]
+    assert untouched._p.xml == untouched_xml
+    assert [(run.text, run.italic, run.font.highlight_color) for run in tabbed.runs] == [
+        ('Psa\t', True, None), ('kotka', True, WD_COLOR_INDEX.YELLOW)]
+
+
+def test_highlight_many():
+    with tempfile.TemporaryDirectory() as directory:
+        input_directory, output_directory = os.path.join(directory, 'in'), os.path.join(directory, 'out')
+        os.makedirs(os.path.join(input_directory, 'sub'))
+        for name in ['a.docx', os.path.join('sub', 'b.docx')]:
+            document = Document()
+            document.add_paragraph('Miałaś, babo, kotka')
+            document.save(os.path.join(input_directory, name))
+
+        assert highlight_many(input_directory, output_directory, WD_COLOR_INDEX.YELLOW)
+        manifest = load_manifest(os.path.join(output_directory, MANIFEST_NAME))
+        assert sorted(manifest) == ['a.docx', os.path.join('sub', 'b.docx')]
+        output = os.path.join(output_directory, 'sub', 'b.docx')
+        assert Document(output).paragraphs[0].runs[-1].font.highlight_color == WD_COLOR_INDEX.YELLOW
+
+        # unchanged files are skipped, outputs not written by highlight_many are not overwritten
+        os.remove(output)
+        with open(os.path.join(output_directory, 'c.docx'), 'w') as f:
+            f.write('other')
+        shutil.copy(os.path.join(input_directory, 'a.docx'), os.path.join(input_directory, 'c.docx'))
+        modified = os.path.getmtime(os.path.join(output_directory, 'a.docx'))
+        assert not highlight_many(os.path.join(input_directory, '*.docx'), output_directory, WD_COLOR_INDEX.YELLOW)
+        assert os.path.getmtime(os.path.join(output_directory, 'a.docx')) == modified
+        assert not os.path.isfile(output)
+        assert 'c.docx' not in load_manifest(os.path.join(output_directory, MANIFEST_NAME))
+
+        assert highlight_many(input_directory, output_directory, WD_COLOR_INDEX.YELLOW, force=True)
+        assert os.path.isfile(output)
+
+
+def test_output_formats():
+    text = 'babo, kotka\nMiałaś, kotka'
+    diminutives = find_diminutives_with_probabilities(text)
+    assert list(line_records(text, diminutives, 3, column=5)) == [
+        (3, 11, 16, 'kotka', diminutives[0][2]), (4, 8, 13, 'kotka', diminutives[1][2])]
+    records = [(1, 0, 5, 'kotka', 0.5)]
+    assert format_records(records, 'tsv') == '1\t0\t5\tkotka\t0.5\n'
+    assert json.loads(format_records(records, 'jsonl')) == {
+        'line': 1, 'start': 0, 'end': 5, 'word': 'kotka', 'probability': 0.5}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'text.txt')
+        with open(path, 'w') as f:
+            f.write('Pies.\n' * 1000 + 'Miałaś, babo, kotka\n')
+        for chunk_size in [1 << 16, 16]:
+            output = io.StringIO()
+            with patch('rozpoznawaczek.rozpoznawaczek.iter_chunks', partial(iter_chunks, chunk_size=chunk_size)):
+                find_and_print_diminutives(path, None, is_diminutive, output_format='tsv', output=output)
+            assert output.getvalue().split('\t')[:4] == ['1001', '14', '19', 'kotka']
+
+
+def test_evaluate_without_numpy():
+    with patch('rozpoznawaczek.evaluate.numpy_module', return_value=None):
+        try:
+            extract_features(['kotek'], [True])
+            assert False, 'ImportError expected'
+        except ImportError:
+            pass
+
+
+@unittest.skipUnless(numpy_module(), 'numpy is not installed')
+def test_evaluate():
+    tp, fn, fp, tn, precision, recall = get_statistical_measures()
+    words, labels = read_labelled(TRAINING_FILES[:1], TRAINING_FILES[1:])
+    features = extract_features(words, labels)
+
+    thresholds, counts = sweep(features, weight_grid([1.0]), [DIMINUTIVE_PROBABILITY_THRESHOLD])
+    assert counts.tolist() == [[[tp, fp, fn, tn]]]
+
+    # the first row is the current algorithm, others are evaluated in chunks
+    thresholds, counts = sweep(features, weight_grid([0.0, 0.5, 1.0]), [0.1, DIMINUTIVE_PROBABILITY_THRESHOLD, 0.9])
+    assert counts.shape == (len(weight_grid([0.0, 0.5, 1.0])), 3, 4) and (counts.sum(axis=2) == len(words)).all()
+    assert counts[0, list(thresholds).index(DIMINUTIVE_PROBABILITY_THRESHOLD)].tolist() == [tp, fp, fn, tn]
+    assert measures(counts)[0][0, 1] == precision and measures(counts)[1][0, 1] == recall
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'features.npz')
+        version = features_version(words, labels)
+        save_features(features, path, version)
+        loaded = load_features(path, version)
+        assert loaded is not None and (sweep(loaded, weight_grid([1.0]), [0.4])[1] == counts[:1, 1:2]).all()
+        assert load_features(path, features_version(words[1:], labels[1:])) is None
+
+
 L.setLevel('INFO')
 test_training_data()